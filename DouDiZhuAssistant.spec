@@ -1,13 +1,26 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
+
 from PyInstaller.utils.hooks import collect_all
 
-datas = [('app\\templates', 'app\\templates'), ('app\\static', 'app\\static'), ('douzero_WP', 'douzero_WP')]
+# DOUZERO_ONNX_BUILD=1 ships onnxruntime and the exported douzero_WP\*.onnx models instead of
+# torch and the .ckpt files (export first: python -m app.onnx_backend --ckpt-dir douzero_WP).
+# `build_exe.bat --onnx` installs requirements-onnx.txt, exports and builds with this flag set.
+onnx_build = os.environ.get('DOUZERO_ONNX_BUILD') == '1'
+
+datas = [('app\\templates', 'app\\templates'), ('app\\static', 'app\\static')]
+datas += [('douzero_WP\\*.onnx', 'douzero_WP')] if onnx_build else [('douzero_WP', 'douzero_WP')]
 binaries = []
 hiddenimports = []
 tmp_ret = collect_all('douzero')
 datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]
 tmp_ret = collect_all('flask')
 datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]
+if onnx_build:
+    tmp_ret = collect_all('onnxruntime')
+    datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]
+    # douzero.dmc (training) is the only torch user left; the app imports torch lazily.
+    hiddenimports = [name for name in hiddenimports if not name.startswith('douzero.dmc')]
 
 
 a = Analysis(
@@ -18,8 +31,8 @@ a = Analysis(
     hiddenimports=hiddenimports,
     hookspath=[],
     hooksconfig={},
-    runtime_hooks=[],
-    excludes=[],
+    runtime_hooks=['pyi_rth_onnx_backend.py'] if onnx_build else [],
+    excludes=['torch', 'douzero.dmc'] if onnx_build else [],
     noarchive=False,
     optimize=0,
 )
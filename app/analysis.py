@@ -0,0 +1,440 @@
+"""
+Streaming offline analysis of recorded games against the DouZero models.
+
+Records are read lazily from JSON-lines files (optionally gzip-compressed),
+observations are built in a process pool, forward passes run in one
+dedicated inference process, and results are appended to CSV or Parquet
+as they arrive. The number of records in flight is bounded, so memory
+does not grow with corpus size, and a checkpoint file allows resuming.
+
+Record format (one JSON object per line):
+    {"id": "...", "role": "landlord", "my_hand": "...", "landlord_cards": "...", "actions": [...]}
+or, to score every seat of a fully recorded game:
+    {"id": "...", "hands": {"landlord": "...", "landlord_down": "...", "landlord_up": "..."},
+     "landlord_cards": "...", "actions": [...]}
+`actions` entries use any format accepted by `app.replay.parse_action_entry`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import functools
+import gzip
+import io
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+
+from .checkpoints import DEFAULT_CKPT_DIR
+from .engine.parser import ParseError, action_to_text
+from .engine.state import ROLE_ORDER, ValidationError
+from .replay import build_game_state, parse_action_entry
+
+RESULT_FIELDS = [
+    "game_id",
+    "offset",
+    "step",
+    "role",
+    "actual",
+    "recommended",
+    "matched",
+    "num_legal",
+    "actual_value",
+    "best_value",
+]
+DEFAULT_BATCH_ROWS = 4096
+DEFAULT_MAX_IN_FLIGHT = 256
+DEFAULT_CHECKPOINT_EVERY = 1000
+
+
+@dataclass
+class EncodedPosition:
+    """Compact int8 observation of one decision; float batches are rebuilt in the inference process."""
+
+    step: int
+    role: str
+    z: Any  # (5, 162) int8
+    x_no_action: Any  # (F,) int8
+    actions: Any  # (N, 54) int8
+    legal_texts: list[str]
+    actual_index: int
+
+
+@dataclass
+class EncodedRecord:
+    offset: int
+    game_id: str
+    positions: list[EncodedPosition]
+    error: str | None = None
+
+
+def _open_text(path: Path) -> io.TextIOBase:
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def iter_records(paths: Iterable[str | Path], start_offset: int = 0) -> Iterator[tuple[int, Any]]:
+    """Yield (global offset, parsed record) lazily; lines that are not valid JSON yield the raw string."""
+    offset = 0
+    for path in paths:
+        with _open_text(Path(path)) as handle:
+            for line in handle:
+                if not line.strip():
+                    continue
+                if offset >= start_offset:
+                    try:
+                        yield offset, json.loads(line)
+                    except json.JSONDecodeError:
+                        yield offset, line
+                offset += 1
+
+
+def record_positions(record: dict[str, Any]) -> Iterator[tuple[int, Any, list[int]]]:
+    """Replay a record and yield (step, infoset, actual action) at every scored decision."""
+    actions = [parse_action_entry(entry) for entry in record.get("actions", [])]
+    hands = record.get("hands")
+    if hands:
+        seats = [(role, hands[role]) for role in ROLE_ORDER]
+    else:
+        seats = [(record.get("role"), record.get("my_hand"))]
+
+    for role, hand in seats:
+        state = build_game_state(role, hand, record.get("landlord_cards"))
+        for step, (declared_actor, action) in enumerate(actions, start=1):
+            if declared_actor is not None and declared_actor != state.acting_role:
+                raise ValidationError(f"Step {step}: expected {state.acting_role} to act, log says {declared_actor}.")
+            if state.need_user_action():
+                yield step, state.build_infoset_for_user(), action
+            state.apply_action(action)
+            if state.game_over:
+                break
+
+
+def encode_record(item: tuple[int, Any]) -> EncodedRecord:
+    """Pool worker: replay one record and encode its decisions."""
+    import numpy as np
+    from douzero.env.env import get_obs
+
+    offset, record = item
+    game_id = str(record.get("id", offset)) if isinstance(record, dict) else str(offset)
+    if not isinstance(record, dict):
+        return EncodedRecord(offset, game_id, [], error="Record is not a JSON object.")
+
+    positions: list[EncodedPosition] = []
+    try:
+        for step, infoset, actual in record_positions(record):
+            legal = infoset.legal_actions
+            obs = get_obs(infoset)
+            positions.append(
+                EncodedPosition(
+                    step=step,
+                    role=infoset.player_position,
+                    z=obs["z"],
+                    x_no_action=obs["x_no_action"],
+                    actions=np.ascontiguousarray(obs["x_batch"][:, -54:], dtype=np.int8),
+                    legal_texts=[action_to_text(action) for action in legal],
+                    actual_index=legal.index(actual),
+                )
+            )
+    except (ParseError, ValidationError, KeyError, TypeError, ValueError) as exc:
+        return EncodedRecord(offset, game_id, [], error=str(exc))
+    return EncodedRecord(offset, game_id, positions)
+
+
+def _score_records(scorer, records: list[EncodedRecord]) -> list[tuple[int, list[dict[str, Any]], str | None]]:
+    """Score all positions of `records` with one forward pass per role."""
+    import numpy as np
+
+    by_role: dict[str, list[EncodedPosition]] = {}
+    for record in records:
+        for position in record.positions:
+            by_role.setdefault(position.role, []).append(position)
+
+    values: dict[int, Any] = {}
+    for role, positions in by_role.items():
+        z_rows = np.concatenate([np.repeat(p.z[np.newaxis], len(p.actions), axis=0) for p in positions])
+        x_rows = np.concatenate(
+            [np.hstack((np.repeat(p.x_no_action[np.newaxis], len(p.actions), axis=0), p.actions)) for p in positions]
+        )
+        scores = scorer.score(role, z_rows.astype(np.float32), x_rows.astype(np.float32))
+        offset = 0
+        for position in positions:
+            values[id(position)] = scores[offset : offset + len(position.actions)]
+            offset += len(position.actions)
+
+    output = []
+    for record in records:
+        rows = []
+        for position in record.positions:
+            scores = values[id(position)]
+            best = int(scores.argmax())
+            rows.append(
+                {
+                    "game_id": record.game_id,
+                    "offset": record.offset,
+                    "step": position.step,
+                    "role": position.role,
+                    "actual": position.legal_texts[position.actual_index],
+                    "recommended": position.legal_texts[best],
+                    "matched": best == position.actual_index,
+                    "num_legal": len(position.legal_texts),
+                    "actual_value": float(scores[position.actual_index]),
+                    "best_value": float(scores[best]),
+                }
+            )
+        output.append((record.offset, rows, record.error))
+    return output
+
+
+def _inference_main(task_queue, result_queue, scorer_factory: Callable[[], Any], batch_rows: int) -> None:
+    """Dedicated inference process: drain queued records into large batches, emit results in order."""
+    try:
+        _inference_loop(task_queue, result_queue, scorer_factory(), batch_rows)
+    except BaseException as exc:
+        # A plain string tells the consumer that inference failed.
+        result_queue.put(f"{type(exc).__name__}: {exc}")
+        return
+    result_queue.put(None)
+
+
+def _inference_loop(task_queue, result_queue, scorer, batch_rows: int) -> None:
+    finished = False
+    while not finished:
+        item = task_queue.get()
+        if item is None:
+            break
+        batch = [item]
+        rows = sum(len(p.actions) for p in item.positions)
+        while rows < batch_rows:
+            try:
+                item = task_queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                finished = True
+                break
+            batch.append(item)
+            rows += sum(len(p.actions) for p in item.positions)
+        for result in _score_records(scorer, batch):
+            result_queue.put(result)
+
+
+class CsvResultWriter:
+    """Appends rows to one CSV file; resume truncates to the last checkpointed size."""
+
+    def __init__(self, path: Path, resume_size: int | None):
+        self.path = path
+        exists = path.exists() and resume_size is not None
+        self._handle = open(path, "r+" if exists else "w", newline="", encoding="utf-8")
+        if exists:
+            self._handle.truncate(resume_size)
+            self._handle.seek(resume_size)
+        self._writer = csv.DictWriter(self._handle, fieldnames=RESULT_FIELDS)
+        if not exists or resume_size == 0:
+            self._writer.writeheader()
+
+    def write_rows(self, rows: list[dict[str, Any]]) -> None:
+        self._writer.writerows(rows)
+
+    def flush(self) -> dict[str, Any]:
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        return {"size": self._handle.tell()}
+
+    def close(self) -> None:
+        self._handle.close()
+
+
+class ParquetResultWriter:
+    """
+    Writes one Parquet part file per checkpoint into a directory.
+
+    The checkpointed size is the number of parts; resume deletes any part
+    written after the last checkpoint, and a fresh run deletes them all.
+    """
+
+    def __init__(self, path: Path, resume_size: int | None):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as exc:  # pragma: no cover - optional dependency
+            raise RuntimeError("Parquet output requires pyarrow (`pip install pyarrow`).") from exc
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.path = path
+        path.mkdir(parents=True, exist_ok=True)
+        self._rows: list[dict[str, Any]] = []
+        self._part = resume_size or 0
+        for part in path.glob("part-*.parquet"):
+            if int(part.stem.removeprefix("part-")) >= self._part:
+                part.unlink()
+
+    def write_rows(self, rows: list[dict[str, Any]]) -> None:
+        self._rows.extend(rows)
+
+    def flush(self) -> dict[str, Any]:
+        if self._rows:
+            table = self._pa.Table.from_pylist(self._rows)
+            self._pq.write_table(table, self.path / f"part-{self._part:06d}.parquet")
+            self._part += 1
+            self._rows = []
+        return {"size": self._part}
+
+    def close(self) -> None:
+        self.flush()
+
+
+WRITERS = {"csv": CsvResultWriter, "parquet": ParquetResultWriter}
+
+
+def _checkpoint_path(output: Path) -> Path:
+    return output.with_name(output.name + ".checkpoint.json")
+
+
+def _read_checkpoint(output: Path) -> dict[str, Any] | None:
+    path = _checkpoint_path(output)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _write_checkpoint(output: Path, payload: dict[str, Any]) -> None:
+    path = _checkpoint_path(output)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(payload), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _throttled(items: Iterable[Any], slots: threading.Semaphore) -> Iterator[Any]:
+    # Pool.imap reads its input eagerly; acquiring a slot per record bounds what is in flight.
+    for item in items:
+        slots.acquire()
+        yield item
+
+
+def run_pipeline(
+    inputs: list[str | Path],
+    output: str | Path,
+    ckpt_dir: str | Path = DEFAULT_CKPT_DIR,
+    fmt: str = "csv",
+    workers: int | None = None,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY,
+    resume: bool = True,
+    scorer_factory: Callable[[], Any] | None = None,
+) -> dict[str, int]:
+    """Score every decision in `inputs`, appending rows to `output`. Returns record/row/error counts."""
+    from .model_bridge import ModelRegistry
+
+    output = Path(output)
+    checkpoint = _read_checkpoint(output) if resume else None
+    start_offset = checkpoint["next_offset"] if checkpoint else 0
+    writer = WRITERS[fmt](output, checkpoint.get("size") if checkpoint else None)
+    scorer_factory = scorer_factory or functools.partial(ModelRegistry, ckpt_dir)
+
+    ctx = multiprocessing.get_context()
+    task_queue = ctx.Queue(maxsize=max_in_flight)
+    result_queue = ctx.Queue(maxsize=max_in_flight)
+    inference = ctx.Process(
+        target=_inference_main,
+        args=(task_queue, result_queue, scorer_factory, batch_rows),
+        name="douzero-inference",
+        daemon=True,
+    )
+    inference.start()
+
+    slots = threading.BoundedSemaphore(max_in_flight)
+    feed_errors: list[BaseException] = []
+
+    def _feed(pool) -> None:
+        try:
+            records = _throttled(iter_records(inputs, start_offset), slots)
+            for encoded in pool.imap(encode_record, records, chunksize=4):
+                task_queue.put(encoded)
+        except BaseException as exc:  # surfaced after the result loop drains
+            feed_errors.append(exc)
+        finally:
+            task_queue.put(None)
+
+    counts = {"records": 0, "rows": 0, "errors": 0}
+    next_offset = start_offset
+    completed = False
+    with ctx.Pool(processes=workers) as pool:
+        feeder = threading.Thread(target=_feed, args=(pool,), name="douzero-analysis-feed", daemon=True)
+        feeder.start()
+        try:
+            while True:
+                try:
+                    result = result_queue.get(timeout=1.0)
+                except queue.Empty:
+                    if not inference.is_alive():
+                        raise RuntimeError("Inference process exited unexpectedly.") from None
+                    continue
+                if result is None:
+                    completed = True
+                    break
+                if isinstance(result, str):
+                    raise RuntimeError(f"Inference failed: {result}")
+                offset, rows, error = result
+                writer.write_rows(rows)
+                slots.release()
+                counts["records"] += 1
+                counts["rows"] += len(rows)
+                counts["errors"] += error is not None
+                next_offset = offset + 1
+                if counts["records"] % checkpoint_every == 0:
+                    _write_checkpoint(output, {"next_offset": next_offset, **writer.flush()})
+        finally:
+            if completed:
+                feeder.join()
+                inference.join()
+            else:
+                # The feeder may be blocked on a full queue; it is a daemon and dies with the pool.
+                inference.terminate()
+            _write_checkpoint(output, {"next_offset": next_offset, **writer.flush()})
+            writer.close()
+
+    if feed_errors:
+        raise feed_errors[0]
+    return counts
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Score recorded games (JSON lines, optionally .gz) against DouZero.")
+    parser.add_argument("inputs", nargs="+", help="Game record files (.jsonl or .jsonl.gz).")
+    parser.add_argument("--output", required=True, help="CSV file, or directory of part files for Parquet.")
+    parser.add_argument("--format", choices=sorted(WRITERS), default="csv")
+    parser.add_argument("--ckpt-dir", default=str(DEFAULT_CKPT_DIR))
+    parser.add_argument("--workers", type=int, default=None, help="Observation-building processes (default: CPUs).")
+    parser.add_argument("--batch-rows", type=int, default=DEFAULT_BATCH_ROWS)
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT)
+    parser.add_argument("--checkpoint-every", type=int, default=DEFAULT_CHECKPOINT_EVERY)
+    parser.add_argument("--no-resume", action="store_true", help="Ignore an existing checkpoint and start over.")
+    args = parser.parse_args(argv)
+
+    counts = run_pipeline(
+        args.inputs,
+        args.output,
+        ckpt_dir=args.ckpt_dir,
+        fmt=args.format,
+        workers=args.workers,
+        batch_rows=args.batch_rows,
+        max_in_flight=args.max_in_flight,
+        checkpoint_every=args.checkpoint_every,
+        resume=not args.no_resume,
+    )
+    print(json.dumps(counts))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Checkpoint loading with memory-mapped weights, plus a converter CLI.
+
+`load_model` prefers, next to `<position>.ckpt`:
+1. `<position>.safetensors` (when the `safetensors` package is installed),
+2. `<position>.mmap.pt`, a filtered zip-format state dict,
+3. the original `.ckpt`, memory-mapped when it is in zip format.
+Converted copies older than the `.ckpt` are ignored.
+On CPU a memory-mapped state dict is assigned into a module built on the
+meta device, so parameters point at file-backed pages: nothing is copied
+and processes loading the same file share those pages. Anything else
+(legacy pickles, missing keys, CUDA) takes the copying path.
+
+Convert once with `python -m app.checkpoints --ckpt-dir douzero_WP`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import pickle
+import sys
+import zipfile
+from pathlib import Path
+from typing import Any
+
+try:  # optional converted format
+    import safetensors.torch as safetensors_torch
+except ImportError:  # pragma: no cover - depends on environment
+    safetensors_torch = None
+
+SAFETENSORS_SUFFIX = ".safetensors"
+MMAP_SUFFIX = ".mmap.pt"
+ONNX_SUFFIX = ".onnx"
+POSITIONS = ("landlord", "landlord_up", "landlord_down")
+DEFAULT_CKPT_DIR = Path(__file__).resolve().parent.parent / "douzero_WP"
+
+
+def is_current(converted: Path, ckpt: Path) -> bool:
+    # A converted copy older than its .ckpt is stale (the weights were replaced).
+    if not converted.exists():
+        return False
+    return not ckpt.exists() or converted.stat().st_mtime_ns >= ckpt.stat().st_mtime_ns
+
+
+def checkpoint_files(ckpt: Path) -> list[Path]:
+    """`ckpt` and its converted copies: every file a model backend may read."""
+    return [ckpt, ckpt.with_suffix(SAFETENSORS_SUFFIX), ckpt.with_suffix(MMAP_SUFFIX), ckpt.with_suffix(ONNX_SUFFIX)]
+
+
+def _load_weights(torch, ckpt: Path, device: str) -> tuple[dict[str, Any], bool]:
+    """(state dict, whether its tensors are memory-mapped)."""
+    converted = ckpt.with_suffix(SAFETENSORS_SUFFIX)
+    if safetensors_torch is not None and is_current(converted, ckpt):
+        return safetensors_torch.load_file(str(converted), device="cpu"), True
+    error: Exception | None = None
+    for path in (ckpt.with_suffix(MMAP_SUFFIX), ckpt):
+        if not is_current(path, ckpt):
+            continue
+        try:
+            if zipfile.is_zipfile(path):
+                return torch.load(str(path), map_location="cpu", mmap=True, weights_only=True), True
+            # Legacy (non-zip) pickles cannot be mapped.
+            return torch.load(str(path), map_location=device, weights_only=True), False
+        except (RuntimeError, ValueError, OSError, EOFError, pickle.UnpicklingError) as exc:
+            # A truncated or corrupt copy: fall through to the next candidate.
+            error = exc
+    if error is not None:
+        raise error
+    raise FileNotFoundError(ckpt)
+
+
+def load_model(torch, model_cls, ckpt: Path, device: str = "cpu"):
+    """Build `model_cls` with weights from `ckpt` (or its converted copies), in eval mode."""
+    weights, mapped = _load_weights(torch, ckpt, device)
+    if mapped and device == "cpu":
+        with torch.device("meta"):
+            model = model_cls()
+        expected = model.state_dict()
+        if all(key in weights and weights[key].dtype == value.dtype for key, value in expected.items()):
+            model.load_state_dict({key: weights[key] for key in expected}, assign=True)
+            return model.eval()
+
+    model = model_cls()
+    model_state_dict = model.state_dict()
+    model_state_dict.update({key: value for key, value in weights.items() if key in model_state_dict})
+    model.load_state_dict(model_state_dict)
+    if device != "cpu":
+        model.cuda()
+    return model.eval()
+
+
+def convert(ckpt_dir: str | Path, fmt: str | None = None) -> list[Path]:
+    """Write a filtered, contiguous copy of each checkpoint in a mappable format."""
+    import torch
+
+    from .model_defs import model_dict
+
+    fmt = fmt or ("safetensors" if safetensors_torch is not None else "torch")
+    if fmt == "safetensors" and safetensors_torch is None:
+        raise RuntimeError("safetensors is not installed; use --format torch.")
+    written = []
+    for position in POSITIONS:
+        ckpt = Path(ckpt_dir) / f"{position}.ckpt"
+        expected = model_dict[position]().state_dict()
+        pretrained = torch.load(str(ckpt), map_location="cpu", weights_only=True)
+        weights = {key: pretrained.get(key, value).contiguous() for key, value in expected.items()}
+        if fmt == "safetensors":
+            target = ckpt.with_suffix(SAFETENSORS_SUFFIX)
+            safetensors_torch.save_file(weights, str(target))
+        else:
+            target = ckpt.with_suffix(MMAP_SUFFIX)
+            torch.save(weights, str(target))
+        written.append(target)
+    return written
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Convert DouZero checkpoints to a memory-mappable format.")
+    parser.add_argument("--ckpt-dir", default=str(DEFAULT_CKPT_DIR))
+    parser.add_argument("--format", choices=["safetensors", "torch"], default=None)
+    args = parser.parse_args(argv)
+    try:
+        written = convert(args.ckpt_dir, args.format)
+    except (FileNotFoundError, RuntimeError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+    print(json.dumps([str(path) for path in written]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+"""
+Vectorized legal-action generation for many hands at once.
+
+Every move `get_legal_actions` can produce is enumerated once into a global
+move table (index 0 is PASS). Cards are encoded as 54-bit thermometer masks
+in the DouZero feature layout (4 bits per rank 3..2, then X and D), so
+"hand contains move" is one `move & ~hand == 0` test per (hand, move) pair,
+and `MOVE_ENCODINGS[mask]` are ready-made action rows for the observation
+encoder.
+
+Each move is also registered under the (type, length) groups whose
+generator yields it, with the rank the matching `_filter_type_*` function
+compares; a rival descriptor (type, length, rank) then selects legal moves
+with array comparisons.
+"""
+
+from __future__ import annotations
+
+import itertools
+from functools import lru_cache
+from typing import Iterator, Sequence
+
+import numpy as np
+
+from .parser import CARD_TO_RANK_INDEX, RANK_CARDS
+from .rules import (
+    MIN_PAIRS,
+    MIN_SINGLE_CARDS,
+    MIN_TRIPLES,
+    TYPE_0_PASS,
+    TYPE_10_SERIAL_TRIPLE,
+    TYPE_11_SERIAL_3_1,
+    TYPE_12_SERIAL_3_2,
+    TYPE_13_4_2,
+    TYPE_14_4_22,
+    TYPE_15_WRONG,
+    TYPE_1_SINGLE,
+    TYPE_2_PAIR,
+    TYPE_3_TRIPLE,
+    TYPE_4_BOMB,
+    TYPE_5_KING_BOMB,
+    TYPE_6_3_1,
+    TYPE_7_3_2,
+    TYPE_8_SERIAL_SINGLE,
+    TYPE_9_SERIAL_PAIR,
+    get_move_type,
+)
+
+NUM_RANKS = len(RANK_CARDS)
+NUM_PLAIN_RANKS = 13  # 3..A and 2; four copies each
+NUM_CHAIN_RANKS = 12  # 3..A; 2 and jokers never extend a chain
+RANK_CAPS = (4,) * NUM_PLAIN_RANKS + (1, 1)
+MAX_HAND_CARDS = 20
+PASS_INDEX = 0
+
+# Rival descriptor columns.
+RIVAL_TYPE, RIVAL_LEN, RIVAL_RANK = 0, 1, 2
+LEAD_DESCRIPTOR = (TYPE_0_PASS, 0, 0)
+
+
+def _bit_positions() -> list[list[int]]:
+    # _cards2array layout: column-major 4x13 matrix (4 thermometer bits per rank), then X, D.
+    positions = [[rank * 4 + k for k in range(4)] for rank in range(NUM_PLAIN_RANKS)]
+    positions.append([52])
+    positions.append([53])
+    return positions
+
+
+_BIT_POSITIONS = _bit_positions()
+# _THERMO[rank][count] -> bits for `count` copies of RANK_CARDS[rank].
+_THERMO = [
+    [sum(1 << bit for bit in bits[:count]) for count in range(len(bits) + 1)] for bits in _BIT_POSITIONS
+]
+
+
+def counts_to_bits(counts: Sequence[int]) -> int:
+    bits = 0
+    for rank, count in enumerate(counts):
+        if count:
+            bits |= _THERMO[rank][count]
+    return bits
+
+
+def cards_to_bits(cards: Sequence[int]) -> int:
+    counts = [0] * NUM_RANKS
+    for card in cards:
+        counts[CARD_TO_RANK_INDEX[card]] += 1
+    return counts_to_bits(counts)
+
+
+def counts_matrix_to_bits(counts: np.ndarray) -> np.ndarray:
+    """(N, 15) rank counts -> (N,) uint64 card masks."""
+    counts = np.minimum(np.asarray(counts, dtype=np.int64), np.array(RANK_CAPS))
+    table = np.zeros((NUM_RANKS, 5), dtype=np.uint64)
+    for rank, row in enumerate(_THERMO):
+        table[rank, : len(row)] = row
+    return np.bitwise_or.reduce(table[np.arange(NUM_RANKS), counts], axis=1)
+
+
+def _counts_to_cards(counts: Sequence[int]) -> list[int]:
+    return [RANK_CARDS[rank] for rank, count in enumerate(counts) for _ in range(count)]
+
+
+def filter_rank(move: Sequence[int], move_type: int) -> int:
+    """The rank `get_legal_actions` compares for `move` when following a move of `move_type`."""
+    move = sorted(move)
+    if not move:
+        return 0
+    if move_type == TYPE_6_3_1:
+        return move[1]
+    if move_type in {TYPE_7_3_2, TYPE_13_4_2}:
+        return move[2]
+    if move_type in {TYPE_11_SERIAL_3_1, TYPE_12_SERIAL_3_2}:
+        return max(card for card in set(move) if move.count(card) == 3)
+    if move_type == TYPE_14_4_22:
+        return max(card for card in set(move) if move.count(card) == 4)
+    return move[0]
+
+
+def rival_descriptor(rival_move: Sequence[int]) -> tuple[int, int, int]:
+    """(type, length, rank) of the move to beat; PASS/empty means the player leads."""
+    if not rival_move:
+        return LEAD_DESCRIPTOR
+    info = get_move_type(list(rival_move))
+    move_type = info["type"]
+    if move_type == TYPE_15_WRONG:
+        raise ValueError(f"Rival move is not a valid move: {list(rival_move)}")
+    return move_type, info.get("len", 0), filter_rank(rival_move, move_type)
+
+
+def _multisets(ranks: list[int], size: int) -> Iterator[dict[int, int]]:
+    """Multisets of `size` cards over `ranks`, respecting per-rank deck limits."""
+    if size == 0:
+        yield {}
+        return
+    if not ranks:
+        return
+    first, rest = ranks[0], ranks[1:]
+    for take in range(min(RANK_CAPS[first], size), -1, -1):
+        for tail in _multisets(rest, size - take):
+            yield {first: take, **tail} if take else tail
+
+
+def _enumerate_moves() -> Iterator[tuple[tuple[int, ...], int, int]]:
+    """Yield (counts, generator type, chain length) for every move the generators can produce."""
+
+    def move(parts: dict[int, int]) -> tuple[int, ...]:
+        counts = [0] * NUM_RANKS
+        for rank, count in parts.items():
+            counts[rank] += count
+        return tuple(counts)
+
+    plain = range(NUM_PLAIN_RANKS)
+    for rank in range(NUM_RANKS):
+        yield move({rank: 1}), TYPE_1_SINGLE, 0
+    for rank in plain:
+        yield move({rank: 2}), TYPE_2_PAIR, 0
+        yield move({rank: 3}), TYPE_3_TRIPLE, 0
+        yield move({rank: 4}), TYPE_4_BOMB, 0
+    yield move({13: 1, 14: 1}), TYPE_5_KING_BOMB, 0
+
+    for triple in plain:
+        for single in range(NUM_RANKS):
+            if single != triple:
+                yield move({triple: 3, single: 1}), TYPE_6_3_1, 0
+        for pair in plain:
+            if pair != triple:
+                yield move({triple: 3, pair: 2}), TYPE_7_3_2, 0
+
+    for move_type, repeat, min_len in (
+        (TYPE_8_SERIAL_SINGLE, 1, MIN_SINGLE_CARDS),
+        (TYPE_9_SERIAL_PAIR, 2, MIN_PAIRS),
+        (TYPE_10_SERIAL_TRIPLE, 3, MIN_TRIPLES),
+    ):
+        for length in range(min_len, NUM_CHAIN_RANKS + 1):
+            if length * repeat > MAX_HAND_CARDS:
+                break
+            for start in range(NUM_CHAIN_RANKS - length + 1):
+                yield move({rank: repeat for rank in range(start, start + length)}), move_type, length
+
+    for length in range(MIN_TRIPLES, MAX_HAND_CARDS // 4 + 1):
+        for start in range(NUM_CHAIN_RANKS - length + 1):
+            chain = {rank: 3 for rank in range(start, start + length)}
+            others = [rank for rank in range(NUM_RANKS) if rank not in chain]
+            for kickers in _multisets(others, length):
+                yield move({**chain, **kickers}), TYPE_11_SERIAL_3_1, length
+            if length * 5 <= MAX_HAND_CARDS:
+                pair_ranks = [rank for rank in plain if rank not in chain]
+                for pairs in itertools.combinations(pair_ranks, length):
+                    yield move({**chain, **{rank: 2 for rank in pairs}}), TYPE_12_SERIAL_3_2, length
+
+    for four in plain:
+        others = [rank for rank in range(NUM_RANKS) if rank != four]
+        for kickers in _multisets(others, 2):
+            yield move({four: 4, **kickers}), TYPE_13_4_2, 0
+        for pairs in itertools.combinations([rank for rank in plain if rank != four], 2):
+            yield move({four: 4, pairs[0]: 2, pairs[1]: 2}), TYPE_14_4_22, 0
+
+
+def _build_tables():
+    index: dict[tuple[int, ...], int] = {(0,) * NUM_RANKS: PASS_INDEX}
+    groups: dict[tuple[int, int], list[int]] = {}
+    for counts, move_type, length in _enumerate_moves():
+        move_id = index.setdefault(counts, len(index))
+        groups.setdefault((move_type, length), []).append(move_id)
+
+    counts_table = np.array(list(index), dtype=np.int8)
+    cards = [_counts_to_cards(counts) for counts in index]
+    group_tables = {}
+    for (move_type, length), ids in groups.items():
+        ids_array = np.array(sorted(set(ids)), dtype=np.int64)
+        ranks = np.array([filter_rank(cards[i], move_type) for i in ids_array], dtype=np.int64)
+        group_tables[(move_type, length)] = (ids_array, ranks)
+    return index, counts_table, cards, group_tables
+
+
+MOVE_INDEX, MOVE_COUNTS, MOVE_CARDS, _GROUPS = _build_tables()
+NUM_MOVES = len(MOVE_CARDS)
+MOVE_BITS = counts_matrix_to_bits(MOVE_COUNTS)
+MOVE_ENCODINGS = ((MOVE_BITS[:, np.newaxis] >> np.arange(54, dtype=np.uint64)) & np.uint64(1)).astype(np.int8)
+BOMB_INDICES = _GROUPS[(TYPE_4_BOMB, 0)][0]
+KING_BOMB_INDEX = MOVE_INDEX[tuple([0] * 13 + [1, 1])]
+
+
+def move_index(move: Sequence[int]) -> int:
+    counts = [0] * NUM_RANKS
+    for card in move:
+        counts[CARD_TO_RANK_INDEX[card]] += 1
+    return MOVE_INDEX[tuple(counts)]
+
+
+@lru_cache(maxsize=None)
+def allowed_moves(descriptor: tuple[int, int, int]) -> np.ndarray:
+    """(NUM_MOVES,) bool: moves that may answer `descriptor`, ignoring what the hand holds."""
+    move_type, length, rank = descriptor
+    allowed = np.zeros(NUM_MOVES, dtype=bool)
+    if move_type == TYPE_0_PASS:
+        allowed[:] = True
+        allowed[PASS_INDEX] = False
+    elif move_type == TYPE_4_BOMB:
+        ids, ranks = _GROUPS[(TYPE_4_BOMB, 0)]
+        allowed[ids[ranks > rank]] = True
+        allowed[KING_BOMB_INDEX] = True
+    elif move_type != TYPE_5_KING_BOMB:
+        group = _GROUPS.get((move_type, length))
+        if group is not None:
+            ids, ranks = group
+            allowed[ids[ranks > rank]] = True
+        allowed[BOMB_INDICES] = True
+        allowed[KING_BOMB_INDEX] = True
+    if move_type != TYPE_0_PASS:
+        allowed[PASS_INDEX] = True
+    allowed.setflags(write=False)
+    return allowed
+
+
+@lru_cache(maxsize=None)
+def allowed_columns(descriptor: tuple[int, int, int]) -> np.ndarray:
+    """Indices of `allowed_moves(descriptor)`."""
+    columns = np.flatnonzero(allowed_moves(descriptor))
+    columns.setflags(write=False)
+    return columns
+
+
+def legal_action_masks(hand_counts: np.ndarray, rivals: np.ndarray, chunk_rows: int = 16) -> np.ndarray:
+    """
+    Legal-action masks for many (hand, rival) pairs.
+
+    hand_counts: (N, 15) rank counts in RANK_CARDS order.
+    rivals: (N, 3) descriptors (type, length, rank) from `rival_descriptor`.
+    Returns (N, NUM_MOVES) bool over the global move index.
+    """
+    hand_bits = counts_matrix_to_bits(hand_counts)
+    rivals = np.asarray(rivals, dtype=np.int64).reshape(len(hand_bits), 3)
+    unique, inverse = np.unique(rivals, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+
+    # Rows sharing a rival descriptor share candidate columns. Leading
+    # tests the whole table; answering a rival move only tests the few
+    # hundred moves of its group plus bombs. Small row chunks keep the
+    # temporaries cache-resident.
+    masks = np.zeros((len(hand_bits), NUM_MOVES), dtype=bool)
+    for group, descriptor in enumerate(unique):
+        descriptor = tuple(int(v) for v in descriptor)
+        rows = np.flatnonzero(inverse == group)
+        columns = allowed_columns(descriptor)
+        dense = len(columns) * 2 > NUM_MOVES
+        column_bits = MOVE_BITS if dense else MOVE_BITS[columns]
+        for start in range(0, len(rows), chunk_rows):
+            chunk = rows[start : start + chunk_rows]
+            held = hand_bits[chunk, np.newaxis]
+            contained = (column_bits[np.newaxis, :] | held) == held
+            if dense:
+                masks[chunk] = contained & allowed_moves(descriptor)
+            else:
+                masks[chunk[:, np.newaxis], columns] = contained
+    return masks
+
+
+def mask_to_actions(mask: np.ndarray) -> list[list[int]]:
+    return [list(MOVE_CARDS[i]) for i in np.flatnonzero(mask)]
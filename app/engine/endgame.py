@@ -0,0 +1,268 @@
+"""
+Exact endgame solver for small remaining hands.
+
+The user cannot see the opponents' cards, so a win is only proven if it
+holds for every deal consistent with the visible state. The solver runs an
+AND/OR search over *sets* of deals that share a public history:
+- at the user's turn one move is chosen and applied to every deal (OR);
+- at any other seat every move legal in some deal must be answered (AND);
+  after move m the user only knows the deal is one where m was legal, so
+  the search continues on that subset.
+Other seats (including a farmer teammate) are treated as adversarial, so a
+proof holds whatever they play. Pass inferences are not used here since a
+pass may be strategic.
+
+Positions are keyed with Zobrist hashes in a transposition table; root
+moves are ordered by model values when available, deeper moves by size.
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Sequence
+
+from .inference import NUM_RANKS, InferenceError, build_hand_model
+from .parser import CARD_TO_RANK_INDEX, RANK_CARDS
+from .rules import get_legal_actions
+
+if TYPE_CHECKING:
+    from .state import GameState
+
+MAX_ENDGAME_CARDS = 8
+MAX_DEALS = 32
+DEFAULT_BUDGET_MS = 50
+# Deadline is checked every this many nodes.
+_CLOCK_EVERY = 256
+
+ROLES = ("landlord", "landlord_down", "landlord_up")
+Hand = tuple[int, ...]  # sorted cards
+Deal = tuple[Hand, Hand, Hand]  # in ROLES order
+
+_rng = random.Random(0x5EED)
+# _ZOBRIST_HAND[seat][rank][count], _ZOBRIST_RIVAL[rank][count], plus actor/passes keys.
+_ZOBRIST_HAND = [[[_rng.getrandbits(64) for _ in range(5)] for _ in range(NUM_RANKS)] for _ in ROLES]
+_ZOBRIST_RIVAL = [[_rng.getrandbits(64) for _ in range(5)] for _ in range(NUM_RANKS)]
+_ZOBRIST_ACTOR = [_rng.getrandbits(64) for _ in ROLES]
+_ZOBRIST_PASSES = [_rng.getrandbits(64) for _ in range(3)]
+_MASK64 = (1 << 64) - 1
+
+
+class _Timeout(Exception):
+    pass
+
+
+@lru_cache(maxsize=65536)
+def _zobrist(seat: int, hand: Hand) -> int:
+    key = 0
+    counts = [0] * NUM_RANKS
+    for card in hand:
+        counts[CARD_TO_RANK_INDEX[card]] += 1
+    for rank, count in enumerate(counts):
+        if count:
+            key ^= _ZOBRIST_HAND[seat][rank][count]
+    return key
+
+
+@lru_cache(maxsize=4096)
+def _zobrist_rival(rival: Hand) -> int:
+    key = 0
+    for card in set(rival):
+        key ^= _ZOBRIST_RIVAL[CARD_TO_RANK_INDEX[card]][rival.count(card)]
+    return key
+
+
+@lru_cache(maxsize=65536)
+def _legal(hand: Hand, rival: Hand) -> tuple[Hand, ...]:
+    moves = get_legal_actions(list(hand), [list(rival)] if rival else [])
+    return tuple(tuple(move) for move in moves)
+
+
+def _remove(hand: Hand, move: Hand) -> Hand:
+    remaining = list(hand)
+    for card in move:
+        remaining.remove(card)
+    return tuple(remaining)
+
+
+@dataclass
+class EndgameResult:
+    action: list[int] | None  # a proven winning move, or None
+    complete: bool  # False when the budget ran out before the root was decided
+    deals: int
+    nodes: int
+    tt_lookups: int
+    tt_hits: int
+    elapsed_ms: float
+
+    @property
+    def hit_rate(self) -> float:
+        return self.tt_hits / self.tt_lookups if self.tt_lookups else 0.0
+
+
+class EndgameSolver:
+    """AND/OR proof search with a Zobrist-keyed transposition table."""
+
+    def __init__(self, user_role: str, deadline: float = float("inf")):
+        self.user = ROLES.index(user_role)
+        self.user_team = self.user == 0
+        self.deadline = deadline
+        self.table: dict[int, bool] = {}
+        self.nodes = 0
+        self.tt_lookups = 0
+        self.tt_hits = 0
+
+    def _key(self, deals: tuple[Deal, ...], actor: int, rival: Hand, passes: int) -> int:
+        # The user's hand is shared by every deal; opponents' hands are summed so
+        # the key does not depend on deal order.
+        key = _zobrist(self.user, deals[0][self.user]) ^ _ZOBRIST_ACTOR[actor] ^ _ZOBRIST_PASSES[passes]
+        key ^= _zobrist_rival(rival)
+        spread = 0
+        for deal in deals:
+            part = 0
+            for seat in range(3):
+                if seat != self.user:
+                    part ^= _zobrist(seat, deal[seat])
+            spread = (spread + part) & _MASK64
+        return key ^ spread
+
+    def _tick(self) -> None:
+        self.nodes += 1
+        if self.nodes % _CLOCK_EVERY == 0 and time.time() > self.deadline:
+            raise _Timeout
+
+    def wins(self, deals: tuple[Deal, ...], actor: int, rival: Hand, passes: int) -> bool:
+        """True if the user's team wins every deal in `deals` whatever the other seats play."""
+        self._tick()
+        key = self._key(deals, actor, rival, passes)
+        self.tt_lookups += 1
+        cached = self.table.get(key)
+        if cached is not None:
+            self.tt_hits += 1
+            return cached
+        if actor == self.user:
+            result = any(self._after_user_move(deals, move, rival, passes) for move in self.user_moves(deals, rival))
+        else:
+            result = self._all_replies_lose(deals, actor, rival, passes)
+        self.table[key] = result
+        return result
+
+    def user_moves(self, deals: tuple[Deal, ...], rival: Hand) -> list[Hand]:
+        return sorted(_legal(deals[0][self.user], rival), key=len, reverse=True)
+
+    def _next(self, actor: int, move: Hand, rival: Hand, passes: int) -> tuple[int, Hand, int]:
+        if move:
+            return (actor + 1) % 3, move, 0
+        if passes + 1 == 2:
+            return (actor + 1) % 3, (), 0
+        return (actor + 1) % 3, rival, passes + 1
+
+    def _after_user_move(self, deals: tuple[Deal, ...], move: Hand, rival: Hand, passes: int) -> bool:
+        if len(move) == len(deals[0][self.user]):
+            return True
+        child = tuple(
+            tuple(_remove(hand, move) if seat == self.user else hand for seat, hand in enumerate(deal)) for deal in deals
+        )
+        return self.wins(child, *self._next(self.user, move, rival, passes))
+
+    def _all_replies_lose(self, deals: tuple[Deal, ...], actor: int, rival: Hand, passes: int) -> bool:
+        replies: dict[Hand, list[Deal]] = {}
+        for deal in deals:
+            for move in _legal(deal[actor], rival):
+                replies.setdefault(move, []).append(deal)
+        # Emptying moves first, then larger moves: the likeliest refutations.
+        hand_size = len(deals[0][actor])
+        for move in sorted(replies, key=lambda m: (len(m) == hand_size, len(m)), reverse=True):
+            if len(move) == hand_size:
+                if (actor == 0) != self.user_team:
+                    return False
+                continue
+            child = tuple(
+                tuple(_remove(hand, move) if seat == actor else hand for seat, hand in enumerate(deal))
+                for deal in replies[move]
+            )
+            if not self.wins(child, *self._next(actor, move, rival, passes)):
+                return False
+        return True
+
+
+def endgame_deals(
+    state: "GameState", max_cards: int = MAX_ENDGAME_CARDS, max_deals: int = MAX_DEALS
+) -> tuple[Deal, ...] | None:
+    """Every deal consistent with `state`, or None when it is not a solvable endgame."""
+    if state.game_over or max(state.num_cards_left_dict.values()) > max_cards:
+        return None
+    try:
+        model = build_hand_model(state, use_passes=False)
+    except InferenceError:
+        return None
+    support = model.support(max_deals)
+    if support is None:
+        return None
+    first, second = model.roles
+    deals = []
+    for counts in support:
+        hands = {
+            state.user_role: tuple(state.my_hand_cards),
+            first: tuple(card for card, count in zip(RANK_CARDS, counts) for _ in range(count)),
+            second: tuple(
+                card for card, total, count in zip(RANK_CARDS, model.unseen.tolist(), counts) for _ in range(total - count)
+            ),
+        }
+        deals.append(tuple(hands[role] for role in ROLES))
+    return tuple(deals)
+
+
+def solve_endgame(
+    state: "GameState",
+    budget_ms: float = DEFAULT_BUDGET_MS,
+    values: Sequence[float] | None = None,
+    max_cards: int = MAX_ENDGAME_CARDS,
+    max_deals: int = MAX_DEALS,
+    deals: tuple[Deal, ...] | None = None,
+) -> EndgameResult | None:
+    """
+    Look for a move that wins against every consistent deal and any play by the other seats.
+
+    Returns None outside the endgame (a hand above `max_cards`, or more than
+    `max_deals` possible deals). `values` (model values per legal action, in
+    `legal_actions_for_user()` order) order the root moves. `deals`, from
+    `endgame_deals`, saves recomputing them.
+    """
+    if not state.need_user_action():
+        return None
+    if deals is None:
+        deals = endgame_deals(state, max_cards, max_deals)
+    if deals is None:
+        return None
+
+    started = time.time()
+    solver = EndgameSolver(state.user_role, deadline=started + budget_ms / 1000)
+    rival = tuple(state.get_last_move())
+    passes = 1 if rival and not state.card_play_action_seq[-1] else 0
+    if values is not None:
+        legal = [tuple(action) for action in state.legal_actions_for_user()]
+        ranked = sorted(zip(values, range(len(legal))), reverse=True)
+        moves = [legal[index] for _, index in ranked]
+    else:
+        moves = solver.user_moves(deals, rival)
+
+    action, complete = None, True
+    try:
+        for move in moves:
+            if solver._after_user_move(deals, move, rival, passes):
+                action = list(move)
+                break
+    except _Timeout:
+        complete = False
+    return EndgameResult(
+        action=action,
+        complete=complete,
+        deals=len(deals),
+        nodes=solver.nodes,
+        tt_lookups=solver.tt_lookups,
+        tt_hits=solver.tt_hits,
+        elapsed_ms=(time.time() - started) * 1000,
+    )
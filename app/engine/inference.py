@@ -0,0 +1,283 @@
+"""
+Opponent-hand inference over the unseen card pool.
+
+From the user's seat the unseen cards are split between the two opponents.
+The split is constrained by:
+- the opponents' cards-left counts,
+- the landlord's unplayed bottom cards (known to be in the landlord's hand),
+- passes over an opposing move: a player who passed a single, pair, triple
+  or bomb is taken not to have held anything that beats it.
+
+All of these are per-rank bounds, so the number of suit-distinguished deals
+factorises over ranks. A small DP over (rank, cards assigned so far) gives
+exact per-rank marginals and conditional tables for rejection-free sampling.
+"""
+
+from __future__ import annotations
+
+import weakref
+from dataclasses import dataclass
+from math import comb
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from .parser import CARD_TO_RANK_INDEX, CARD_TO_TEXT, DECK_COUNTER, MAX_COUNT_PER_RANK, RANK_CARDS
+from .rules import (
+    TYPE_1_SINGLE,
+    TYPE_2_PAIR,
+    TYPE_3_TRIPLE,
+    TYPE_4_BOMB,
+    TYPE_5_KING_BOMB,
+    get_move_type,
+    get_rival_move,
+)
+
+if TYPE_CHECKING:
+    from .state import GameState
+
+NUM_RANKS = len(RANK_CARDS)
+RANK_LABELS = [CARD_TO_TEXT[card] for card in RANK_CARDS]
+RANK_CAPS = tuple(DECK_COUNTER[card] for card in RANK_CARDS)
+_PLAIN_RANKS = range(13)  # 3..2; jokers cannot form pairs, triples or bombs
+# Largest count a player may hold at ranks above a passed move of this type.
+_PASS_CAPS = {TYPE_1_SINGLE: 0, TYPE_2_PAIR: 1, TYPE_3_TRIPLE: 2}
+
+
+class InferenceError(ValueError):
+    """Raised when no opponent split satisfies the hard constraints."""
+
+
+@dataclass(frozen=True)
+class HandConstraints:
+    """Per-rank bounds on how many unseen cards each opponent holds."""
+
+    roles: tuple[str, str]
+    unseen: tuple[int, ...]
+    sizes: tuple[int, int]
+    lower: tuple[tuple[int, ...], tuple[int, ...]]
+    upper: tuple[tuple[int, ...], tuple[int, ...]]
+
+
+def _counts(cards) -> list[int]:
+    counts = [0] * NUM_RANKS
+    for card in cards:
+        counts[CARD_TO_RANK_INDEX[card]] += 1
+    return counts
+
+
+def _pass_cap(rival_move: list[int]) -> list[int] | None:
+    """Upper bounds implied by passing on `rival_move`, or None when nothing follows."""
+    move_type = get_move_type(rival_move)
+    if move_type["type"] == TYPE_5_KING_BOMB:
+        return None
+    caps = list(RANK_CAPS)
+    if move_type["type"] == TYPE_4_BOMB:
+        above = CARD_TO_RANK_INDEX[move_type["rank"]] + 1
+        for rank in range(above, 13):
+            caps[rank] = 3
+        return caps
+    # Anything but a bomb or rocket could have been bombed.
+    for rank in _PLAIN_RANKS:
+        caps[rank] = 3
+    cap = _PASS_CAPS.get(move_type["type"])
+    if cap is not None:
+        for rank in range(CARD_TO_RANK_INDEX[move_type["rank"]] + 1, NUM_RANKS):
+            caps[rank] = min(caps[rank], cap)
+    return caps
+
+
+def _pass_bounds(state: "GameState", roles: tuple[str, ...]) -> dict[str, list[int]]:
+    """
+    Current-hand upper bounds per opponent from their passes over the other team.
+
+    A pass bounds the hand held at that moment; cards played afterwards are
+    subtracted. A pass contradicted by later play was strategic and is ignored.
+    """
+    bounds = {role: list(RANK_CAPS) for role in roles}
+    seq: list[list[int]] = []
+    actors: list[str] = []
+    for step, (actor, action) in enumerate(state.action_log):
+        rival_move = get_rival_move(seq)
+        if not action and rival_move and actor in bounds:
+            rival_actor = actors[-1] if seq[-1] else actors[-2]
+            caps = _pass_cap(rival_move) if (rival_actor == "landlord") != (actor == "landlord") else None
+            if caps is not None:
+                played_after = _counts(
+                    card for later in state.action_log[step + 1 :] if later.actor == actor for card in later.action
+                )
+                current = [cap - played for cap, played in zip(caps, played_after)]
+                if min(current) >= 0:
+                    bounds[actor] = [min(a, b) for a, b in zip(bounds[actor], current)]
+        seq.append(action)
+        actors.append(actor)
+    return bounds
+
+
+def hand_constraints(state: "GameState", use_passes: bool = True) -> HandConstraints:
+    roles = tuple(role for role in ("landlord", "landlord_down", "landlord_up") if role != state.user_role)
+    unseen = state.unseen_counts()
+    lower = {role: [0] * NUM_RANKS for role in roles}
+    if "landlord" in lower:
+        lower["landlord"] = _counts(state.three_landlord_cards)
+    upper = _pass_bounds(state, roles) if use_passes else {role: list(RANK_CAPS) for role in roles}
+    return HandConstraints(
+        roles=roles,
+        unseen=unseen,
+        sizes=tuple(state.num_cards_left_dict[role] for role in roles),
+        lower=tuple(tuple(lower[role]) for role in roles),
+        upper=tuple(tuple(min(a, b) for a, b in zip(upper[role], unseen)) for role in roles),
+    )
+
+
+class OpponentHandModel:
+    """
+    Exact distribution of the first opponent's rank counts; the second holds the rest.
+
+    Deals are weighted uniformly over suit-distinguished cards, i.e.
+    prod_r C(unseen_r, a_r) for a count vector a.
+    """
+
+    def __init__(self, constraints: HandConstraints, relaxed: bool = False):
+        self.constraints = constraints
+        self.roles = constraints.roles
+        self.relaxed = relaxed
+        self.unseen = np.array(constraints.unseen, dtype=np.int64)
+        target = constraints.sizes[0]
+        if sum(constraints.unseen) != sum(constraints.sizes):
+            raise InferenceError("Unseen cards do not match the opponents' cards-left counts.")
+
+        # weights[r, a]: ways to give `a` of rank r to the first opponent (0 when out of bounds).
+        weights = np.zeros((NUM_RANKS, MAX_COUNT_PER_RANK + 1))
+        (lower_a, lower_b), (upper_a, upper_b) = constraints.lower, constraints.upper
+        for rank, total in enumerate(constraints.unseen):
+            low = max(lower_a[rank], total - upper_b[rank])
+            high = min(upper_a[rank], total - lower_b[rank])
+            for count in range(low, high + 1):
+                weights[rank, count] = comb(total, count)
+
+        # suffix[r, s]: weighted ways for ranks r.. to sum to s; prefix[r, s]: ranks <r.
+        suffix = np.zeros((NUM_RANKS + 1, target + 1))
+        suffix[NUM_RANKS, 0] = 1.0
+        for rank in range(NUM_RANKS - 1, -1, -1):
+            for count in np.flatnonzero(weights[rank]):
+                suffix[rank, count:] += weights[rank, count] * suffix[rank + 1, : target + 1 - count]
+        prefix = np.zeros((NUM_RANKS + 1, target + 1))
+        prefix[0, 0] = 1.0
+        for rank in range(NUM_RANKS):
+            for count in np.flatnonzero(weights[rank]):
+                prefix[rank + 1, count:] += weights[rank, count] * prefix[rank, : target + 1 - count]
+
+        self._weights = weights
+        self._suffix = suffix
+        self.total = float(suffix[0, target])
+        if self.total <= 0:
+            raise InferenceError("No opponent hands are consistent with the constraints.")
+        self._marginals = self._compute_marginals(weights, prefix, suffix, target)
+
+        # cdf[r, s, a]: P(first opponent gets <= a of rank r | s cards still to assign).
+        joint = np.zeros((NUM_RANKS, target + 1, MAX_COUNT_PER_RANK + 1))
+        for rank in range(NUM_RANKS):
+            for count in np.flatnonzero(weights[rank]):
+                joint[rank, count:, count] = weights[rank, count] * suffix[rank + 1, : target + 1 - count]
+        cdf = np.cumsum(joint, axis=2)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cdf /= cdf[:, :, -1:]
+        self._cdf = np.nan_to_num(cdf, nan=1.0)
+
+    @staticmethod
+    def _compute_marginals(weights, prefix, suffix, target) -> np.ndarray:
+        marginals = np.zeros((NUM_RANKS, MAX_COUNT_PER_RANK + 1))
+        for rank in range(NUM_RANKS):
+            for count in np.flatnonzero(weights[rank]):
+                rest = target - count
+                ways = prefix[rank, : rest + 1] @ suffix[rank + 1, rest::-1]
+                marginals[rank, count] = weights[rank, count] * ways
+        return marginals / suffix[0, target]
+
+    def marginals(self) -> dict[str, np.ndarray]:
+        """Per role, (15, 5) probabilities of holding exactly k cards of each rank."""
+        first = self._marginals
+        second = np.zeros_like(first)
+        for rank, total in enumerate(self.constraints.unseen):
+            second[rank, : total + 1] = first[rank, total::-1]
+        return {self.roles[0]: first, self.roles[1]: second}
+
+    def support(self, limit: int) -> list[tuple[int, ...]] | None:
+        """Every possible rank-count vector of the first opponent, or None if there are more than `limit`."""
+        found: list[tuple[int, ...]] = []
+        prefix: list[int] = []
+
+        def walk(rank: int, remaining: int) -> bool:
+            if rank == NUM_RANKS:
+                found.append(tuple(prefix))
+                return len(found) <= limit
+            for count in np.flatnonzero(self._weights[rank]):
+                if count <= remaining and self._suffix[rank + 1, remaining - count] > 0:
+                    prefix.append(int(count))
+                    keep_going = walk(rank + 1, remaining - int(count))
+                    prefix.pop()
+                    if not keep_going:
+                        return False
+            return True
+
+        return found if walk(0, self.constraints.sizes[0]) else None
+
+    def sample_counts(self, n: int, rng: np.random.Generator | None = None) -> np.ndarray:
+        """(n, 15) int8 rank counts of the first opponent; the second holds `unseen - counts`."""
+        rng = rng or np.random.default_rng()
+        uniform = 1.0 - rng.random((n, NUM_RANKS))  # (0, 1] so zero-probability counts are never picked
+        remaining = np.full(n, self.constraints.sizes[0], dtype=np.int64)
+        counts = np.empty((n, NUM_RANKS), dtype=np.int8)
+        for rank in range(NUM_RANKS):
+            cdf = self._cdf[rank, remaining]
+            drawn = (cdf < uniform[:, rank, np.newaxis]).sum(axis=1)
+            counts[:, rank] = drawn
+            remaining -= drawn
+        return counts
+
+    def sample_hands(self, n: int, rng: np.random.Generator | None = None) -> list[dict[str, list[int]]]:
+        """`n` sampled deals as sorted card lists per opponent."""
+        first = self.sample_counts(n, rng)
+        second = self.unseen[np.newaxis, :] - first
+        return [
+            {
+                self.roles[0]: [card for card, count in zip(RANK_CARDS, row_a) for _ in range(count)],
+                self.roles[1]: [card for card, count in zip(RANK_CARDS, row_b) for _ in range(count)],
+            }
+            for row_a, row_b in zip(first.tolist(), second.tolist())
+        ]
+
+    def to_dict(self, digits: int = 4) -> dict[str, Any]:
+        opponents = {}
+        for role, size in zip(self.roles, self.constraints.sizes):
+            table = self.marginals()[role]
+            opponents[role] = {
+                "cards_left": size,
+                "expected": np.round(table @ np.arange(MAX_COUNT_PER_RANK + 1), digits).tolist(),
+                "distribution": np.round(table, digits).tolist(),
+            }
+        return {"ranks": RANK_LABELS, "relaxed": self.relaxed, "opponents": opponents}
+
+
+def build_hand_model(state: "GameState", use_passes: bool = True) -> OpponentHandModel:
+    """Model for `state`; pass inferences are dropped if they leave no consistent deal."""
+    if use_passes:
+        try:
+            return OpponentHandModel(hand_constraints(state, use_passes=True))
+        except InferenceError:
+            return OpponentHandModel(hand_constraints(state, use_passes=False), relaxed=True)
+    return OpponentHandModel(hand_constraints(state, use_passes=False))
+
+
+_MODEL_CACHE: "weakref.WeakKeyDictionary[GameState, tuple[int, OpponentHandModel]]" = weakref.WeakKeyDictionary()
+
+
+def opponent_hand_model(state: "GameState") -> OpponentHandModel:
+    """`build_hand_model(state)`, memoized per state version."""
+    cached = _MODEL_CACHE.get(state)
+    if cached is not None and cached[0] == state.version:
+        return cached[1]
+    model = build_hand_model(state)
+    _MODEL_CACHE[state] = (state.version, model)
+    return model
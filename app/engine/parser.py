@@ -3,7 +3,8 @@
 from __future__ import annotations
 
 from collections import Counter
-from typing import Any
+from functools import lru_cache
+from typing import Any, Sequence
 
 VALID_CARDS = {3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 17, 20, 30}
 MAX_COUNT_PER_RANK = 4
@@ -66,12 +67,41 @@ DECK_COUNTER = Counter(
 )
 
 
+# Rank order used by count vectors: index i counts copies of RANK_CARDS[i].
+RANK_CARDS = (3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 17, 20, 30)
+CARD_TO_RANK_INDEX = {card: index for index, card in enumerate(RANK_CARDS)}
+
+# Single-character tokens ("10" is rewritten to "T" first) mapped to chr(card), so one
+# str.translate call turns a payload into card values.
+_CARD_CODE_TABLE = str.maketrans({token: chr(card) for token, card in TEXT_TO_CARD.items() if len(token) == 1})
+# Deletes every valid token; anything left over is invalid input.
+_DELETE_VALID_TABLE = str.maketrans("", "", "".join(token for token in TEXT_TO_CARD if len(token) == 1))
+# _COUNT_TEXT[i][n] renders n copies of RANK_CARDS[i].
+_COUNT_TEXT = tuple(tuple(CARD_TO_TEXT[card] * n for n in range(MAX_COUNT_PER_RANK + 1)) for card in RANK_CARDS)
+RENDER_CACHE_SIZE = 8192
+
+
 class ParseError(ValueError):
     """Raised when action/hand payload cannot be parsed."""
 
 
+def _normalize_payload(text: str) -> str:
+    return text.strip().upper().replace(" ", "")
+
+
+def _text_to_cards(text: str) -> list[int]:
+    """Table-driven tokenizer: card values in input order. PASS/P -> []."""
+    payload = _normalize_payload(text)
+    if payload in {"PASS", "P"}:
+        return []
+    compact = payload.replace("10", "T")
+    if compact.translate(_DELETE_VALID_TABLE):
+        _tokenize_text_cards(text)  # raises ParseError pointing at the first bad token
+    return [ord(code) for code in compact.translate(_CARD_CODE_TABLE)]
+
+
 def _tokenize_text_cards(text: str) -> list[str]:
-    payload = text.strip().upper().replace(" ", "")
+    payload = _normalize_payload(text)
     if payload in {"PASS", "P"}:
         return []
 
@@ -98,11 +128,11 @@ def parse_action_text(text: str) -> list[int]:
     """Parse action from text input. PASS/P -> []."""
     if text is None:
         raise ParseError("Action text is required.")
-    tokens = _tokenize_text_cards(text)
-    if not tokens:
+    cards = _text_to_cards(text)
+    if not cards:
         return []
-    cards = [TEXT_TO_CARD[token] for token in tokens]
-    validate_cards_max_four(cards, "action")
+    if len(cards) > MAX_COUNT_PER_RANK:
+        validate_cards_max_four(cards, "action")
     cards.sort()
     return cards
 
@@ -185,10 +215,34 @@ def validate_cards_not_exceed_deck(cards: list[int], field_name: str) -> None:
             raise ParseError(f"{field_name} has too many '{symbol}' cards ({count}).")
 
 
-def action_to_text(action: list[int]) -> str:
+def cards_to_counts(cards: Sequence[int]) -> list[int]:
+    """Rank-count vector (length 15, RANK_CARDS order) for a list of cards."""
+    counts = [0] * len(RANK_CARDS)
+    for card in cards:
+        counts[CARD_TO_RANK_INDEX[card]] += 1
+    return counts
+
+
+def counts_to_text(counts: Sequence[int]) -> str:
+    """Render a rank-count vector; all zeros -> PASS."""
+    text = "".join(
+        _COUNT_TEXT[index][count] if count <= MAX_COUNT_PER_RANK else CARD_TO_TEXT[RANK_CARDS[index]] * count
+        for index, count in enumerate(counts)
+        if count
+    )
+    return text or "PASS"
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _cards_tuple_to_text(cards: tuple[int, ...]) -> str:
+    return counts_to_text(cards_to_counts(cards))
+
+
+def action_to_text(action: Sequence[int]) -> str:
     if not action:
         return "PASS"
-    return "".join(CARD_TO_TEXT[card] for card in sorted(action))
+    # Interned per card tuple: hands and moves repeat heavily across snapshots.
+    return _cards_tuple_to_text(tuple(action))
 
 
 def actions_to_text(actions: list[list[int]]) -> list[str]:
@@ -0,0 +1,81 @@
+"""
+Cheap first-stage ranking of legal actions.
+
+A leading turn can have hundreds of legal moves, and each one becomes a row
+through the LSTM and the 512-wide MLP. `prune_actions` scores every move from
+hand structure alone and keeps the best `top_n` (plus PASS when it is legal),
+so only those reach the network. The score is a linear hand-shape heuristic:
+- shed more cards, and going out wins outright;
+- leave fewer loose singles and pairs behind, low ranks counting more;
+- do not break a bomb or the rocket, spend 2s and jokers, or bomb without
+  going out.
+"""
+
+from __future__ import annotations
+
+from typing import Sequence
+
+import numpy as np
+
+from .parser import CARD_TO_RANK_INDEX, RANK_CARDS
+
+NUM_RANKS = len(RANK_CARDS)
+HIGH_RANKS = slice(12, NUM_RANKS)  # 2, black joker, red joker
+JOKERS = slice(13, NUM_RANKS)
+# Loose cards of low rank are harder to get rid of than high ones.
+_LOOSE_WEIGHT = 1.0 + (NUM_RANKS - 1 - np.arange(NUM_RANKS)) / (NUM_RANKS - 1)
+
+W_CARDS = 1.0
+W_SINGLES = 1.5
+W_PAIRS = 0.75
+W_BROKEN_BOMB = 4.0
+W_HIGH = 1.0
+W_BOMB = 4.0
+GOES_OUT = 1000.0
+
+
+def action_counts(actions: Sequence[Sequence[int]]) -> np.ndarray:
+    """(len(actions), 15) per-rank card counts."""
+    counts = np.zeros((len(actions), NUM_RANKS), dtype=np.int8)
+    for row, action in enumerate(actions):
+        for card in action:
+            counts[row, CARD_TO_RANK_INDEX[card]] += 1
+    return counts
+
+
+def heuristic_scores(hand: Sequence[int], actions: Sequence[Sequence[int]]) -> np.ndarray:
+    """Higher is better; one score per action."""
+    held = action_counts([hand])[0]
+    played = action_counts(actions)
+    left = held - played
+    size = played.sum(axis=1)
+
+    singles = ((left == 1) * _LOOSE_WEIGHT).sum(axis=1)
+    pairs = ((left == 2) * _LOOSE_WEIGHT).sum(axis=1)
+    broken = ((held == 4) & (played > 0) & (played < 4)).sum(axis=1)
+    if held[JOKERS].sum() == 2:
+        broken += played[:, JOKERS].sum(axis=1) == 1
+    high = played[:, HIGH_RANKS].sum(axis=1)
+    rocket = (played[:, JOKERS].sum(axis=1) == 2) & (size == 2)
+    bomb = ((played == 4).any(axis=1) & (size == 4)) | rocket
+    out = left.sum(axis=1) == 0
+
+    return (
+        W_CARDS * size
+        - W_SINGLES * singles
+        - W_PAIRS * pairs
+        - W_BROKEN_BOMB * broken
+        - W_HIGH * high
+        - W_BOMB * (bomb & ~out)
+        + GOES_OUT * out
+    )
+
+
+def prune_actions(hand: Sequence[int], actions: Sequence[Sequence[int]], top_n: int) -> list[int]:
+    """Indices (ascending) of the `top_n` best actions by heuristic, plus PASS if legal."""
+    if len(actions) <= top_n:
+        return list(range(len(actions)))
+    scores = heuristic_scores(hand, actions)
+    keep = set(np.argsort(-scores, kind="stable")[:top_n].tolist())
+    keep.update(index for index, action in enumerate(actions) if not action)
+    return sorted(keep)
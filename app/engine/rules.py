@@ -515,9 +515,9 @@ def get_legal_actions(hand_cards: list[int], action_sequence: list[list[int]]) -
     return moves
 
 
-def is_bomb(action: list[int]) -> bool:
-    action_type = get_move_type(action)["type"]
-    return action_type in {TYPE_4_BOMB, TYPE_5_KING_BOMB}
+def is_bomb(action: list[int] | tuple[int, ...]) -> bool:
+    """Four of a kind or the rocket; `action` is sorted (a list or a tuple)."""
+    return (len(action) == 4 and action[0] == action[3]) or (len(action) == 2 and action[0] == 20 and action[1] == 30)
 
 
 def is_action_compatible_with_rival(action: list[int], rival_move: list[int]) -> bool:
@@ -525,23 +525,21 @@ def is_action_compatible_with_rival(action: list[int], rival_move: list[int]) ->
     Check whether `action` can be legally played against `rival_move`,
     without using hidden hand information.
     """
-    action = sorted(action)
-    rival_move = sorted(rival_move)
+    return beats_rival(get_move_type(action), get_move_type(rival_move))
 
-    if not action:
-        return len(rival_move) != 0
 
-    action_info = get_move_type(action)
+def beats_rival(action_info: dict[str, int], rival_info: dict[str, int]) -> bool:
+    """`is_action_compatible_with_rival` on moves already classified by `get_move_type`."""
     action_type = action_info["type"]
+    rival_type = rival_info["type"]
+
+    if action_type == TYPE_0_PASS:
+        return rival_type != TYPE_0_PASS
     if action_type == TYPE_15_WRONG:
         return False
-
-    if not rival_move:
+    if rival_type == TYPE_0_PASS:
         return True
 
-    rival_info = get_move_type(rival_move)
-    rival_type = rival_info["type"]
-
     if action_type == TYPE_5_KING_BOMB:
         return rival_type != TYPE_5_KING_BOMB
 
@@ -562,4 +560,3 @@ def is_action_compatible_with_rival(action: list[int], rival_move: list[int]) ->
         return False
 
     return action_info.get("rank", -1) > rival_info.get("rank", -1)
-
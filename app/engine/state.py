@@ -5,13 +5,24 @@ from __future__ import annotations
 from collections import Counter
 from dataclasses import dataclass
 from types import SimpleNamespace
-from typing import Any
-
-from .parser import DECK_COUNTER, action_to_text
-from .rules import get_legal_actions, get_move_type, get_rival_move, is_action_compatible_with_rival, is_bomb
+from typing import Any, NamedTuple
+
+from .parser import CARD_TO_RANK_INDEX, DECK_COUNTER, RANK_CARDS, action_to_text, cards_to_counts
+from .rules import (
+    TYPE_0_PASS,
+    TYPE_15_WRONG,
+    beats_rival,
+    get_legal_actions,
+    get_move_type,
+    get_rival_move,
+    is_bomb,
+)
 
 ROLE_ORDER = ["landlord", "landlord_down", "landlord_up"]
 Role = str
+Move = tuple[int, ...]
+_DECK_COUNTS = cards_to_counts(list(DECK_COUNTER.elements()))
+_PASS_INFO = get_move_type([])
 
 
 class ValidationError(ValueError):
@@ -23,13 +34,6 @@ def next_role(role: Role) -> Role:
     return ROLE_ORDER[(idx + 1) % len(ROLE_ORDER)]
 
 
-def flatten_counter(counter: Counter[int]) -> list[int]:
-    cards: list[int] = []
-    for card in sorted(counter.keys()):
-        cards.extend([card] * counter[card])
-    return cards
-
-
 @dataclass(frozen=True)
 class GameConfig:
     user_role: Role
@@ -37,12 +41,66 @@ class GameConfig:
     initial_three_landlord_cards: list[int]
 
 
+def _remove_cards(cards: Move, action: Move) -> tuple[Move, bool]:
+    """`cards` without one copy of each card in `action`, and whether any were missing."""
+    remaining = list(cards)
+    missing = False
+    for card in action:
+        try:
+            remaining.remove(card)
+        except ValueError:
+            missing = True
+    return tuple(remaining), missing
+
+
+class LogEntry(NamedTuple):
+    actor: Role
+    action: Move
+
+
 class GameState:
-    """Mutable game state with replay-based undo."""
+    """
+    Mutable game state with replay-based undo.
+
+    Moves and hands are sorted tuples that are replaced, never mutated, so
+    the action log, `card_play_action_seq` and built infosets share them
+    instead of copying. `fork` shares the history lists too, copying them
+    only when either side next appends.
+    """
+
+    __slots__ = (
+        "config",
+        "action_log",
+        "version",
+        "_undo_marks",
+        "user_role",
+        "acting_role",
+        "my_hand_cards",
+        "three_landlord_cards",
+        "card_play_action_seq",
+        "played_cards",
+        "last_move_dict",
+        "num_cards_left_dict",
+        "last_pid",
+        "bomb_num",
+        "game_over",
+        "winner",
+        "_rival_info",
+        "_last_info",
+        "_unseen_counts",
+        "_shares_history",
+        "__weakref__",
+    )
 
     def __init__(self, config: GameConfig):
         self.config = config
-        self.action_log: list[dict[str, Any]] = []
+        self.action_log: list[LogEntry] = []
+        # Monotonic mutation counter; clients echo it back to request deltas.
+        self.version: int = 0
+        # (version, action_log length) after each undo, used to find the prefix a client still shares.
+        self._undo_marks: list[tuple[int, int]] = []
+        # Set by `fork`: action_log, card_play_action_seq and _undo_marks may be another state's lists.
+        self._shares_history = False
         self._validate_initial_config(config)
         self._reset_runtime_state()
 
@@ -78,15 +136,15 @@ class GameState:
     def _reset_runtime_state(self) -> None:
         self.user_role: Role = self.config.user_role
         self.acting_role: Role = "landlord"
-        self.my_hand_cards: list[int] = list(self.config.initial_my_hand)
+        my_hand = list(self.config.initial_my_hand)
         if self.user_role == "landlord":
             # Landlord starts with 17 hand cards and receives 3 bottom cards.
-            self.my_hand_cards.extend(self.config.initial_three_landlord_cards)
-            self.my_hand_cards.sort()
-        self.three_landlord_cards: list[int] = list(self.config.initial_three_landlord_cards)
-        self.card_play_action_seq: list[list[int]] = []
-        self.played_cards: dict[Role, list[int]] = {role: [] for role in ROLE_ORDER}
-        self.last_move_dict: dict[Role, list[int]] = {role: [] for role in ROLE_ORDER}
+            my_hand.extend(self.config.initial_three_landlord_cards)
+        self.my_hand_cards: Move = tuple(sorted(my_hand))
+        self.three_landlord_cards: Move = tuple(self.config.initial_three_landlord_cards)
+        self.card_play_action_seq: list[Move] = []
+        self.played_cards: dict[Role, Move] = {role: () for role in ROLE_ORDER}
+        self.last_move_dict: dict[Role, Move] = {role: () for role in ROLE_ORDER}
         self.num_cards_left_dict: dict[Role, int] = {
             "landlord": 20,
             "landlord_down": 17,
@@ -96,29 +154,73 @@ class GameState:
         self.bomb_num: int = 0
         self.game_over: bool = False
         self.winner: str | None = None
-
-    def _remaining_unseen_counter(self) -> Counter[int]:
-        counter = Counter(DECK_COUNTER)
-        counter.subtract(self.my_hand_cards)
-        for role in ROLE_ORDER:
-            counter.subtract(self.played_cards[role])
-        for card in list(counter.keys()):
-            if counter[card] <= 0:
-                del counter[card]
-        return counter
+        # `get_move_type` of the current rival move (see `get_rival_move`) and of the last move,
+        # kept as moves are applied so validation never re-classifies history. None after
+        # `apply_unchecked`, which does not classify; `_current_rival_info` fills it in on demand.
+        self._rival_info: dict[str, int] | None = _PASS_INFO
+        self._last_info: dict[str, int] | None = _PASS_INFO
+        # Cards neither in my hand nor played yet, per rank (RANK_CARDS order).
+        self._unseen_counts: list[int] = [
+            deck - mine for deck, mine in zip(_DECK_COUNTS, cards_to_counts(self.my_hand_cards))
+        ]
+
+    def fork(self) -> "GameState":
+        """
+        Independent copy of this position, in time independent of the history length.
+
+        Only the per-role dicts and the unseen rank counts are copied; moves and
+        hands are immutable tuples, and the history lists are shared until either
+        state next appends to them.
+        """
+        clone = object.__new__(type(self))
+        clone.config = self.config
+        clone.action_log = self.action_log
+        clone.version = self.version
+        clone._undo_marks = self._undo_marks
+        clone.user_role = self.user_role
+        clone.acting_role = self.acting_role
+        clone.my_hand_cards = self.my_hand_cards
+        clone.three_landlord_cards = self.three_landlord_cards
+        clone.card_play_action_seq = self.card_play_action_seq
+        clone.played_cards = dict(self.played_cards)
+        clone.last_move_dict = dict(self.last_move_dict)
+        clone.num_cards_left_dict = dict(self.num_cards_left_dict)
+        clone.last_pid = self.last_pid
+        clone.bomb_num = self.bomb_num
+        clone.game_over = self.game_over
+        clone.winner = self.winner
+        clone._rival_info = self._rival_info
+        clone._last_info = self._last_info
+        clone._unseen_counts = self._unseen_counts.copy()
+        self._shares_history = clone._shares_history = True
+        return clone
+
+    def _own_history(self) -> None:
+        if self._shares_history:
+            self.action_log = self.action_log.copy()
+            self.card_play_action_seq = self.card_play_action_seq.copy()
+            self._undo_marks = self._undo_marks.copy()
+            self._shares_history = False
+
+    def _current_rival_info(self) -> dict[str, int]:
+        if self._rival_info is None:
+            self._rival_info = get_move_type(self.get_last_move())
+        return self._rival_info
+
+    def unseen_counts(self) -> tuple[int, ...]:
+        """How many cards of each rank (`RANK_CARDS` order) the user has not seen: the opponents' hands."""
+        return tuple(self._unseen_counts)
 
     def _remaining_unseen_cards(self) -> list[int]:
-        return flatten_counter(self._remaining_unseen_counter())
+        return [card for card, count in zip(RANK_CARDS, self._unseen_counts) for _ in range(count)]
 
-    def get_last_move(self) -> list[int]:
-        return get_rival_move(self.card_play_action_seq)
+    def get_last_move(self) -> Move:
+        return get_rival_move(self.card_play_action_seq) or ()
 
-    def get_last_two_moves(self) -> list[list[int]]:
-        last_two_moves = [[], []]
-        for action in self.card_play_action_seq[-2:]:
-            last_two_moves.insert(0, action)
-            last_two_moves = last_two_moves[:2]
-        return [list(last_two_moves[0]), list(last_two_moves[1])]
+    def get_last_two_moves(self) -> list[Move]:
+        """[last move, the one before], padded with PASS."""
+        seq = self.card_play_action_seq
+        return [seq[-1] if seq else (), seq[-2] if len(seq) > 1 else ()]
 
     def need_user_action(self) -> bool:
         return not self.game_over and self.acting_role == self.user_role
@@ -132,55 +234,53 @@ class GameState:
         if not self.need_user_action():
             raise ValidationError("Cannot build infoset: not user's turn.")
 
-        legal_actions = self.legal_actions_for_user()
-        unseen_cards = self._remaining_unseen_cards()
-        all_handcards = {role: [] for role in ROLE_ORDER}
-        all_handcards[self.user_role] = list(self.my_hand_cards)
+        # Containers are shallow copies; the moves and hands in them are the state's own tuples.
+        all_handcards: dict[Role, Move] = {role: () for role in ROLE_ORDER}
+        all_handcards[self.user_role] = self.my_hand_cards
         infoset = SimpleNamespace(
             player_position=self.user_role,
-            player_hand_cards=list(self.my_hand_cards),
+            player_hand_cards=self.my_hand_cards,
             num_cards_left_dict=dict(self.num_cards_left_dict),
-            three_landlord_cards=list(self.three_landlord_cards),
-            card_play_action_seq=[list(action) for action in self.card_play_action_seq],
-            other_hand_cards=unseen_cards,
-            legal_actions=[list(action) for action in legal_actions],
-            last_move=list(self.get_last_move()),
-            last_two_moves=[list(action) for action in self.get_last_two_moves()],
-            last_move_dict={role: list(action) for role, action in self.last_move_dict.items()},
-            played_cards={role: list(cards) for role, cards in self.played_cards.items()},
+            three_landlord_cards=self.three_landlord_cards,
+            card_play_action_seq=list(self.card_play_action_seq),
+            other_hand_cards=self._remaining_unseen_cards(),
+            legal_actions=self.legal_actions_for_user(),
+            last_move=self.get_last_move(),
+            last_two_moves=self.get_last_two_moves(),
+            last_move_dict=dict(self.last_move_dict),
+            played_cards=dict(self.played_cards),
             all_handcards=all_handcards,
             last_pid=self.last_pid,
             bomb_num=self.bomb_num,
         )
         return infoset
 
-    def _validate_user_action(self, action: list[int]) -> None:
+    def _validate_user_action(self, action: Move) -> None:
         legal_actions = self.legal_actions_for_user()
-        if action not in legal_actions:
+        if list(action) not in legal_actions:
             raise ValidationError(f"Invalid action for your turn: {action_to_text(action)}")
 
-    def _validate_opponent_action(self, action: list[int]) -> None:
+    def _validate_opponent_action(self, action: Move, info: dict[str, int]) -> None:
+        """`info` is `get_move_type(action)`; checks the move against the cached rival and unseen counts."""
         actor = self.acting_role
-        rival_move = self.get_last_move()
 
         if not action:
-            if not rival_move:
+            if self._current_rival_info()["type"] == TYPE_0_PASS:
                 raise ValidationError("PASS is not allowed when leading a new round.")
             return
 
         if len(action) > self.num_cards_left_dict[actor]:
             raise ValidationError(f"{actor} does not have enough cards left for this action.")
 
-        if get_move_type(action)["type"] == 15:
+        if info["type"] == TYPE_15_WRONG:
             raise ValidationError("Opponent action is not a valid DouDizhu move.")
 
-        if not is_action_compatible_with_rival(action, rival_move):
+        if not beats_rival(info, self._current_rival_info()):
             raise ValidationError("Opponent action cannot beat current rival move.")
 
-        unseen_counter = self._remaining_unseen_counter()
-        action_counter = Counter(action)
-        for card, count in action_counter.items():
-            if count > unseen_counter[card]:
+        unseen = self._unseen_counts
+        for count, left in zip(cards_to_counts(action), unseen):
+            if count > left:
                 raise ValidationError("Opponent action exceeds visible remaining card pool.")
 
     def apply_action(self, action: list[int], validate: bool = True, record: bool = True) -> None:
@@ -189,38 +289,59 @@ class GameState:
         if self.acting_role not in ROLE_ORDER:
             raise ValidationError(f"Unknown acting role: {self.acting_role}")
 
-        action = sorted(action)
+        action = tuple(sorted(action))
         actor = self.acting_role
+        info = get_move_type(action)
 
         if validate:
             if actor == self.user_role:
                 self._validate_user_action(action)
             else:
-                self._validate_opponent_action(action)
-
+                self._validate_opponent_action(action, info)
+
+        self._apply(actor, action, record)
+        self._rival_info = info if action else self._last_info
+        self._last_info = info
+
+    def apply_unchecked(self, action: Move) -> None:
+        """
+        Apply a move from trusted code, such as search over forks of a state.
+
+        `action` must be a sorted tuple that is legal for the acting role in a
+        game that is not over. Nothing is validated and the move is not
+        classified, so this skips most of the cost of `apply_action`.
+        """
+        assert type(action) is tuple and list(action) == sorted(action), f"unsorted or non-tuple move {action!r}"
+        self._apply(self.acting_role, action, True)
+        self._rival_info = None if action else self._last_info
+        self._last_info = None
+
+    def _apply(self, actor: Role, action: Move, record: bool) -> None:
+        self._own_history()
         if record:
-            self.action_log.append({"actor": actor, "action": list(action)})
+            self.action_log.append(LogEntry(actor, action))
+        self.version += 1
 
-        self.last_move_dict[actor] = list(action)
-        self.card_play_action_seq.append(list(action))
+        self.last_move_dict[actor] = action
+        self.card_play_action_seq.append(action)
 
         if action:
             if actor == self.user_role:
-                for card in action:
-                    try:
-                        self.my_hand_cards.remove(card)
-                    except ValueError as exc:
-                        raise ValidationError("Your action uses cards not in your hand.") from exc
+                hand, missing = _remove_cards(self.my_hand_cards, action)
+                if missing:
+                    raise ValidationError("Your action uses cards not in your hand.")
+                self.my_hand_cards = hand
 
-            self.played_cards[actor].extend(action)
+            self.played_cards[actor] += action
+            if actor != self.user_role:
+                for card in action:
+                    self._unseen_counts[CARD_TO_RANK_INDEX[card]] -= 1
             self.num_cards_left_dict[actor] -= len(action)
             if self.num_cards_left_dict[actor] < 0:
                 raise ValidationError(f"{actor} card count dropped below zero.")
 
             if actor == "landlord" and self.three_landlord_cards:
-                for card in action:
-                    if card in self.three_landlord_cards:
-                        self.three_landlord_cards.remove(card)
+                self.three_landlord_cards = _remove_cards(self.three_landlord_cards, action)[0]
 
             self.last_pid = actor
 
@@ -241,31 +362,64 @@ class GameState:
     def undo(self) -> None:
         if not self.action_log:
             raise ValidationError("No action to undo.")
-        self.action_log.pop()
-        replay_actions = [list(entry["action"]) for entry in self.action_log]
+        version = self.version
+        self._own_history()
+        old_log = self.action_log[:-1]
         self._reset_runtime_state()
-        old_log = replay_actions
         self.action_log = []
-        for action in old_log:
-            self.apply_action(action, validate=False, record=True)
-
-    def snapshot(self) -> dict[str, Any]:
+        for entry in old_log:
+            self.apply_action(entry.action, validate=False, record=True)
+        self.version = version + 1
+        self._undo_marks.append((self.version, len(self.action_log)))
+
+    def _log_entries_text(self, start: int) -> list[dict[str, Any]]:
+        return [
+            {"step": i + 1, "actor": entry.actor, "text": action_to_text(entry.action)}
+            for i, entry in enumerate(self.action_log[start:], start=start)
+        ]
+
+    def _scalar_snapshot(self) -> dict[str, Any]:
+        """Fields whose size does not grow with game length."""
         return {
+            "version": self.version,
             "user_role": self.user_role,
             "acting_role": self.acting_role,
             "my_hand_text": action_to_text(self.my_hand_cards),
             "num_cards_left_dict": dict(self.num_cards_left_dict),
             "played_cards_text": {role: action_to_text(cards) for role, cards in self.played_cards.items()},
             "last_move_dict_text": {role: action_to_text(action) for role, action in self.last_move_dict.items()},
-            "card_play_action_seq_text": [action_to_text(action) for action in self.card_play_action_seq],
             "bomb_num": self.bomb_num,
             "last_pid": self.last_pid,
             "three_landlord_cards_text": action_to_text(self.three_landlord_cards),
             "game_over": self.game_over,
             "winner": self.winner,
             "need_user_action": self.need_user_action(),
-            "action_log": [
-                {"step": i + 1, "actor": entry["actor"], "text": action_to_text(entry["action"])}
-                for i, entry in enumerate(self.action_log)
-            ],
         }
+
+    def snapshot(self) -> dict[str, Any]:
+        payload = self._scalar_snapshot()
+        payload["card_play_action_seq_text"] = [action_to_text(action) for action in self.card_play_action_seq]
+        payload["action_log"] = self._log_entries_text(0)
+        return payload
+
+    def snapshot_delta(self, since_version: int, since_step: int) -> dict[str, Any] | None:
+        """
+        Changes since a client last saw (`since_version`, `since_step`).
+
+        The client truncates its history to `base_step`, appends `new_actions`
+        and overwrites the scalar fields. Returns None when the client state
+        cannot be reconciled and a full snapshot is required.
+        """
+        if since_version < 0 or since_version > self.version or since_step < 0:
+            return None
+        base_step = since_step
+        for version, length in reversed(self._undo_marks):
+            if version <= since_version:
+                break
+            base_step = min(base_step, length)
+        if base_step > len(self.action_log):
+            return None
+        payload = self._scalar_snapshot()
+        payload["base_step"] = base_step
+        payload["new_actions"] = self._log_entries_text(base_step)
+        return payload
@@ -0,0 +1,147 @@
+"""Fast JSON encoding, response compression and ETag helpers for the Flask app."""
+
+from __future__ import annotations
+
+import datetime
+import enum
+import gzip
+import hashlib
+import json
+import uuid
+from typing import Any, Callable
+
+from flask import Flask, Request, Response, request
+from flask.json.provider import DefaultJSONProvider
+
+try:  # optional fast path
+    import orjson
+except ImportError:  # pragma: no cover - depends on environment
+    orjson = None
+
+try:  # optional, only used when the client accepts `br`
+    import brotli
+except ImportError:  # pragma: no cover - depends on environment
+    brotli = None
+
+COMPRESS_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/html", "text/css", "text/javascript"}
+
+
+def _json_key(key: Any) -> Any:
+    """`key` as orjson's `OPT_NON_STR_KEYS` writes it, where the stdlib encoder would reject it."""
+    if isinstance(key, enum.Enum):
+        return _json_key(key.value)
+    if isinstance(key, (datetime.date, datetime.time)):
+        return key.isoformat()
+    if isinstance(key, uuid.UUID):
+        return str(key)
+    return key
+
+
+def _json_keys(obj: Any) -> Any:
+    if isinstance(obj, dict):
+        return {_json_key(key): _json_keys(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_json_keys(item) for item in obj]
+    return obj
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    try:
+        text = json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+    except TypeError:
+        # Key types only orjson stringifies; retry with them converted the same way.
+        text = json.dumps(_json_keys(obj), ensure_ascii=False, separators=(",", ":"))
+    return text.encode("utf-8")
+
+
+def _orjson_dumps(obj: Any) -> bytes:
+    # Non-string keys are stringified, as the stdlib encoder does (see `_json_key`).
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+
+JSON_ENCODERS: dict[str, Callable[[Any], bytes]] = {"json": _stdlib_dumps}
+if orjson is not None:
+    JSON_ENCODERS["orjson"] = _orjson_dumps
+
+
+def default_encoder_name() -> str:
+    return "orjson" if "orjson" in JSON_ENCODERS else "json"
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider that serializes responses straight to compact UTF-8 bytes."""
+
+    encoder_name = default_encoder_name()
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode("utf-8")
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        return JSON_ENCODERS[self.encoder_name](obj)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj), mimetype=self.mimetype)
+
+
+def set_json_encoder(app: Flask, name: str) -> None:
+    """Switch the app's response encoder (`json` or, when installed, `orjson`)."""
+    if name not in JSON_ENCODERS:
+        raise ValueError(f"Unknown JSON encoder: {name}. Available: {sorted(JSON_ENCODERS)}")
+    app.json.encoder_name = name
+
+
+def _accepted_encodings(request: Request) -> set[str]:
+    return {item.split(";")[0].strip().lower() for item in request.headers.get("Accept-Encoding", "").split(",")}
+
+
+def compress_response(response: Response, request: Request, min_bytes: int | None = None) -> Response:
+    """Compress eligible responses with br (when available) or gzip above `min_bytes`."""
+    if min_bytes is None:
+        min_bytes = COMPRESS_MIN_BYTES
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    body = response.get_data()
+    if len(body) < min_bytes:
+        return response
+
+    accepted = _accepted_encodings(request)
+    if brotli is not None and "br" in accepted:
+        encoded, encoding = brotli.compress(body, quality=BROTLI_QUALITY), "br"
+    elif "gzip" in accepted:
+        encoded, encoding = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0), "gzip"
+    else:
+        return response
+
+    response.set_data(encoded)
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def state_etag(*parts: Any) -> str:
+    """Weak validator for a state response, derived from the inputs that determine its body."""
+    digest = hashlib.blake2b("|".join(str(part) for part in parts).encode("utf-8"), digest_size=12)
+    return digest.hexdigest()
+
+
+def install(app: Flask, min_bytes: int | None = None) -> None:
+    """Use the fast JSON provider and compress responses for `app`."""
+    app.json_provider_class = FastJSONProvider
+    app.json = FastJSONProvider(app)
+
+    @app.after_request
+    def _compress(response: Response) -> Response:
+        return compress_response(response, request, min_bytes=min_bytes)
@@ -0,0 +1,404 @@
+"""
+Out-of-process model inference over shared-memory slots.
+
+Each inference worker is a separate process that owns a `ModelRegistry`,
+its torch threads and its batching, so torch's intra-op threads do not
+compete with the Flask request threads for the GIL. Observation rows are
+not pickled: every worker has a shared-memory block split into fixed-size
+slots (a ring of request buffers). A request copies its `z`/`x` rows into a
+free slot and sends only `(slot, position, shape)` over a pipe. The worker
+drains every queued request, runs requests for the same position as one
+forward pass, and writes the values back into each slot. A reload loads the
+new models on a side thread while the worker keeps scoring with the old ones,
+and workers reload one at a time.
+
+`RemoteModelRegistry` is a drop-in `ModelRegistry` whose `score` goes to a
+pool of such workers; observation building, legal actions and the opening
+cache stay in the calling process.
+"""
+
+from __future__ import annotations
+
+import itertools
+import multiprocessing
+import queue
+import threading
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from .model_bridge import ModelBridgeError, ModelRegistry, ModelSet, ThreadSettings
+from .onnx_backend import registry_class
+from .opening_cache import OpeningCache
+
+SLOTS_PER_WORKER = 4
+# Rows per slot; larger requests are scored in several slot-sized chunks.
+SLOT_ROWS = 1024
+# Widest observation rows: z is (5, 162) for every position, x is 373 (landlord) or 484 (farmers).
+Z_SHAPE = (5, 162)
+X_COLUMNS = 484
+STARTUP_TIMEOUT_SECONDS = 120.0
+# A worker that has not answered a scoring request by then is treated as dead.
+SCORE_TIMEOUT_SECONDS = 30.0
+# Longest wait for one worker to load new models on reload.
+RELOAD_TIMEOUT_SECONDS = STARTUP_TIMEOUT_SECONDS
+
+
+@dataclass(frozen=True)
+class SlotLayout:
+    """Byte layout of one slot: z rows, x rows, then one float32 value per row."""
+
+    rows: int = SLOT_ROWS
+
+    @property
+    def z_bytes(self) -> int:
+        return self.rows * Z_SHAPE[0] * Z_SHAPE[1] * 4
+
+    @property
+    def x_bytes(self) -> int:
+        return self.rows * X_COLUMNS * 4
+
+    @property
+    def nbytes(self) -> int:
+        return self.z_bytes + self.x_bytes + self.rows * 4
+
+    def views(self, buffer, slot: int, rows: int, z_tail: tuple[int, ...], x_columns: int):
+        """(z, x, values) numpy views of the first `rows` rows of `slot`."""
+        base = slot * self.nbytes
+        z = np.ndarray((rows, *z_tail), dtype=np.float32, buffer=buffer, offset=base)
+        x = np.ndarray((rows, x_columns), dtype=np.float32, buffer=buffer, offset=base + self.z_bytes)
+        values = np.ndarray((rows,), dtype=np.float32, buffer=buffer, offset=base + self.z_bytes + self.x_bytes)
+        return z, x, values
+
+
+def _serve(ckpt_root: str, shm_name: str, layout: SlotLayout, conn, threads: ThreadSettings, backend: str) -> None:
+    """Worker process main loop."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    registry = registry_class(backend)(ckpt_root, threads=threads)
+    try:
+        registry.preload()
+    except Exception as exc:
+        conn.send(("ready", None, str(exc)))
+        shm.close()
+        return
+    conn.send(("ready", registry.model_tag(), None))
+    send_lock = threading.Lock()
+
+    def send(message: tuple) -> None:
+        with send_lock:
+            conn.send(message)
+
+    def reload() -> None:
+        # ModelRegistry.reload builds the new set beside the current one and swaps it in.
+        try:
+            registry.reload()
+        except ModelBridgeError as exc:
+            send(("reloaded", None, str(exc)))
+        else:
+            send(("reloaded", registry.model_tag(), None))
+
+    try:
+        while True:
+            messages = [conn.recv()]
+            while conn.poll():
+                messages.append(conn.recv())
+            requests: dict[str, list[tuple]] = {}
+            for message in messages:
+                if message[0] == "stop":
+                    return
+                if message[0] == "reload":
+                    threading.Thread(target=reload, name="douzero-inference-reload", daemon=True).start()
+                    continue
+                requests.setdefault(message[2], []).append(message)
+            for position, batch in requests.items():
+                _score_batch(registry, shm.buf, layout, position, batch, send)
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        shm.close()
+
+
+def _score_batch(registry: ModelRegistry, buffer, layout: SlotLayout, position: str, batch: list[tuple], send) -> None:
+    # One forward pass for every queued request of this position.
+    views = [layout.views(buffer, slot, rows, z_tail, x_columns) for _, slot, _, rows, z_tail, x_columns in batch]
+    try:
+        if len(views) == 1:
+            z_rows, x_rows = views[0][0], views[0][1]
+        else:
+            z_rows = np.concatenate([z for z, _, _ in views])
+            x_rows = np.concatenate([x for _, x, _ in views])
+        values = registry.score(position, z_rows, x_rows)
+    except Exception as exc:
+        for message in batch:
+            send(("failed", message[1], str(exc)))
+        return
+    offset = 0
+    for message, (_, _, out) in zip(batch, views):
+        out[:] = values[offset : offset + len(out)]
+        offset += len(out)
+        send(("done", message[1]))
+
+
+class _Worker:
+    """Parent-side handle of one worker process: its pipe, shared block and pending replies."""
+
+    def __init__(
+        self, index: int, ckpt_root: Path, layout: SlotLayout, slots: int, threads: ThreadSettings, backend: str
+    ):
+        context = multiprocessing.get_context("spawn")
+        self.index = index
+        self.shm = shared_memory.SharedMemory(create=True, size=layout.nbytes * slots)
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_serve,
+            args=(str(ckpt_root), self.shm.name, layout, child_conn, threads, backend),
+            name=f"douzero-inference-{index}",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.send_lock = threading.Lock()
+        self.replies: dict[int, tuple[threading.Event, list]] = {}
+        self.control: queue.Queue = queue.Queue()
+        self.error: str | None = None
+
+        if not self.conn.poll(STARTUP_TIMEOUT_SECONDS):
+            self.close()
+            raise ModelBridgeError(f"Inference worker {index} did not start.")
+        _, self.tag, error = self.conn.recv()
+        if error is not None:
+            self.close()
+            raise ModelBridgeError(f"Inference worker {index} failed to load models: {error}")
+        threading.Thread(target=self._read, name=f"douzero-inference-reader-{index}", daemon=True).start()
+
+    def _read(self) -> None:
+        try:
+            while True:
+                message = self.conn.recv()
+                if message[0] in ("done", "failed"):
+                    waiting = self.replies.pop(message[1], None)
+                    if waiting is None:  # the caller already gave up on this slot
+                        continue
+                    event, reply = waiting
+                    reply.append(message[2] if message[0] == "failed" else None)
+                    event.set()
+                else:
+                    self.control.put(message)
+        except (EOFError, OSError):
+            self.error = f"Inference worker {self.index} exited."
+            for event, reply in list(self.replies.values()):
+                reply.append(self.error)
+                event.set()
+            self.control.put(("reloaded", None, self.error))
+
+    def send(self, message: tuple) -> None:
+        if self.error is not None:
+            raise ModelBridgeError(self.error)
+        try:
+            with self.send_lock:
+                self.conn.send(message)
+        except OSError as exc:  # the process died before the reader noticed
+            raise ModelBridgeError(f"Inference worker {self.index} is unreachable: {exc}") from exc
+
+    def close(self) -> None:
+        if self.process.is_alive():
+            try:
+                self.send(("stop",))
+            except (ModelBridgeError, OSError):
+                pass
+            self.process.join(timeout=5)
+            if self.process.is_alive():
+                self.process.terminate()
+        self.conn.close()
+        self.shm.close()
+        self.shm.unlink()
+
+
+class InferencePool:
+    """
+    Worker processes that score observation rows passed through shared memory.
+
+    Free slots of all workers form one queue, interleaved so consecutive
+    requests go to different workers; a caller blocks while every slot is
+    busy. Requests queued at the same worker are batched by that worker.
+    With `threads.cpus` set, each worker is pinned to its own share of them.
+    """
+
+    def __init__(
+        self,
+        ckpt_root: str | Path,
+        workers: int = 1,
+        slots_per_worker: int = SLOTS_PER_WORKER,
+        slot_rows: int = SLOT_ROWS,
+        threads: ThreadSettings | None = None,
+        backend: str = "torch",
+    ):
+        if workers < 1:
+            raise ValueError("workers must be at least 1.")
+        threads = threads or ThreadSettings()
+        self.layout = SlotLayout(slot_rows)
+        self.workers: list[_Worker] = []
+        try:
+            for index in range(workers):
+                settings = threads.for_worker(index, workers)
+                self.workers.append(
+                    _Worker(index, Path(ckpt_root), self.layout, slots_per_worker, settings, backend)
+                )
+        except ModelBridgeError:
+            self.close()
+            raise
+        self._free: queue.Queue = queue.Queue()
+        for slot, worker in itertools.product(range(slots_per_worker), self.workers):
+            self._free.put((worker, slot))
+
+    @property
+    def tag(self) -> str | None:
+        return self.workers[0].tag if self.workers else None
+
+    def score(self, position: str, z_rows, x_rows) -> np.ndarray:
+        """Model values (1-D float32 array) for `z_batch`/`x_batch` rows, as `ModelRegistry.score`."""
+        z_rows = np.asarray(z_rows, dtype=np.float32)
+        x_rows = np.asarray(x_rows, dtype=np.float32)
+        if z_rows.shape[1:] != Z_SHAPE or x_rows.ndim != 2 or x_rows.shape[1] > X_COLUMNS:
+            raise ModelBridgeError(f"Unexpected observation shapes {z_rows.shape} / {x_rows.shape}.")
+        step = self.layout.rows
+        if len(z_rows) <= step:
+            return self._score_slot(position, z_rows, x_rows)
+        return np.concatenate(
+            [self._score_slot(position, z_rows[i : i + step], x_rows[i : i + step]) for i in range(0, len(z_rows), step)]
+        )
+
+    def _score_slot(self, position: str, z_rows: np.ndarray, x_rows: np.ndarray) -> np.ndarray:
+        worker, slot = self._free.get()
+        try:
+            rows = len(z_rows)
+            z, x, out = self.layout.views(worker.shm.buf, slot, rows, z_rows.shape[1:], x_rows.shape[1])
+            z[:] = z_rows
+            x[:] = x_rows
+            event, reply = threading.Event(), []
+            worker.replies[slot] = (event, reply)
+            try:
+                worker.send(("score", slot, position, rows, z_rows.shape[1:], x_rows.shape[1]))
+                if not event.wait(SCORE_TIMEOUT_SECONDS):
+                    # Retire the worker: it may still write into this slot later.
+                    worker.error = f"Inference worker {worker.index} did not answer in time."
+                    raise ModelBridgeError(worker.error)
+            except BaseException:
+                worker.replies.pop(slot, None)
+                raise
+            if reply[0] is not None:
+                raise ModelBridgeError(f"Inference failed: {reply[0]}")
+            return out.copy()
+        finally:
+            self._free.put((worker, slot))
+
+    def reload(self) -> str | None:
+        """
+        Reload the models in every worker; returns the new checkpoint fingerprint.
+
+        Workers reload one after another, so at most one is loading at a time,
+        and each keeps scoring with its old models until the new ones are in.
+        """
+        errors = []
+        tag = None
+        for worker in self.workers:
+            # Answers to an earlier reload that timed out, or the reader's exit notice, are stale.
+            while not worker.control.empty():
+                worker.control.get_nowait()
+            try:
+                worker.send(("reload",))
+                _, worker_tag, error = worker.control.get(timeout=RELOAD_TIMEOUT_SECONDS)
+            except ModelBridgeError as exc:
+                worker_tag, error = None, str(exc)
+            except queue.Empty:
+                worker_tag, error = None, f"Inference worker {worker.index} did not reload in time."
+            if error is not None:
+                errors.append(error)
+            else:
+                worker.tag = tag = worker_tag
+        if errors:
+            raise ModelBridgeError("; ".join(errors))
+        return tag
+
+    def close(self) -> None:
+        for worker in self.workers:
+            worker.close()
+        self.workers = []
+
+
+class RemoteModelRegistry(ModelRegistry):
+    """
+    `ModelRegistry` whose forward passes run in an `InferencePool`.
+
+    Torch is never imported in this process. The pool starts on first use
+    (or `preload()`); `reload()` reloads every worker and bumps the version.
+    """
+
+    def __init__(
+        self,
+        ckpt_root: str | Path,
+        workers: int = 1,
+        opening_cache: OpeningCache | None = None,
+        threads: ThreadSettings | None = None,
+        prune_top: int | None = None,
+        **pool_options: Any,
+    ):
+        super().__init__(ckpt_root, opening_cache=opening_cache, threads=threads, prune_top=prune_top)
+        self.workers = workers
+        self.pool_options = pool_options
+        self._pool: InferencePool | None = None
+        self._pool_lock = threading.Lock()
+
+    def _ensure_imports(self) -> None:
+        if self._np is not None:
+            return
+        try:
+            from douzero.env.env import get_obs
+        except Exception as exc:  # pragma: no cover - runtime dependency
+            raise ModelBridgeError(f"DouZero runtime is not ready. Root cause: {exc}") from exc
+        self._np = np
+        self._get_obs = get_obs
+
+    def pool(self) -> InferencePool:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = InferencePool(
+                    self.ckpt_root, self.workers, threads=self.threads, **self.pool_options
+                )
+                self.current.tag = self._pool.tag
+            return self._pool
+
+    def get(self, position: str, model_set: ModelSet | None = None):
+        raise ModelBridgeError("Models are loaded in the inference workers, not in this process.")
+
+    def preload(self) -> None:
+        self.pool()
+
+    def score(self, position: str, z_rows, x_rows, model_set: ModelSet | None = None):
+        self._ensure_imports()
+        return self.pool().score(position, z_rows, x_rows)
+
+    def score_decisions(self, position: str, observations: list[dict[str, Any]], model_set: ModelSet | None = None):
+        # Slots carry full rows; the workers run the row-wise forward pass.
+        return self._score_rows(position, observations, model_set)
+
+    def reload(self) -> int:
+        with self._reload_lock:
+            try:
+                tag = self.pool().reload()
+            except ModelBridgeError as exc:
+                self.last_reload_error = str(exc)
+                raise ModelBridgeError(f"Reload failed, keeping version {self.version}: {exc}") from exc
+            self.current = ModelSet(version=self.version + 1, tag=tag)
+            self.last_reload_error = None
+            return self.version
+
+    def close(self) -> None:
+        super().close()
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
@@ -0,0 +1,178 @@
+"""Queue-based logging pipeline: request threads enqueue, a background thread writes."""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+# Record attributes copied into JSON lines when passed through `extra=`.
+CONTEXT_FIELDS = (
+    "event",
+    "game_id",
+    "step",
+    "actor",
+    "action",
+    "source_mode",
+    "latency_ms",
+    "recommend_ms",
+    "sample_every",
+)
+
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+DEFAULT_ROTATE_SECONDS = 24 * 60 * 60
+STREAM_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Render one JSON object per record, including known context fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: dict[str, Any] = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                payload[field] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class SizeAndTimeRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Rotate when the file exceeds `maxBytes` or every `interval` seconds, whichever comes first."""
+
+    def __init__(self, filename: str | Path, interval: float = DEFAULT_ROTATE_SECONDS, **kwargs: Any):
+        super().__init__(filename, **kwargs)
+        self.interval = interval
+        self.rollover_at = time.time() + interval
+
+    def shouldRollover(self, record: logging.LogRecord) -> int:
+        if self.interval > 0 and record.created >= self.rollover_at:
+            return 1
+        return super().shouldRollover(record)
+
+    def doRollover(self) -> None:
+        super().doRollover()
+        self.rollover_at = time.time() + self.interval
+
+
+class SamplingFilter(logging.Filter):
+    """Keep one in N records for high-volume events, tagged via `extra={"event": ...}`."""
+
+    def __init__(self, sample_every: dict[str, int] | None = None):
+        super().__init__()
+        self.sample_every = dict(sample_every or {})
+        self._counts: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        event = getattr(record, "event", None)
+        every = self.sample_every.get(event, 1) if event else 1
+        if every <= 1:
+            return True
+        with self._lock:
+            seen = self._counts.get(event, 0)
+            self._counts[event] = seen + 1
+        if seen % every:
+            return False
+        record.sample_every = every
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records without formatting them; drop instead of blocking when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting (including tracebacks) happens on the listener thread.
+        # Only bind the message so later mutation of `args` cannot change it.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_queue_logging(
+    log_dir: Path,
+    level: int = logging.INFO,
+    filename: str = "app.jsonl",
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    backup_count: int = DEFAULT_BACKUP_COUNT,
+    rotate_seconds: float = DEFAULT_ROTATE_SECONDS,
+    sample_every: dict[str, int] | None = None,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    stream: bool = True,
+) -> logging.handlers.QueueListener:
+    """Route root logging through a bounded queue drained by a background listener."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+    file_handler = SizeAndTimeRotatingFileHandler(
+        log_dir / filename,
+        interval=rotate_seconds,
+        maxBytes=max_bytes,
+        backupCount=backup_count,
+        encoding="utf-8",
+        delay=True,
+    )
+    file_handler.setFormatter(JsonLinesFormatter())
+    handlers: list[logging.Handler] = [file_handler]
+    if stream:
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(logging.Formatter(STREAM_FORMAT))
+        handlers.append(stream_handler)
+
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample_every))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, NonBlockingQueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _listener = listener
+    return listener
+
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(_stop_listener)
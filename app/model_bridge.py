@@ -2,49 +2,286 @@
 
 from __future__ import annotations
 
+import copy
+import hashlib
+import logging
+import os
+import threading
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterator
+
+from .checkpoints import checkpoint_files, load_model
+from .engine.prune import prune_actions
+from .opening_cache import OpeningCache, opening_key
+
+
+# Upper bound on rows per forward pass when batching several decisions.
+MAX_BATCH_ROWS = 4096
+# The split forward pass only pays off once decisions average this many legal actions.
+SPLIT_MIN_ROWS_PER_DECISION = 8
+# Idle staging buffers kept per key; more concurrent scoring calls than this allocate (and drop) their own.
+STAGING_BUFFERS_PER_KEY = 4
+WATCH_INTERVAL_SECONDS = 2.0
+
+logger = logging.getLogger("douzero-web")
 
 
 class ModelBridgeError(RuntimeError):
     """Raised when model loading/inference fails."""
 
 
+def parse_cpu_list(text: str) -> tuple[int, ...]:
+    """CPU ids from a list such as "0-3,8,10-11"."""
+    cpus: list[int] = []
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        try:
+            cpus.extend(range(int(first), int(last or first) + 1))
+        except ValueError:
+            raise ValueError(f"Invalid CPU list: {text!r}") from None
+    return tuple(dict.fromkeys(cpus))
+
+
+@dataclass(frozen=True)
+class ThreadSettings:
+    """
+    Torch threading for one inference process.
+
+    None leaves torch's default (one intra-op thread per core), which
+    oversubscribes the host when several processes or request threads run
+    inference at once. `cpus` pins the process to those cores.
+    """
+
+    intra_op: int | None = None
+    inter_op: int | None = None
+    cpus: tuple[int, ...] | None = None
+
+    @classmethod
+    def from_env(cls, prefix: str = "DOUZERO_INFERENCE_") -> "ThreadSettings":
+        """From `<prefix>THREADS`, `<prefix>INTEROP_THREADS` and `<prefix>CPUS` (unset or 0 = default)."""
+        intra_op = int(os.environ.get(f"{prefix}THREADS", "0")) or None
+        inter_op = int(os.environ.get(f"{prefix}INTEROP_THREADS", "0")) or None
+        cpus = os.environ.get(f"{prefix}CPUS", "")
+        return cls(intra_op, inter_op, parse_cpu_list(cpus) or None)
+
+    def for_worker(self, index: int, workers: int) -> "ThreadSettings":
+        """Settings for worker `index` of `workers`: each gets its own slice of `cpus`."""
+        if not self.cpus or workers <= 1:
+            return self
+        share = max(1, len(self.cpus) // workers)
+        start = (index * share) % len(self.cpus)
+        return ThreadSettings(self.intra_op, self.inter_op, self.cpus[start : start + share])
+
+    def pin(self) -> None:
+        """Pin this process to `cpus`, if set."""
+        if self.cpus:
+            try:
+                os.sched_setaffinity(0, self.cpus)
+            except (AttributeError, OSError) as exc:
+                logger.warning("CPU pinning to %s unavailable: %s", self.cpus, exc)
+
+    def apply(self, torch) -> None:
+        """Apply to this process; a setting the platform refuses is logged and skipped."""
+        self.pin()
+        if self.intra_op:
+            torch.set_num_threads(self.intra_op)
+        if self.inter_op:
+            try:
+                torch.set_num_interop_threads(self.inter_op)
+            except RuntimeError as exc:  # only allowed before any inter-op work in this process
+                logger.warning("Inter-op threads not set: %s", exc)
+
+    def describe(self) -> str:
+        cpus = ",".join(map(str, self.cpus)) if self.cpus else "any"
+        return f"intra={self.intra_op or 'default'} inter={self.inter_op or 'default'} cpus={cpus}"
+
+
+class StagingBuffers:
+    """
+    Pool of reusable float32 model inputs per key (position and input), shared by all threads.
+
+    Batched observations are copied (and cast) into these instead of into
+    freshly concatenated arrays, and the model reads them through
+    `torch.from_numpy` views, so steady-state inference allocates no input
+    arrays. A buffer is checked out for the duration of one forward pass, so
+    concurrent requests never share one; at most `per_key` idle buffers are
+    kept per key, which bounds pinned host memory however many request
+    threads the server starts.
+    """
+
+    def __init__(self, allocate: Callable[[tuple[int, ...]], Any], per_key: int = STAGING_BUFFERS_PER_KEY):
+        self._allocate = allocate
+        self.per_key = per_key
+        self._lock = threading.Lock()
+        self._idle: dict[str, list[Any]] = {}
+
+    @contextmanager
+    def checkout(self, key: str, shape: tuple[int, ...]) -> Iterator[Any]:
+        """A view of exactly `shape`, owned by the caller until the block exits; its contents are undefined."""
+        tail = tuple(shape[1:])
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            fits = [i for i, array in enumerate(idle) if len(array) >= shape[0] and array.shape[1:] == tail]
+            array = idle.pop(min(fits, key=lambda i: len(idle[i]))) if fits else None
+        if array is None:
+            rows = 1 << (shape[0] - 1).bit_length() if shape[0] > 1 else 1  # next power of two
+            array = self._allocate((rows, *tail))
+        try:
+            yield array[: shape[0]]
+        finally:
+            with self._lock:
+                idle = self._idle[key]
+                if len(idle) < self.per_key:
+                    idle.append(array)
+                else:
+                    # Keep the largest buffers; the smallest one is dropped.
+                    smallest = min(range(len(idle)), key=lambda i: len(idle[i]))
+                    if len(idle[smallest]) < len(array):
+                        idle[smallest] = array
+
+    def idle(self, key: str) -> int:
+        with self._lock:
+            return len(self._idle.get(key, ()))
+
+
+@dataclass
+class ModelSet:
+    """One generation of loaded models; replaced as a whole on reload."""
+
+    version: int
+    tag: str | None
+    models: dict[str, Any] = field(default_factory=dict)
+
+
 class ModelRegistry:
-    """Lazy cache for landlord/landlord_up/landlord_down models."""
+    """
+    Lazy cache for landlord/landlord_up/landlord_down models.
 
-    def __init__(self, ckpt_root: str | Path):
+    `reload()` (or `watch()`) loads a new generation off to the side and
+    swaps it in with one reference assignment; inference already running
+    keeps the generation it started with.
+    """
+
+    def __init__(
+        self,
+        ckpt_root: str | Path,
+        opening_cache: OpeningCache | None = None,
+        threads: ThreadSettings | None = None,
+        prune_top: int | None = None,
+        split_forward: bool = True,
+    ):
         self.ckpt_root = Path(ckpt_root)
+        self.opening_cache = opening_cache
+        self.threads = threads or ThreadSettings()
+        self.prune_top = prune_top
+        self.split_forward = split_forward
+        # None allocates fresh input arrays per call.
+        self.staging: StagingBuffers | None = StagingBuffers(self._allocate_staging)
         self.ckpt_map = {
             "landlord": self.ckpt_root / "landlord.ckpt",
             "landlord_up": self.ckpt_root / "landlord_up.ckpt",
             "landlord_down": self.ckpt_root / "landlord_down.ckpt",
         }
-        self.models: dict[str, Any] = {}
+        self.current = ModelSet(version=1, tag=None)
+        self.last_reload_error: str | None = None
+        self._reload_lock = threading.Lock()
+        self._watch_stop: threading.Event | None = None
         self.device = None
         self.torch = None
         self._model_dict = None
+        self._model_defs = None
         self._get_obs = None
+        self._np = None
+        self._move_table = None
 
     def _ensure_imports(self) -> None:
         if self.torch is not None:
             return
 
         try:
+            import numpy as np
             import torch
             from douzero.env.env import get_obs
-            from .model_defs import model_dict
+            from . import model_defs
         except Exception as exc:  # pragma: no cover - runtime dependency
             raise ModelBridgeError(
                 "DouZero runtime is not ready. Please run start.bat again or install requirements "
                 f"(`pip install -r requirements.txt`). Root cause: {exc}"
             ) from exc
 
+        self.threads.apply(torch)
         self.torch = torch
+        self._np = np
         self.device = "cuda:0" if torch.cuda.is_available() else "cpu"
-        self._model_dict = model_dict
+        self._model_defs = model_defs
+        self._model_dict = model_defs.model_dict
         self._get_obs = get_obs
 
+    def _allocate_staging(self, shape: tuple[int, ...]):
+        if self.device not in (None, "cpu"):
+            # Page-locked, so host-to-device copies can be asynchronous.
+            return self.torch.empty(shape, dtype=self.torch.float32, pin_memory=True).numpy()
+        return self._np.empty(shape, dtype=self._np.float32)
+
+    @contextmanager
+    def _buffer(self, key: str, shape: tuple[int, ...]) -> Iterator[Any]:
+        """A float32 array of `shape` for the block: a staging view when enabled, else a fresh array."""
+        if self.staging is None:
+            yield self._np.empty(shape, dtype=self._np.float32)
+            return
+        with self.staging.checkout(key, shape) as array:
+            yield array
+
+    @contextmanager
+    def _stage(self, key: str, arrays: list, stack: bool = False) -> Iterator[Any]:
+        """`arrays` concatenated (or stacked) as float32, in a staging buffer when enabled."""
+        join = self._np.stack if stack else self._np.concatenate
+        rows = len(arrays) if stack else sum(len(array) for array in arrays)
+        tail = arrays[0].shape if stack else arrays[0].shape[1:]
+        with self._buffer(key, (rows, *tail)) as out:
+            yield join(arrays, out=out)
+
+    def _moves(self):
+        """(float32 encodings of every move, `move_index`), imported on first use."""
+        if self._move_table is None:
+            from .engine.batch import MOVE_ENCODINGS, move_index
+
+            self._move_table = (MOVE_ENCODINGS.astype(self._np.float32), move_index)
+        return self._move_table
+
+    def observe(self, infoset) -> dict[str, Any]:
+        """
+        Compact observation of `infoset`: what `get_obs` encodes, without the per-action rows.
+
+        `z` and `x_no_action` are shared by every legal action; `action_ids`
+        index each action's 54-column encoding in `engine.batch`'s move table.
+        Scoring expands these straight into staging buffers instead of
+        materialising `get_obs`'s `x_batch`/`z_batch`.
+        """
+        self._ensure_imports()
+        _, move_index = self._moves()
+        shared = copy.copy(infoset)
+        shared.legal_actions = [[]]
+        obs = self._get_obs(shared)
+        actions = infoset.legal_actions
+        action_ids = self._np.fromiter((move_index(action) for action in actions), self._np.int64, len(actions))
+        return {"z": obs["z"], "x_no_action": obs["x_no_action"], "action_ids": action_ids}
+
+    def _action_rows(self, out, observations: list[dict[str, Any]]):
+        """Write the legal actions' encodings of `observations`, in order, into `out`."""
+        encodings, _ = self._moves()
+        if len(observations) == 1:
+            ids = observations[0]["action_ids"]
+        else:
+            ids = self._np.concatenate([obs["action_ids"] for obs in observations])
+        self._np.take(encodings, ids, axis=0, out=out)
+        return out
+
     def _load_model(self, position: str):
         self._ensure_imports()
         ckpt = self.ckpt_map.get(position)
@@ -53,42 +290,269 @@ class ModelRegistry:
         if not ckpt.exists():
             raise ModelBridgeError(f"Checkpoint not found: {ckpt}")
 
-        model = self._model_dict[position]()
-        model_state_dict = model.state_dict()
-        pretrained = self.torch.load(str(ckpt), map_location=self.device)
-        pretrained = {key: value for key, value in pretrained.items() if key in model_state_dict}
-        model_state_dict.update(pretrained)
-        model.load_state_dict(model_state_dict)
-        if self.device != "cpu":
-            model.cuda()
-        model.eval()
-        return model
+        return load_model(self.torch, self._model_dict[position], ckpt, self.device)
+
+    @property
+    def models(self) -> dict[str, Any]:
+        return self.current.models
+
+    @property
+    def version(self) -> int:
+        return self.current.version
+
+    def get(self, position: str, model_set: ModelSet | None = None):
+        model_set = model_set or self.current
+        if position not in model_set.models:
+            model_set.models[position] = self._load_model(position)
+        return model_set.models[position]
+
+    def fingerprint(self) -> str:
+        """Digest of size and mtime of every checkpoint file (and converted copy)."""
+        digest = hashlib.blake2b(digest_size=8)
+        for position, ckpt in sorted(self.ckpt_map.items()):
+            for path in checkpoint_files(ckpt):
+                stat = path.stat() if path.exists() else None
+                digest.update(f"{position}:{path.name}:{stat and stat.st_size}:{stat and stat.st_mtime_ns};".encode())
+        return digest.hexdigest()
+
+    def model_tag(self, model_set: ModelSet | None = None) -> str:
+        """Fingerprint of the loaded generation, so cached results never outlive the weights."""
+        model_set = model_set or self.current
+        if model_set.tag is None:
+            model_set.tag = self.fingerprint()
+        return model_set.tag
+
+    def reload(self) -> int:
+        """Load all three models from disk and swap them in; returns the new version."""
+        with self._reload_lock:
+            tag = self.fingerprint()
+            try:
+                models = {position: self._load_model(position) for position in self.ckpt_map}
+            except Exception as exc:
+                self.last_reload_error = str(exc)
+                raise ModelBridgeError(f"Reload failed, keeping version {self.version}: {exc}") from exc
+            self.current = ModelSet(version=self.version + 1, tag=tag, models=models)
+            self.last_reload_error = None
+            return self.version
+
+    def reload_async(self) -> threading.Thread:
+        """`reload()` on a background thread; failures are logged and the old models stay."""
+
+        def _run() -> None:
+            try:
+                version = self.reload()
+                logger.info("Models reloaded from %s: version %s", self.ckpt_root, version)
+            except ModelBridgeError as exc:
+                logger.warning("%s", exc)
+
+        thread = threading.Thread(target=_run, name="douzero-model-reload", daemon=True)
+        thread.start()
+        return thread
+
+    def watch(self, interval: float = WATCH_INTERVAL_SECONDS) -> threading.Event:
+        """
+        Reload in the background when checkpoint files change. Returns an Event that stops watching.
+
+        A change must be seen on two consecutive polls, so files still being
+        copied are not loaded half-written.
+        """
+        if self._watch_stop is not None:
+            return self._watch_stop
+        stop = threading.Event()
+        self._watch_stop = stop
+
+        def _poll() -> None:
+            seen = self.fingerprint()
+            while not stop.wait(interval):
+                current = self.fingerprint()
+                if current == seen and current != self.model_tag():
+                    self.reload_async().join()
+                seen = current
+
+        threading.Thread(target=_poll, name="douzero-model-watch", daemon=True).start()
+        return stop
 
-    def get(self, position: str):
-        if position not in self.models:
-            self.models[position] = self._load_model(position)
-        return self.models[position]
+    def stop_watching(self) -> None:
+        if self._watch_stop is not None:
+            self._watch_stop.set()
+            self._watch_stop = None
+
+    def close(self) -> None:
+        """Release background resources (the file watcher)."""
+        self.stop_watching()
+
+    def _cached_opening(self, infoset, model_set: ModelSet) -> tuple[str | None, Any]:
+        """(opening key or None, cached (action, values) or None)."""
+        if self.opening_cache is None:
+            return None, None
+        key = opening_key(infoset)
+        if key is None:
+            return None, None
+        return key, self.opening_cache.get(key, self.model_tag(model_set))
+
+    def preload(self) -> None:
+        """Load all three models up front."""
+        for position in self.ckpt_map:
+            self.get(position)
 
     def recommend(self, infoset) -> list[int]:
+        return self.recommend_many([infoset])[0]
+
+    def action_values(self, infoset) -> Any:
+        """Model value of every legal action of `infoset` (1-D numpy array, same order)."""
         self._ensure_imports()
-        legal_actions = infoset.legal_actions
-        if not legal_actions:
+        if not infoset.legal_actions:
             raise ModelBridgeError("No legal actions available.")
-        if len(legal_actions) == 1:
-            return legal_actions[0]
+        model_set = self.current
+        key, cached = self._cached_opening(infoset, model_set)
+        if cached is not None:
+            return cached[1]
+        obs = self.observe(infoset)
+        values = self.score_decisions(infoset.player_position, [obs], model_set)
+        if key is not None:
+            tag = self.model_tag(model_set)
+            self.opening_cache.put(key, tag, infoset.legal_actions[int(values.argmax())], values)
+        return values
+
+    def recommend_many(self, infosets: list[Any]) -> list[list[int]]:
+        """
+        Recommend one action per infoset.
+
+        Rows of all infosets that share a position go through the model in
+        as few forward passes as possible (chunked at MAX_BATCH_ROWS). With
+        `prune_top`, a decision with more legal actions only scores the
+        `engine.prune` heuristic's best `prune_top` (openings going into the
+        opening cache are always scored in full).
+        """
+        self._ensure_imports()
+        model_set = self.current
+        results: list[list[int] | None] = [None] * len(infosets)
+        pending: dict[str, list[tuple[int, Any]]] = {}
+        opening_keys: dict[int, str] = {}
+        for index, infoset in enumerate(infosets):
+            legal_actions = infoset.legal_actions
+            if not legal_actions:
+                raise ModelBridgeError("No legal actions available.")
+            if len(legal_actions) == 1:
+                results[index] = legal_actions[0]
+                continue
+            key, cached = self._cached_opening(infoset, model_set)
+            if cached is not None:
+                results[index] = cached[0]
+                continue
+            if key is not None:
+                opening_keys[index] = key
+            elif self.prune_top and len(legal_actions) > self.prune_top:
+                infoset = self._pruned(infoset)
+            pending.setdefault(infoset.player_position, []).append((index, infoset))
+
+        for position, items in pending.items():
+            chunk: list[tuple[int, Any, dict[str, Any]]] = []
+            rows = 0
+            for index, infoset in items:
+                obs = self.observe(infoset)
+                if chunk and rows + len(infoset.legal_actions) > MAX_BATCH_ROWS:
+                    self._score_chunk(model_set, position, chunk, results, opening_keys)
+                    chunk, rows = [], 0
+                chunk.append((index, infoset, obs))
+                rows += len(infoset.legal_actions)
+            self._score_chunk(model_set, position, chunk, results, opening_keys)
 
-        model = self.get(infoset.player_position)
-        obs = self._get_obs(infoset)
+        return results  # type: ignore[return-value]
 
-        z_batch = self.torch.from_numpy(obs["z_batch"]).float()
-        x_batch = self.torch.from_numpy(obs["x_batch"]).float()
+    def _pruned(self, infoset):
+        """Copy of `infoset` limited to the heuristic's `prune_top` best legal actions."""
+        keep = prune_actions(infoset.player_hand_cards, infoset.legal_actions, self.prune_top)
+        pruned = copy.copy(infoset)
+        pruned.legal_actions = [infoset.legal_actions[index] for index in keep]
+        return pruned
+
+    def score(self, position: str, z_rows, x_rows, model_set: ModelSet | None = None):
+        """Model values (1-D numpy array) for prepared float32 `z_batch`/`x_batch` rows."""
+        self._ensure_imports()
+        model = self.get(position, model_set)
+        z_batch = self.torch.from_numpy(z_rows).float()  # no copy for float32 input
+        x_batch = self.torch.from_numpy(x_rows).float()
         if self.device != "cpu":
-            z_batch = z_batch.cuda()
-            x_batch = x_batch.cuda()
+            z_batch = z_batch.cuda(non_blocking=True)
+            x_batch = x_batch.cuda(non_blocking=True)
 
         with self.torch.no_grad():
             y_pred = model.forward(z_batch, x_batch, return_value=True)["values"]
 
-        values = y_pred.detach().cpu().numpy()
-        best_action_index = values.argmax(axis=0)[0]
-        return legal_actions[int(best_action_index)]
+        return y_pred.detach().cpu().numpy()[:, 0]
+
+    def score_decisions(self, position: str, observations: list[dict[str, Any]], model_set: ModelSet | None = None):
+        """
+        Values of every legal action of several decisions (`observe` results), concatenated.
+
+        With `split_forward` the LSTM and the shared part of `dense1` run
+        once per decision (`model_defs.decision_forward`); otherwise, or when
+        decisions have few legal actions, every row goes through the full
+        network.
+        """
+        counts = [len(obs["action_ids"]) for obs in observations]
+        if not self.split_forward or sum(counts) < SPLIT_MIN_ROWS_PER_DECISION * len(observations):
+            return self._score_rows(position, observations, model_set)
+        self._ensure_imports()
+        torch = self.torch
+        model = self.get(position, model_set)
+        width = self._moves()[0].shape[1]
+        # The buffers go back to the pool once the values are on the host (`.cpu()` waits for the copies).
+        with ExitStack() as buffers:
+            z = buffers.enter_context(self._stage(f"{position}:z", [obs["z"] for obs in observations], stack=True))
+            x_shared = buffers.enter_context(
+                self._stage(f"{position}:x_shared", [obs["x_no_action"] for obs in observations], stack=True)
+            )
+            x_actions = buffers.enter_context(self._buffer(f"{position}:x_actions", (sum(counts), width)))
+            tensors = [
+                torch.from_numpy(z),
+                torch.from_numpy(x_shared),
+                torch.from_numpy(self._action_rows(x_actions, observations)),
+                torch.tensor(counts),
+            ]
+            if self.device != "cpu":
+                tensors = [tensor.cuda(non_blocking=True) for tensor in tensors]
+            with torch.no_grad():
+                values = self._model_defs.decision_forward(model, *tensors)
+            return values.cpu().numpy()[:, 0]
+
+    def _score_rows(self, position: str, observations: list[dict[str, Any]], model_set: ModelSet | None = None):
+        """Expand `observe` results into full `z_batch`/`x_batch` rows and `score` them."""
+        encodings, _ = self._moves()
+        width = encodings.shape[1]
+        shared = observations[0]["x_no_action"].shape[0]
+        rows = sum(len(obs["action_ids"]) for obs in observations)
+        with (
+            self._buffer(f"{position}:z_rows", (rows, *observations[0]["z"].shape)) as z_rows,
+            self._buffer(f"{position}:x_rows", (rows, shared + width)) as x_rows,
+        ):
+            offset = 0
+            for obs in observations:
+                count = len(obs["action_ids"])
+                z_rows[offset : offset + count] = obs["z"]
+                x_rows[offset : offset + count, :shared] = obs["x_no_action"]
+                offset += count
+            self._action_rows(x_rows[:, shared:], observations)
+            return self.score(position, z_rows, x_rows, model_set)
+
+    def _score_chunk(
+        self,
+        model_set: ModelSet,
+        position: str,
+        chunk: list[tuple[int, Any, dict[str, Any]]],
+        results: list,
+        opening_keys: dict[int, str],
+    ) -> None:
+        values = self.score_decisions(position, [obs for _, _, obs in chunk], model_set)
+
+        offset = 0
+        for index, infoset, _ in chunk:
+            count = len(infoset.legal_actions)
+            best_action_index = values[offset : offset + count].argmax()
+            results[index] = infoset.legal_actions[int(best_action_index)]
+            if index in opening_keys:
+                self.opening_cache.put(
+                    opening_keys[index], self.model_tag(model_set), results[index], values[offset : offset + count]
+                )
+            offset += count
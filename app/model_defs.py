@@ -2,7 +2,10 @@
 
 from __future__ import annotations
 
+import weakref
+
 import torch
+import torch.nn.functional as F
 from torch import nn
 
 
@@ -64,3 +67,44 @@ model_dict = {
     "landlord_down": FarmerLstmModel,
 }
 
+
+# The action encoding is the last 54 columns of every `x` row; the rest of the
+# row (hands, played cards, cards left, bombs) is the same for all legal actions
+# of one decision.
+ACTION_COLUMNS = 54
+_DENSE1_PARTS: "weakref.WeakKeyDictionary[nn.Module, tuple[torch.Tensor, torch.Tensor]]" = weakref.WeakKeyDictionary()
+
+
+def _dense1_parts(model):
+    """(shared, action) column blocks of `dense1.weight`, contiguous, cached per model."""
+    parts = _DENSE1_PARTS.get(model)
+    if parts is None:
+        weight = model.dense1.weight.detach()
+        parts = (weight[:, :-ACTION_COLUMNS].contiguous(), weight[:, -ACTION_COLUMNS:].contiguous())
+        _DENSE1_PARTS[model] = parts
+    return parts
+
+
+def decision_forward(model, z, x_shared, x_actions, counts):
+    """
+    Values of several decisions' legal actions, equal to `model.forward` on the expanded rows.
+
+    `z` is (D, 5, 162) and `x_shared` (D, width - 54): one row per decision.
+    `x_actions` is (N, 54), the action columns of all N legal actions, and
+    `counts` (D,) how many of them belong to each decision, in order.
+    `dense1` is linear, so on `[lstm(z), x_shared, x_action]` it splits into
+    a per-decision part computed once and a per-action part from the 54
+    action columns of its weight; the LSTM also runs once per decision.
+    """
+    shared_weight, action_weight = _dense1_parts(model)
+    lstm_out, _ = model.lstm(z)
+    lstm_out = lstm_out[:, -1, :]
+    shared = F.linear(torch.cat([lstm_out, x_shared], dim=-1), shared_weight, model.dense1.bias)
+    if len(shared) > 1:
+        shared = torch.repeat_interleave(shared, counts, dim=0)
+    x = torch.relu(shared + F.linear(x_actions, action_weight))
+    x = torch.relu(model.dense2(x))
+    x = torch.relu(model.dense3(x))
+    x = torch.relu(model.dense4(x))
+    x = torch.relu(model.dense5(x))
+    return model.dense6(x)
@@ -0,0 +1,101 @@
+"""A/B routing between the primary model set and a candidate, with per-version metrics."""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+
+PRIMARY = "primary"
+CANDIDATE = "candidate"
+# Latency percentiles are computed over this many most recent decisions per version.
+METRIC_WINDOW = 1000
+
+
+@dataclass
+class VersionMetrics:
+    decisions: int = 0
+    errors: int = 0
+    passes: int = 0
+    latencies_ms: deque = field(default_factory=lambda: deque(maxlen=METRIC_WINDOW))
+
+    def summary(self) -> dict[str, Any]:
+        latencies = np.array(self.latencies_ms) if self.latencies_ms else None
+        return {
+            "decisions": self.decisions,
+            "errors": self.errors,
+            "pass_rate": round(self.passes / self.decisions, 4) if self.decisions else None,
+            "latency_ms": {
+                "mean": round(float(latencies.mean()), 2),
+                "p50": round(float(np.percentile(latencies, 50)), 2),
+                "p95": round(float(np.percentile(latencies, 95)), 2),
+            }
+            if latencies is not None
+            else None,
+        }
+
+
+def bucket(session_key: str) -> float:
+    """Stable position of a session in [0, 100)."""
+    digest = hashlib.blake2b(session_key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % 10000 / 100
+
+
+class ModelRouter:
+    """Sends `candidate_percent` of sessions to the candidate registry, the rest to the primary one."""
+
+    def __init__(self, primary, candidate=None, candidate_percent: float = 0.0):
+        self.primary = primary
+        self.candidate = candidate
+        self.candidate_percent = candidate_percent
+        self.metrics: dict[str, VersionMetrics] = {}
+        self._lock = threading.Lock()
+
+    def set_candidate(self, candidate, percent: float) -> None:
+        if not 0 <= percent <= 100:
+            raise ValueError("percent must be between 0 and 100.")
+        self.candidate, self.candidate_percent = candidate, percent
+
+    def route(self, session_key: str) -> tuple[str, Any]:
+        candidate, percent = self.candidate, self.candidate_percent
+        if candidate is not None and bucket(session_key) < percent:
+            return CANDIDATE, candidate
+        return PRIMARY, self.primary
+
+    @staticmethod
+    def label(arm: str, registry) -> str:
+        return f"{arm}@v{registry.version}:{registry.model_tag()}"
+
+    def record(self, label: str, latency_ms: float, action: list[int] | None = None, error: bool = False) -> None:
+        with self._lock:
+            metrics = self.metrics.setdefault(label, VersionMetrics())
+            metrics.latencies_ms.append(latency_ms)
+            if error:
+                metrics.errors += 1
+                return
+            metrics.decisions += 1
+            metrics.passes += action == []
+
+    def status(self) -> dict[str, Any]:
+        arms = {PRIMARY: self.primary}
+        if self.candidate is not None:
+            arms[CANDIDATE] = self.candidate
+        with self._lock:
+            metrics = {label: item.summary() for label, item in self.metrics.items()}
+        return {
+            "candidate_percent": self.candidate_percent if self.candidate is not None else 0.0,
+            "arms": {
+                arm: {
+                    "ckpt_root": str(registry.ckpt_root),
+                    "version": registry.version,
+                    "model_tag": registry.model_tag(),
+                    "last_reload_error": registry.last_reload_error,
+                }
+                for arm, registry in arms.items()
+            },
+            "metrics": metrics,
+        }
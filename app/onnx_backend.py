@@ -0,0 +1,138 @@
+"""
+ONNX Runtime backend for the DouZero value networks.
+
+`export_onnx` writes `<position>.onnx` next to each `<position>.ckpt`, with
+inputs `z` (batch, 5, 162) and `x` (batch, 373 or 484) and output `values`
+(batch, 1). The batch axis is dynamic. `OnnxModelRegistry` runs these files
+with onnxruntime on CPU and never imports torch, so a build that ships only
+the exported models does not need torch. An export older than its `.ckpt` is
+treated as missing.
+
+Export once with `python -m app.onnx_backend --ckpt-dir douzero_WP`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import warnings
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from .checkpoints import DEFAULT_CKPT_DIR, ONNX_SUFFIX, POSITIONS, is_current, load_model
+from .model_bridge import ModelBridgeError, ModelRegistry, ModelSet
+
+OPSET = 17
+X_WIDTH = {"landlord": 373, "landlord_up": 484, "landlord_down": 484}
+
+
+def export_onnx(ckpt_dir: str | Path) -> list[Path]:
+    """Export every position's checkpoint to ONNX with a dynamic batch axis."""
+    import torch
+
+    from .model_defs import model_dict
+
+    class ValueHead(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, z, x):
+            return self.model(z, x, return_value=True)["values"]
+
+    written = []
+    for position in POSITIONS:
+        ckpt = Path(ckpt_dir) / f"{position}.ckpt"
+        model = load_model(torch, model_dict[position], ckpt)
+        target = ckpt.with_suffix(ONNX_SUFFIX)
+        example = (torch.zeros(2, 5, 162), torch.zeros(2, X_WIDTH[position]))
+        with warnings.catch_warnings():
+            # The tracer warns about LSTM shape checks and batch sizes; the sequence
+            # length is fixed at 5 and the batch axis is exported as dynamic.
+            warnings.simplefilter("ignore")
+            torch.onnx.export(
+                ValueHead(model),
+                example,
+                str(target),
+                input_names=["z", "x"],
+                output_names=["values"],
+                dynamic_axes={"z": {0: "batch"}, "x": {0: "batch"}, "values": {0: "batch"}},
+                opset_version=OPSET,
+                dynamo=False,
+            )
+        written.append(target)
+    return written
+
+
+class OnnxModelRegistry(ModelRegistry):
+    """`ModelRegistry` whose forward passes run in onnxruntime sessions (CPU)."""
+
+    def _ensure_imports(self) -> None:
+        if self._np is not None:
+            return
+        try:
+            import onnxruntime
+            from douzero.env.env import get_obs
+        except Exception as exc:  # pragma: no cover - runtime dependency
+            raise ModelBridgeError(
+                f"ONNX backend is not ready: install onnxruntime or use the torch backend. Root cause: {exc}"
+            ) from exc
+        self.threads.pin()
+        self._ort = onnxruntime
+        self._np = np
+        self._get_obs = get_obs
+        self.device = "cpu"
+
+    def _load_model(self, position: str):
+        self._ensure_imports()
+        ckpt = self.ckpt_map.get(position)
+        if ckpt is None:
+            raise ModelBridgeError(f"Unsupported position: {position}")
+        path = ckpt.with_suffix(ONNX_SUFFIX)
+        if not is_current(path, ckpt):
+            raise ModelBridgeError(f"ONNX model not found or older than its checkpoint: {path}")
+        options = self._ort.SessionOptions()
+        if self.threads.intra_op:
+            options.intra_op_num_threads = self.threads.intra_op
+        if self.threads.inter_op:
+            options.inter_op_num_threads = self.threads.inter_op
+        return self._ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+
+    def score(self, position: str, z_rows, x_rows, model_set: ModelSet | None = None):
+        session = self.get(position, model_set)
+        feeds = {"z": np.asarray(z_rows, dtype=np.float32), "x": np.asarray(x_rows, dtype=np.float32)}
+        return session.run(None, feeds)[0][:, 0]
+
+    def score_decisions(self, position: str, observations: list[dict[str, Any]], model_set: ModelSet | None = None):
+        # The exported graph takes full rows; the split forward path is torch-only.
+        return self._score_rows(position, observations, model_set)
+
+
+BACKENDS = {"torch": ModelRegistry, "onnx": OnnxModelRegistry}
+
+
+def registry_class(backend: str) -> type[ModelRegistry]:
+    try:
+        return BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown model backend {backend!r}; expected one of {sorted(BACKENDS)}.") from None
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Export DouZero checkpoints to ONNX.")
+    parser.add_argument("--ckpt-dir", default=str(DEFAULT_CKPT_DIR))
+    args = parser.parse_args(argv)
+    try:
+        written = export_onnx(args.ckpt_dir)
+    except (FileNotFoundError, RuntimeError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+    print(json.dumps([str(path) for path in written]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
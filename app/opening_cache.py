@@ -0,0 +1,181 @@
+"""
+Persistent cache of opening recommendations.
+
+The landlord's first lead is the widest decision of a game and depends only
+on the 20-card hand and the bottom cards, so its recommendation and action
+values are stored in SQLite keyed by that canonical position and the model
+fingerprint. The database runs in WAL mode so several processes can share
+it, entries are evicted least-recently-used beyond `max_entries`, and the
+file survives restarts.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from .engine.parser import ParseError, action_to_text, parse_action_text
+from .engine.state import ValidationError
+
+DEFAULT_MAX_ENTRIES = 100_000
+# Eviction runs once per this many inserts.
+EVICT_EVERY = 256
+PREWARM_BATCH = 256
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS openings (
+    key TEXT NOT NULL,
+    model_tag TEXT NOT NULL,
+    action TEXT NOT NULL,
+    action_values BLOB NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (key, model_tag)
+);
+CREATE INDEX IF NOT EXISTS openings_last_used ON openings (last_used);
+"""
+
+
+def opening_key(infoset) -> str | None:
+    """Canonical key of the landlord's opening lead, or None for any other decision."""
+    if infoset.player_position != "landlord" or infoset.card_play_action_seq:
+        return None
+    return f"landlord|{action_to_text(sorted(infoset.player_hand_cards))}|{action_to_text(sorted(infoset.three_landlord_cards))}"
+
+
+class OpeningCache:
+    """SQLite-backed LRU map from opening key to (recommended action, action values)."""
+
+    def __init__(self, path: str | Path, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._pid: int | None = None
+        self._inserts = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections must not cross fork(); each process opens its own.
+        if self._conn is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get(self, key: str, model_tag: str) -> tuple[list[int], np.ndarray] | None:
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT action, action_values FROM openings WHERE key = ? AND model_tag = ?", (key, model_tag)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE openings SET last_used = ? WHERE key = ? AND model_tag = ?", (time.time(), key, model_tag)
+            )
+        return parse_action_text(row[0]), np.frombuffer(row[1], dtype="<f4")
+
+    def put(self, key: str, model_tag: str, action: list[int], values) -> None:
+        blob = np.asarray(values, dtype="<f4").tobytes()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO openings (key, model_tag, action, action_values, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, model_tag, action_to_text(action), blob, time.time()),
+            )
+            self._inserts += 1
+            if self._inserts % EVICT_EVERY == 0:
+                self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        (count,) = conn.execute("SELECT COUNT(*) FROM openings").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM openings WHERE rowid IN (SELECT rowid FROM openings ORDER BY last_used LIMIT ?)", (excess,)
+            )
+
+    def evict(self) -> None:
+        """Trim to `max_entries` now instead of at the next periodic check."""
+        with self._lock:
+            self._evict(self._connection())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM openings").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+
+def _opening_infosets(records) -> list[Any]:
+    from .replay import build_game_state
+
+    infosets = []
+    for record in records:
+        if not isinstance(record, dict):
+            continue
+        hands = record.get("hands")
+        hand = hands.get("landlord") if hands else (record.get("my_hand") if record.get("role") == "landlord" else None)
+        if hand is None:
+            continue
+        try:
+            state = build_game_state("landlord", hand, record.get("landlord_cards"))
+        except (ParseError, ValidationError):
+            continue
+        infosets.append(state.build_infoset_for_user())
+    return infosets
+
+
+def prewarm(registry, records) -> int:
+    """Recommend the opening of every landlord hand in `records`; the registry's cache stores them."""
+    count = 0
+    batch: list[Any] = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == PREWARM_BATCH:
+            count += len(registry.recommend_many(_opening_infosets(batch)))
+            batch = []
+    infosets = _opening_infosets(batch)
+    if infosets:
+        count += len(registry.recommend_many(infosets))
+    return count
+
+
+def main(argv: list[str] | None = None) -> int:
+    from .analysis import iter_records
+    from .checkpoints import DEFAULT_CKPT_DIR
+    from .model_bridge import ModelRegistry
+
+    parser = argparse.ArgumentParser(description="Prewarm the opening cache from game records (JSON lines, optionally .gz).")
+    parser.add_argument("inputs", nargs="+")
+    parser.add_argument("--cache", required=True, help="SQLite cache file shared with the server.")
+    parser.add_argument("--ckpt-dir", default=str(DEFAULT_CKPT_DIR))
+    parser.add_argument("--max-entries", type=int, default=DEFAULT_MAX_ENTRIES)
+    args = parser.parse_args(argv)
+
+    cache = OpeningCache(args.cache, max_entries=args.max_entries)
+    registry = ModelRegistry(args.ckpt_dir, opening_cache=cache)
+    count = prewarm(registry, (record for _, record in iter_records(args.inputs)))
+    cache.evict()
+    print(json.dumps({"openings": count, "cached": len(cache)}))
+    cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""Bulk replay of recorded games: validate every action, recommend only at user decisions."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Iterable
+
+from .checkpoints import DEFAULT_CKPT_DIR
+from .engine.parser import ParseError, action_to_text, parse_action_payload, parse_hand_payload, validate_cards_not_exceed_deck
+from .engine.state import ROLE_ORDER, GameState, ValidationError
+from .model_bridge import ModelBridgeError
+
+# (declared actor or None, parsed action)
+ReplayAction = tuple[str | None, list[int]]
+
+
+@dataclass
+class ReplayStep:
+    step: int
+    actor: str
+    actual: str
+    recommended: str | None = None
+    matched: bool | None = None
+
+
+@dataclass
+class ReplayReport:
+    steps: list[ReplayStep] = field(default_factory=list)
+    error: str | None = None
+    error_step: int | None = None
+    recommendation_error: str | None = None
+
+    def summary(self) -> dict[str, Any]:
+        decisions = [step for step in self.steps if step.matched is not None]
+        matched = sum(1 for step in decisions if step.matched)
+        return {
+            "steps": len(self.steps),
+            "decisions": len(decisions),
+            "matched": matched,
+            "agreement": round(matched / len(decisions), 4) if decisions else None,
+        }
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "steps": [asdict(step) for step in self.steps],
+            "summary": self.summary(),
+            "error": self.error,
+            "error_step": self.error_step,
+            "recommendation_error": self.recommendation_error,
+        }
+
+
+def build_game_state(role: Any, my_hand: Any, landlord_cards: Any) -> GameState:
+    """Parse and validate a starting config the same way `/api/game/start` does."""
+    my_hand_cards = parse_hand_payload(my_hand, "my_hand")
+    landlord_cards_list = parse_hand_payload(landlord_cards, "landlord_cards")
+    validate_cards_not_exceed_deck(my_hand_cards, "my_hand")
+    validate_cards_not_exceed_deck(landlord_cards_list, "landlord_cards")
+    validate_cards_not_exceed_deck(my_hand_cards + landlord_cards_list, "combined known cards")
+    return GameState.create(role, my_hand_cards, landlord_cards_list)
+
+
+def parse_action_entry(entry: Any) -> ReplayAction:
+    """
+    Parse one recorded action:
+    - "3344", "PASS", "landlord: 3344"
+    - {"actor": "landlord", "action": "3344"} (action in any parse_action_payload format)
+    - a bare click/counts payload
+    """
+    if isinstance(entry, str) and ":" in entry:
+        actor, _, text = entry.partition(":")
+        return _checked_actor(actor.strip()), parse_action_payload(text)
+    if isinstance(entry, dict) and "action" in entry:
+        actor = entry.get("actor")
+        return (_checked_actor(str(actor)) if actor is not None else None), parse_action_payload(entry["action"])
+    return None, parse_action_payload(entry)
+
+
+def _checked_actor(actor: str) -> str:
+    if actor not in ROLE_ORDER:
+        raise ParseError(f"Unknown actor: {actor}")
+    return actor
+
+
+def parse_action_lines(text: str) -> list[ReplayAction]:
+    """Parse a text or JSON-lines action log; blank lines and `#` comments are skipped."""
+    actions: list[ReplayAction] = []
+    for line_no, raw_line in enumerate(text.splitlines(), start=1):
+        line = raw_line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            entry = json.loads(line) if line[0] in '{"' else line
+            actions.append(parse_action_entry(entry))
+        except (ParseError, json.JSONDecodeError) as exc:
+            raise ParseError(f"Line {line_no}: {exc}") from exc
+    return actions
+
+
+def replay_game(state: GameState, actions: Iterable[ReplayAction], registry=None) -> ReplayReport:
+    """
+    Apply `actions` to `state` in one pass with validation only.
+
+    Infosets are captured at the user's decision points and, when a
+    registry is given, recommended in one batched call at the end.
+    Replay stops at the first invalid action; steps before it are kept.
+    """
+    report = ReplayReport()
+    infosets = []
+    decision_steps: list[ReplayStep] = []
+
+    for step_no, (declared_actor, action) in enumerate(actions, start=1):
+        actor = state.acting_role
+        try:
+            if declared_actor is not None and declared_actor != actor:
+                raise ValidationError(f"Expected {actor} to act, log says {declared_actor}.")
+            infoset = state.build_infoset_for_user() if registry is not None and state.need_user_action() else None
+            state.apply_action(action)
+        except ValidationError as exc:
+            report.error = str(exc)
+            report.error_step = step_no
+            break
+
+        step = ReplayStep(step=step_no, actor=actor, actual=action_to_text(action))
+        report.steps.append(step)
+        if infoset is not None:
+            infosets.append(infoset)
+            decision_steps.append(step)
+
+    if infosets:
+        try:
+            recommendations = registry.recommend_many(infosets)
+        except ModelBridgeError as exc:
+            report.recommendation_error = str(exc)
+        else:
+            for step, recommended in zip(decision_steps, recommendations):
+                step.recommended = action_to_text(recommended)
+                step.matched = step.recommended == step.actual
+
+    return report
+
+
+def _load_input(args: argparse.Namespace) -> tuple[GameState, list[ReplayAction]]:
+    raw = Path(args.input).read_text(encoding="utf-8")
+    if args.input.endswith(".json"):
+        record = json.loads(raw)
+        state = build_game_state(record.get("role"), record.get("my_hand"), record.get("landlord_cards"))
+        return state, [parse_action_entry(entry) for entry in record.get("actions", [])]
+    if not (args.role and args.hand and args.landlord_cards):
+        raise ParseError("--role, --hand and --landlord-cards are required for text/JSON-lines action logs.")
+    return build_game_state(args.role, args.hand, args.landlord_cards), parse_action_lines(raw)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay a recorded game and compare recommendations with actual play.")
+    parser.add_argument("input", help="A .json record (config + actions) or a text/JSON-lines action log.")
+    parser.add_argument("--role", choices=ROLE_ORDER)
+    parser.add_argument("--hand", help="Your 17 starting cards, e.g. 3344556678910JQKA2.")
+    parser.add_argument("--landlord-cards", help="The 3 landlord cards.")
+    parser.add_argument("--ckpt-dir", default=str(DEFAULT_CKPT_DIR))
+    parser.add_argument("--no-recommend", action="store_true", help="Validate only.")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args(argv)
+
+    try:
+        state, actions = _load_input(args)
+    except (ParseError, ValidationError, json.JSONDecodeError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+
+    registry = None
+    if not args.no_recommend:
+        from .model_bridge import ModelRegistry
+
+        registry = ModelRegistry(args.ckpt_dir)
+    report = replay_game(state, actions, registry)
+
+    if args.json:
+        print(json.dumps(report.to_dict(), ensure_ascii=False, indent=2))
+    else:
+        for step in report.steps:
+            line = f"{step.step:>3} {step.actor:<13} {step.actual:<22}"
+            if step.recommended is not None:
+                line += f" rec={step.recommended:<22} {'=' if step.matched else 'x'}"
+            print(line)
+        print(json.dumps(report.summary()))
+        if report.recommendation_error:
+            print(f"recommendation error: {report.recommendation_error}", file=sys.stderr)
+    if report.error:
+        print(f"error at step {report.error_step}: {report.error}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,320 @@
+"""
+Determinized Monte-Carlo rollout search on top of the DouZero value networks.
+
+Each determinization samples opponent hands consistent with the visible
+state (`engine.inference`), then every candidate action is played out to the
+end of the game by the three greedy models. Rollouts of one batch advance in
+lockstep so each step is one batched `recommend_many` call. Win rates are
+aggregated per candidate until the time budget expires; the anytime-best
+candidate is returned, or the greedy action when too few rollouts finished.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import functools
+import logging
+import multiprocessing
+import time
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, Callable
+
+import numpy as np
+
+from .engine.inference import opponent_hand_model
+from .engine.parser import action_to_text
+from .engine.rules import get_legal_actions, get_rival_move, is_bomb
+from .engine.state import ROLE_ORDER, GameState, next_role
+
+DEFAULT_BUDGET_MS = 200
+# Candidates kept after ranking by the value network; rollouts cost grows linearly with this.
+MAX_CANDIDATES = 6
+DEALS_PER_TASK = 4
+# A candidate needs this many finished rollouts before it can displace the greedy action.
+MIN_VISITS = 4
+
+logger = logging.getLogger("douzero-web")
+
+
+class RolloutGame:
+    """Full-information game used for rollouts: every hand is known."""
+
+    def __init__(self, state: GameState, opponent_hands: dict[str, list[int]]):
+        self.hands = {role: list(opponent_hands.get(role, ())) for role in ROLE_ORDER}
+        self.hands[state.user_role] = list(state.my_hand_cards)
+        self.acting_role = state.acting_role
+        self.card_play_action_seq = [list(action) for action in state.card_play_action_seq]
+        self.played_cards = {role: list(cards) for role, cards in state.played_cards.items()}
+        self.last_move_dict = {role: list(action) for role, action in state.last_move_dict.items()}
+        self.num_cards_left_dict = dict(state.num_cards_left_dict)
+        self.three_landlord_cards = list(state.three_landlord_cards)
+        self.last_pid = state.last_pid
+        self.bomb_num = state.bomb_num
+        self.winner: str | None = state.winner
+
+    def infoset(self) -> SimpleNamespace:
+        role = self.acting_role
+        seq = self.card_play_action_seq
+        other_hand_cards = sorted(card for other in ROLE_ORDER if other != role for card in self.hands[other])
+        last_two_moves = ([[], []] + seq[-2:])[-2:][::-1]
+        return SimpleNamespace(
+            player_position=role,
+            player_hand_cards=self.hands[role],
+            num_cards_left_dict=self.num_cards_left_dict,
+            three_landlord_cards=self.three_landlord_cards,
+            card_play_action_seq=seq,
+            other_hand_cards=other_hand_cards,
+            legal_actions=get_legal_actions(self.hands[role], seq),
+            last_move=get_rival_move(seq),
+            last_two_moves=last_two_moves,
+            last_move_dict=self.last_move_dict,
+            played_cards=self.played_cards,
+            all_handcards=self.hands,
+            last_pid=self.last_pid,
+            bomb_num=self.bomb_num,
+        )
+
+    def apply(self, action: list[int]) -> None:
+        """Apply a move known to be legal (no validation)."""
+        actor = self.acting_role
+        self.last_move_dict[actor] = list(action)
+        self.card_play_action_seq.append(list(action))
+        if action:
+            hand = self.hands[actor]
+            for card in action:
+                hand.remove(card)
+            self.played_cards[actor].extend(action)
+            self.num_cards_left_dict[actor] -= len(action)
+            if actor == "landlord":
+                for card in action:
+                    if card in self.three_landlord_cards:
+                        self.three_landlord_cards.remove(card)
+            self.last_pid = actor
+            if is_bomb(action):
+                self.bomb_num += 1
+            if not hand:
+                self.winner = "landlord" if actor == "landlord" else "farmer"
+                return
+        self.acting_role = next_role(actor)
+
+
+def _team(role: str) -> str:
+    return "landlord" if role == "landlord" else "farmer"
+
+
+def run_rollouts(
+    registry,
+    state: GameState,
+    deals: list[dict[str, list[int]]],
+    candidates: list[list[int]],
+    deadline: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Play every candidate out under every deal with the greedy models.
+
+    Returns (wins, visits) per candidate for the user's team. Rollouts still
+    running at `deadline` (a `time.time()` value) are discarded.
+    """
+    team = _team(state.user_role)
+    games: list[tuple[int, RolloutGame]] = []
+    for deal in deals:
+        for index, action in enumerate(candidates):
+            game = RolloutGame(state, deal)
+            game.apply(action)
+            games.append((index, game))
+
+    wins = np.zeros(len(candidates))
+    visits = np.zeros(len(candidates))
+    active = games
+    while active:
+        running = []
+        for index, game in active:
+            if game.winner is None:
+                running.append((index, game))
+            else:
+                visits[index] += 1
+                wins[index] += game.winner == team
+        if not running or time.time() >= deadline:
+            break
+        actions = registry.recommend_many([game.infoset() for _, game in running])
+        for (_, game), action in zip(running, actions):
+            game.apply(action)
+        active = running
+    return wins, visits
+
+
+# Registry of a pool worker process, built once by `_init_worker`.
+_worker_registry = None
+
+
+def _init_worker(registry_factory: Callable[[], Any]) -> None:
+    global _worker_registry
+    _worker_registry = registry_factory()
+    preload = getattr(_worker_registry, "preload", None)
+    if preload is not None:
+        preload()
+    torch = getattr(_worker_registry, "torch", None)
+    if torch is not None:
+        # One intra-op thread per worker; the pool provides the parallelism.
+        torch.set_num_threads(1)
+
+
+def _ready() -> bool:
+    return _worker_registry is not None
+
+
+def _rollout_task(state: GameState, deals, candidates, deadline: float) -> tuple[np.ndarray, np.ndarray]:
+    return run_rollouts(_worker_registry, state, deals, candidates, deadline)
+
+
+@dataclass
+class SearchResult:
+    action: list[int]
+    source: str  # "search" or "greedy"
+    rollouts: int = 0
+    elapsed_ms: float = 0.0
+    candidates: list[dict[str, Any]] = field(default_factory=list)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "text": action_to_text(self.action),
+            "source": self.source,
+            "rollouts": self.rollouts,
+            "elapsed_ms": round(self.elapsed_ms, 2),
+            "candidates": self.candidates,
+        }
+
+
+class RolloutSearch:
+    """
+    Anytime rollout search for the user's decision.
+
+    With `workers=0` rollouts run in-process on `registry`. Otherwise a
+    persistent process pool is used; each worker builds its own registry via
+    `registry_factory` (a picklable callable, e.g. `functools.partial(ModelRegistry, ckpt_dir)`),
+    by default a `backend` registry (see `onnx_backend.BACKENDS`) on `registry`'s checkpoints.
+    If the pool breaks, rollouts continue in-process.
+    """
+
+    def __init__(
+        self,
+        registry,
+        registry_factory: Callable[[], Any] | None = None,
+        workers: int = 0,
+        budget_ms: float = DEFAULT_BUDGET_MS,
+        max_candidates: int = MAX_CANDIDATES,
+        deals_per_task: int = DEALS_PER_TASK,
+        seed: int | None = None,
+        backend: str = "torch",
+    ):
+        self.registry = registry
+        self.budget_ms = budget_ms
+        self.max_candidates = max_candidates
+        self.deals_per_task = deals_per_task
+        self.workers = workers
+        self._rng = np.random.default_rng(seed)
+        self._pool = None
+        if workers:
+            if registry_factory is None:
+                from .onnx_backend import registry_class
+
+                registry_factory = functools.partial(registry_class(backend), registry.ckpt_root)
+            self._pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context(),
+                initializer=_init_worker,
+                initargs=(registry_factory,),
+            )
+            # Start workers and build their registries now, not inside the first decision's budget.
+            concurrent.futures.wait([self._pool.submit(_ready) for _ in range(workers)])
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def recommend(self, state: GameState, budget_ms: float | None = None) -> SearchResult:
+        started = time.time()
+        deadline = started + (self.budget_ms if budget_ms is None else budget_ms) / 1000
+        infoset = state.build_infoset_for_user()
+        values = self.registry.action_values(infoset)
+        order = np.argsort(-values, kind="stable")[: self.max_candidates]
+        candidates = [infoset.legal_actions[int(i)] for i in order]
+        greedy = candidates[0]
+        if len(candidates) == 1:
+            return SearchResult(action=greedy, source="greedy")
+
+        model = opponent_hand_model(state)
+        wins = np.zeros(len(candidates))
+        visits = np.zeros(len(candidates))
+        if self._pool is None:
+            while time.time() < deadline:
+                deals = model.sample_hands(self.deals_per_task, self._rng)
+                task_wins, task_visits = run_rollouts(self.registry, state, deals, candidates, deadline)
+                wins += task_wins
+                visits += task_visits
+        else:
+            self._pool_rollouts(state, model, candidates, deadline, wins, visits)
+
+        rates = np.divide(wins, visits, out=np.zeros_like(wins), where=visits > 0)
+        result = SearchResult(
+            action=greedy,
+            source="greedy",
+            rollouts=int(visits.sum()),
+            elapsed_ms=(time.time() - started) * 1000,
+            candidates=[
+                {"text": action_to_text(action), "visits": int(v), "win_rate": round(float(r), 4)}
+                for action, v, r in zip(candidates, visits, rates)
+            ],
+        )
+        eligible = visits >= MIN_VISITS
+        if eligible[0] and eligible.sum() > 1:
+            best = int(np.flatnonzero(eligible)[rates[eligible].argmax()])
+            result.action, result.source = candidates[best], "search"
+        return result
+
+    def _pool_rollouts(self, state, model, candidates, deadline, wins, visits) -> None:
+        def submit():
+            deals = model.sample_hands(self.deals_per_task, self._rng)
+            return self._pool.submit(_rollout_task, state, deals, candidates, deadline)
+
+        try:
+            pending = {submit() for _ in range(self.workers * 2)}
+        except concurrent.futures.BrokenExecutor as exc:
+            self._pool_failed(exc, set())
+            return
+        while pending:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            done, pending = concurrent.futures.wait(
+                pending, timeout=remaining, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                try:
+                    task_wins, task_visits = future.result()
+                except Exception as exc:
+                    self._pool_failed(exc, pending)
+                    return
+                wins += task_wins
+                visits += task_visits
+                if time.time() < deadline:
+                    try:
+                        pending.add(submit())
+                    except concurrent.futures.BrokenExecutor as exc:
+                        self._pool_failed(exc, pending)
+                        return
+        # Tasks still running stop at the shared deadline; queued ones never start.
+        for future in pending:
+            future.cancel()
+
+    def _pool_failed(self, exc: Exception, pending) -> None:
+        """Stop this decision's pool rollouts; the rollouts already counted still rank the candidates."""
+        for future in pending:
+            future.cancel()
+        if isinstance(exc, concurrent.futures.BrokenExecutor):
+            logger.warning("Rollout pool is broken (%s); searching in-process from now on.", exc)
+            self.close()
+        else:
+            logger.warning("Rollout task failed: %s", exc)
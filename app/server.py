@@ -2,24 +2,67 @@
 
 from __future__ import annotations
 
+import hmac
 import logging
+import os
 import sys
 import threading
+import time
 import uuid
 import webbrowser
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
-from flask import Flask, jsonify, render_template, request
+from flask import Flask, jsonify, make_response, render_template, request
+from flask_sock import Sock
 
-from .engine.parser import ParseError, action_to_text, parse_action_payload, parse_hand_payload, validate_cards_not_exceed_deck
+from .engine.endgame import endgame_deals, solve_endgame
+from .engine.inference import InferenceError, opponent_hand_model
+from .engine.parser import ParseError, action_to_text, parse_action_payload
 from .engine.state import GameState, ValidationError
-from .model_bridge import ModelBridgeError, ModelRegistry
+from .http_codec import install as install_http_codec, state_etag
+from .inference_worker import RemoteModelRegistry
+from .log_pipeline import setup_queue_logging
+from .model_bridge import ModelBridgeError, ModelRegistry, ThreadSettings
+from .model_router import PRIMARY, ModelRouter
+from .onnx_backend import registry_class
+from .opening_cache import OpeningCache
+from .replay import build_game_state, parse_action_entry, parse_action_lines, replay_game
+from .search import RolloutSearch
+from .single_flight import SingleFlight
 
 
 HOST = "127.0.0.1"
 PORT = 7860
 
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+LOG_ROTATE_SECONDS = 24 * 60 * 60
+# Keep one in N records for high-volume INFO events; warnings and errors are never sampled.
+LOG_SAMPLE_EVERY = {"state": 20, "games_state": 20}
+
+# Per-decision budget for rollout search on top of the greedy recommendation; 0 disables search.
+SEARCH_BUDGET_MS = float(os.environ.get("DOUZERO_SEARCH_MS", "0"))
+SEARCH_WORKERS = int(os.environ.get("DOUZERO_SEARCH_WORKERS", "0"))
+# "torch" or "onnx" (onnxruntime on exported `<position>.onnx` files; see app/onnx_backend.py).
+MODEL_BACKEND = os.environ.get("DOUZERO_BACKEND", "torch")
+# Separate inference processes fed through shared memory; 0 runs inference in the request threads.
+INFERENCE_WORKERS = int(os.environ.get("DOUZERO_INFERENCE_WORKERS", "0"))
+# DOUZERO_INFERENCE_THREADS / _INTEROP_THREADS / _CPUS; tune with `python -m benchmarks.bench_threads`.
+INFERENCE_THREADS = ThreadSettings.from_env()
+# Score only the heuristic's best N legal actions with the network (0 scores all); see app/engine/prune.py.
+PRUNE_TOP = int(os.environ.get("DOUZERO_PRUNE_TOP", "0")) or None
+# Time allowed for the exact endgame solver, which overrides the network when it proves a win.
+ENDGAME_BUDGET_MS = 50
+# Most games one /api/games/state call may ask for.
+MAX_TABLES = 64
+# A finished recommendation is reused this long for the same game state version.
+RECOMMENDATION_REUSE_SECONDS = 2.0
+# Responses to action/undo POSTs carrying an Idempotency-Key are replayed this long.
+IDEMPOTENCY_TTL_SECONDS = 10 * 60
+# The model admin POST endpoints are disabled unless this token is set; callers send it as a Bearer token.
+ADMIN_TOKEN = os.environ.get("DOUZERO_ADMIN_TOKEN", "")
+
 
 def _is_frozen() -> bool:
     return bool(getattr(sys, "frozen", False))
@@ -42,16 +85,22 @@ def _runtime_root() -> Path:
 
 ROOT_DIR = _bundle_root()
 CKPT_DIR = ROOT_DIR / "douzero_WP"
+# Candidate checkpoint directories must lie under this root.
+CKPT_ROOT = Path(os.environ.get("DOUZERO_CKPT_ROOT", str(ROOT_DIR))).resolve()
 LOG_DIR = _runtime_root() / "logs"
 LOG_DIR.mkdir(parents=True, exist_ok=True)
+OPENING_CACHE_PATH = _runtime_root() / "cache" / "openings.sqlite"
+OPENING_CACHE_MAX_ENTRIES = 100_000
 
 
 def setup_logging() -> None:
-    logfile = LOG_DIR / "app.log"
-    logging.basicConfig(
+    setup_queue_logging(
+        LOG_DIR,
         level=logging.INFO,
-        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-        handlers=[logging.FileHandler(logfile, encoding="utf-8"), logging.StreamHandler()],
+        max_bytes=LOG_MAX_BYTES,
+        backup_count=LOG_BACKUP_COUNT,
+        rotate_seconds=LOG_ROTATE_SECONDS,
+        sample_every=LOG_SAMPLE_EVERY,
     )
 
 
@@ -63,42 +112,203 @@ app = Flask(
     template_folder=str(ROOT_DIR / "app" / "templates"),
     static_folder=str(ROOT_DIR / "app" / "static"),
 )
+install_http_codec(app)
+sock = Sock(app)
+
+
+def _build_registry(ckpt_dir: str | Path, opening_cache: OpeningCache | None) -> ModelRegistry:
+    if INFERENCE_WORKERS > 0:
+        return RemoteModelRegistry(
+            ckpt_dir,
+            workers=INFERENCE_WORKERS,
+            opening_cache=opening_cache,
+            threads=INFERENCE_THREADS,
+            prune_top=PRUNE_TOP,
+            backend=MODEL_BACKEND,
+        )
+    return registry_class(MODEL_BACKEND)(
+        ckpt_dir, opening_cache=opening_cache, threads=INFERENCE_THREADS, prune_top=PRUNE_TOP
+    )
+
 
 sessions: dict[str, GameState] = {}
-models = ModelRegistry(CKPT_DIR)
+models = _build_registry(CKPT_DIR, OpeningCache(OPENING_CACHE_PATH, OPENING_CACHE_MAX_ENTRIES))
+router = ModelRouter(models)
+_searcher: RolloutSearch | None = None
+_searcher_lock = threading.Lock()
+# Keyed on (state object, version): concurrent requests for one position share a computation.
+_recommendations = SingleFlight(ttl=RECOMMENDATION_REUSE_SECONDS)
+# Keyed on (game id, path, Idempotency-Key).
+_idempotent_requests = SingleFlight(ttl=IDEMPOTENCY_TTL_SECONDS)
 
 
 def _json_error(message: str, status: int = 400):
     return jsonify({"ok": False, "error": message}), status
 
 
-def _recommendation_payload(state: GameState) -> tuple[dict[str, Any] | None, str | None]:
-    if not state.need_user_action():
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def _get_searcher() -> RolloutSearch:
+    global _searcher
+    with _searcher_lock:
+        if _searcher is None:
+            _searcher = RolloutSearch(
+                models, workers=SEARCH_WORKERS, budget_ms=SEARCH_BUDGET_MS, backend=MODEL_BACKEND
+            )
+        return _searcher
+
+
+def _session_key(state: GameState) -> str:
+    # Stable for the whole game, so a session never switches model sets mid-game.
+    config = state.config
+    return f"{config.user_role}|{config.initial_my_hand}|{config.initial_three_landlord_cards}"
+
+
+def _endgame_payload(state: GameState, registry: ModelRegistry) -> tuple[dict[str, Any] | None, Any]:
+    """
+    (proven winning move or None, model values of the legal actions or None).
+
+    The network only runs once the position is known to be solvable; when no
+    win is proven its values still answer the greedy recommendation.
+    """
+    if ENDGAME_BUDGET_MS <= 0:
+        return None, None
+    deals = endgame_deals(state)
+    if deals is None:
         return None, None
+    values = None
+    try:
+        values = registry.action_values(state.build_infoset_for_user())
+    except ModelBridgeError:
+        pass  # the solver still runs, with default move ordering
+    result = solve_endgame(state, budget_ms=ENDGAME_BUDGET_MS, values=values, deals=deals)
+    if result is None or result.action is None:
+        return None, values
+    return {"text": action_to_text(result.action), "source": "endgame", "nodes": result.nodes}, values
 
+
+def _recommendation_payload(state: GameState) -> tuple[dict[str, Any] | None, str | None]:
+    return _recommendations.do((state, state.version), lambda: _recommendation_payloads([state])[0])
+
+
+def _recommendation_done(state: GameState, label: str, started: float, payload: dict[str, Any]) -> dict[str, Any]:
+    step = len(state.action_log)
+    payload["model"] = label
+    router.record(label, _elapsed_ms(started), action=parse_action_payload(payload["text"]))
+    logger.info(
+        "Recommendation step=%s action=%s source=%s",
+        step,
+        payload["text"],
+        payload.get("source", "greedy"),
+        extra={"event": "recommend", "step": step, "recommend_ms": _elapsed_ms(started)},
+    )
+    return payload
+
+
+def _recommendation_failed(state: GameState, label: str, started: float, exc: Exception) -> str:
+    """Log a failed recommendation (call from an `except` block); returns the client-facing error."""
+    extra = {"event": "recommend_error", "step": len(state.action_log), "recommend_ms": _elapsed_ms(started)}
+    if isinstance(exc, ModelBridgeError):
+        router.record(label, _elapsed_ms(started), error=True)
+        # Expected when checkpoints/runtime are missing: one line, no traceback.
+        logger.warning("Model recommendation failed: %s", exc, extra=extra)
+        return str(exc)
+    logger.exception("Unexpected recommendation failure: %s", exc, extra=extra)
+    return f"Recommendation failed: {exc}"
+
+
+def _recommendation_payloads(states: list[GameState]) -> list[tuple[dict[str, Any] | None, str | None]]:
+    """
+    (recommendation, error) for each state; (None, None) when it is not the user's turn.
+
+    Endgame solves and rollout searches run per state. Every other state is
+    answered by one `recommend_many` call per routed model set, so games at
+    the same position share a forward pass.
+    """
+    started = time.perf_counter()
+    results: list[tuple[dict[str, Any] | None, str | None]] = [(None, None)] * len(states)
+    greedy: dict[int, tuple[ModelRegistry, list[tuple[int, str]]]] = {}
+    for index, state in enumerate(states):
+        if not state.need_user_action():
+            continue
+        arm, registry = router.route(_session_key(state))
+        label = router.label(arm, registry)
+        try:
+            payload, values = _endgame_payload(state, registry)
+            if payload is None and SEARCH_BUDGET_MS > 0 and arm == PRIMARY:
+                payload = _get_searcher().recommend(state).to_dict()
+            elif payload is None and values is not None:
+                # Unsolved endgame: the solver's move-ordering pass already scored every legal action.
+                payload = {"text": action_to_text(state.legal_actions_for_user()[int(values.argmax())])}
+        except Exception as exc:
+            results[index] = (None, _recommendation_failed(state, label, started, exc))
+            continue
+        if payload is None:
+            greedy.setdefault(id(registry), (registry, []))[1].append((index, label))
+        else:
+            results[index] = (_recommendation_done(state, label, started, payload), None)
+
+    for registry, items in greedy.values():
+        infosets = [states[index].build_infoset_for_user() for index, _ in items]
+        try:
+            actions = registry.recommend_many(infosets) if len(infosets) > 1 else [registry.recommend(infosets[0])]
+        except Exception as exc:
+            for index, label in items:
+                results[index] = (None, _recommendation_failed(states[index], label, started, exc))
+            continue
+        for (index, label), action in zip(items, actions):
+            payload = {"text": action_to_text(action)}
+            results[index] = (_recommendation_done(states[index], label, started, payload), None)
+    return results
+
+
+def _requested_since() -> tuple[int, int] | None:
+    """Client's last known (version, step), from query args on GET or the JSON body otherwise."""
+    if request.method == "GET":
+        return _parse_since(request.args)
+    return _parse_since(request.get_json(force=True, silent=True) or {})
+
+
+def _parse_since(source) -> tuple[int, int] | None:
+    raw_version = source.get("since_version")
+    raw_step = source.get("since_step")
+    if raw_version is None or raw_step is None:
+        return None
     try:
-        infoset = state.build_infoset_for_user()
-        action = models.recommend(infoset)
-        return {"text": action_to_text(action)}, None
-    except ModelBridgeError as exc:
-        logger.exception("Model recommendation failed: %s", exc)
-        return None, str(exc)
-    except Exception as exc:  # pragma: no cover - defensive runtime path
-        logger.exception("Unexpected recommendation failure: %s", exc)
-        return None, f"Recommendation failed: {exc}"
+        return int(raw_version), int(raw_step)
+    except (TypeError, ValueError):
+        return None
 
 
-def _response_with_state(game_id: str, state: GameState):
+def _state_fields(state: GameState) -> dict[str, Any]:
+    """`delta` when the client sent a reconcilable version, otherwise a full `state` snapshot."""
+    return _delta_or_snapshot(state, _requested_since())
+
+
+def _delta_or_snapshot(state: GameState, since: tuple[int, int] | None) -> dict[str, Any]:
+    if since is not None:
+        delta = state.snapshot_delta(*since)
+        if delta is not None:
+            return {"delta": delta}
+    return {"state": state.snapshot()}
+
+
+def _state_payload(game_id: str, state: GameState) -> dict[str, Any]:
     recommendation, recommendation_error = _recommendation_payload(state)
-    payload = {
+    return {
         "ok": True,
         "game_id": game_id,
-        "state": state.snapshot(),
+        **_state_fields(state),
         "need_user_action": state.need_user_action(),
         "recommendation": recommendation,
         "recommendation_error": recommendation_error,
     }
-    return jsonify(payload)
+
+
+def _response_with_state(game_id: str, state: GameState):
+    return jsonify(_state_payload(game_id, state))
 
 
 def _get_game_or_error(game_id: str) -> GameState:
@@ -113,25 +323,30 @@ def index():
     return render_template("index.html")
 
 
+@app.route("/tables", methods=["GET"])
+def tables():
+    return render_template("tables.html")
+
+
 @app.route("/api/game/start", methods=["POST"])
 def start_game():
+    started = time.perf_counter()
     try:
         body = request.get_json(force=True, silent=False) or {}
         role = body.get("role")
-        my_hand = parse_hand_payload(body.get("my_hand"), "my_hand")
-        landlord_cards = parse_hand_payload(body.get("landlord_cards"), "landlord_cards")
         input_mode = str(body.get("input_mode", "text"))
-
-        validate_cards_not_exceed_deck(my_hand, "my_hand")
-        validate_cards_not_exceed_deck(landlord_cards, "landlord_cards")
-        combined = my_hand + landlord_cards
-        validate_cards_not_exceed_deck(combined, "combined known cards")
-
-        state = GameState.create(role, my_hand, landlord_cards)
+        state = build_game_state(role, body.get("my_hand"), body.get("landlord_cards"))
         game_id = uuid.uuid4().hex
         sessions[game_id] = state
-        logger.info("Game started: %s role=%s input_mode=%s", game_id, role, input_mode)
-        return _response_with_state(game_id, state)
+        response = _response_with_state(game_id, state)
+        logger.info(
+            "Game started: %s role=%s input_mode=%s",
+            game_id,
+            role,
+            input_mode,
+            extra={"event": "start", "game_id": game_id, "step": 0, "latency_ms": _elapsed_ms(started)},
+        )
+        return response
     except (ParseError, ValidationError) as exc:
         return _json_error(str(exc), status=400)
     except Exception as exc:  # pragma: no cover
@@ -141,15 +356,139 @@ def start_game():
 
 @app.route("/api/game/<game_id>/state", methods=["GET"])
 def get_state(game_id: str):
+    started = time.perf_counter()
+    try:
+        state = _get_game_or_error(game_id)
+        # The body is fully determined by the state version, the delta request and the
+        # routed model generation, so a matching validator skips snapshot and inference entirely.
+        arm, registry = router.route(_session_key(state))
+        etag = state_etag(game_id, state.version, request.query_string.decode("utf-8"), router.label(arm, registry))
+        if request.if_none_match.contains_weak(etag):
+            response = make_response("", 304)
+            response.set_etag(etag, weak=True)
+            return response
+
+        payload = _state_payload(game_id, state)
+        response = jsonify(payload)
+        if payload["recommendation_error"] is None:
+            response.set_etag(etag, weak=True)
+        logger.info(
+            "State game=%s",
+            game_id,
+            extra={
+                "event": "state",
+                "game_id": game_id,
+                "step": len(state.action_log),
+                "latency_ms": _elapsed_ms(started),
+            },
+        )
+        return response
+    except ValidationError as exc:
+        return _json_error(str(exc), status=404)
+
+
+@app.route("/api/games/state", methods=["POST"])
+def get_games_state():
+    """
+    State and recommendation of several games in one call.
+
+    Body: `{"games": [{"game_id": ..., "since_version": ..., "since_step": ...}, ...]}`
+    (plain id strings are accepted too). Without `games`, or with
+    `"include_active": true`, every other active game follows as a full
+    snapshot. Pending recommendations are computed together, one forward
+    pass per position and model set.
+    """
+    started = time.perf_counter()
+    body = request.get_json(force=True, silent=True) or {}
+    requested = body.get("games")
+    if requested is not None and not isinstance(requested, list):
+        return _json_error("games must be a list.")
+    entries = [entry if isinstance(entry, dict) else {"game_id": entry} for entry in requested or []]
+    if requested is None or body.get("include_active"):
+        listed = {str(entry.get("game_id")) for entry in entries}
+        entries += [{"game_id": game_id} for game_id in list(sessions) if game_id not in listed]
+    if len(entries) > MAX_TABLES:
+        return _json_error(f"At most {MAX_TABLES} games per call.")
+
+    games: list[dict[str, Any]] = []
+    found: list[tuple[dict[str, Any], GameState]] = []
+    for entry in entries:
+        game_id = str(entry.get("game_id"))
+        state = sessions.get(game_id)
+        if state is None:
+            games.append({"ok": False, "game_id": game_id, "error": "Game not found or expired."})
+            continue
+        game = {
+            "ok": True,
+            "game_id": game_id,
+            **_delta_or_snapshot(state, _parse_since(entry)),
+            "need_user_action": state.need_user_action(),
+        }
+        games.append(game)
+        found.append((game, state))
+
+    # Recommendations other requests are computing (or just computed) are shared; the rest run as one batch.
+    results = _recommendations.do_many(
+        [(state, state.version) for _, state in found],
+        lambda keys: _recommendation_payloads([state for state, _ in keys]),
+    )
+    for (game, _), result in zip(found, results):
+        game["recommendation"], game["recommendation_error"] = result
+    logger.info(
+        "Games state count=%s",
+        len(games),
+        extra={"event": "games_state", "latency_ms": _elapsed_ms(started)},
+    )
+    return jsonify({"ok": True, "games": games})
+
+
+@app.route("/api/game/<game_id>/inference", methods=["GET"])
+def get_inference(game_id: str):
+    """Per-rank probabilities of each opponent's holding, given cards left and passes."""
+    started = time.perf_counter()
     try:
         state = _get_game_or_error(game_id)
-        return _response_with_state(game_id, state)
+        model = opponent_hand_model(state)
+        logger.info(
+            "Inference game=%s",
+            game_id,
+            extra={
+                "event": "inference",
+                "game_id": game_id,
+                "step": len(state.action_log),
+                "latency_ms": _elapsed_ms(started),
+            },
+        )
+        return jsonify({"ok": True, "game_id": game_id, "version": state.version, "inference": model.to_dict()})
     except ValidationError as exc:
         return _json_error(str(exc), status=404)
+    except InferenceError as exc:
+        return _json_error(str(exc), status=409)
+
+
+def _idempotent(game_id: str, handler: Callable[[str], tuple[dict[str, Any], int]]):
+    """
+    `handler(game_id)` as a JSON response, run once per `Idempotency-Key` header value.
+
+    A repeated key (a double-click or a retry after a timeout) gets the first
+    request's response, waiting for it if it is still running, instead of
+    applying the change and running inference again.
+    """
+    key = request.headers.get("Idempotency-Key")
+    if key:
+        payload, status = _idempotent_requests.do((game_id, request.path, key), lambda: handler(game_id))
+    else:
+        payload, status = handler(game_id)
+    return jsonify(payload), status
 
 
 @app.route("/api/game/<game_id>/action", methods=["POST"])
 def submit_action(game_id: str):
+    return _idempotent(game_id, _apply_action_request)
+
+
+def _apply_action_request(game_id: str) -> tuple[dict[str, Any], int]:
+    started = time.perf_counter()
     source_mode = "text"
     raw_action: Any = None
     try:
@@ -159,14 +498,26 @@ def submit_action(game_id: str):
         raw_action = body.get("action")
         action = parse_action_payload(raw_action)
         state.apply_action(action)
+        actor = state.action_log[-1].actor if state.action_log else "n/a"
+        action_text = action_to_text(action)
+        payload = _state_payload(game_id, state)
         logger.info(
             "Action game=%s actor=%s action=%s source_mode=%s",
             game_id,
-            state.action_log[-1]["actor"] if state.action_log else "n/a",
-            action_to_text(action),
+            actor,
+            action_text,
             source_mode,
+            extra={
+                "event": "action",
+                "game_id": game_id,
+                "step": len(state.action_log),
+                "actor": actor,
+                "action": action_text,
+                "source_mode": source_mode,
+                "latency_ms": _elapsed_ms(started),
+            },
         )
-        return _response_with_state(game_id, state)
+        return payload, 200
     except (ParseError, ValidationError) as exc:
         state = sessions.get(game_id)
         recommendation, recommendation_error = _recommendation_payload(state) if state is not None else (None, None)
@@ -176,32 +527,293 @@ def submit_action(game_id: str):
             source_mode,
             raw_action,
             exc,
+            extra={
+                "event": "invalid_action",
+                "game_id": game_id,
+                "step": len(state.action_log) if state is not None else None,
+                "source_mode": source_mode,
+                "latency_ms": _elapsed_ms(started),
+            },
         )
         response = {
             "ok": False,
             "validation_error": str(exc),
-            "state": state.snapshot() if state else None,
+            **(_state_fields(state) if state else {"state": None}),
             "recommendation": recommendation,
             "recommendation_error": recommendation_error,
         }
-        return jsonify(response), 400
+        return response, 400
     except Exception as exc:  # pragma: no cover
-        logger.exception("Failed to apply action game=%s: %s", game_id, exc)
-        return _json_error(f"Failed to apply action: {exc}", status=500)
+        logger.exception("Failed to apply action game=%s: %s", game_id, exc, extra={"game_id": game_id})
+        return {"ok": False, "error": f"Failed to apply action: {exc}"}, 500
 
 
 @app.route("/api/game/<game_id>/undo", methods=["POST"])
 def undo_action(game_id: str):
+    return _idempotent(game_id, _apply_undo_request)
+
+
+def _apply_undo_request(game_id: str) -> tuple[dict[str, Any], int]:
+    started = time.perf_counter()
     try:
         state = _get_game_or_error(game_id)
         state.undo()
-        logger.info("Undo game=%s", game_id)
-        return _response_with_state(game_id, state)
+        payload = _state_payload(game_id, state)
+        logger.info(
+            "Undo game=%s",
+            game_id,
+            extra={
+                "event": "undo",
+                "game_id": game_id,
+                "step": len(state.action_log),
+                "latency_ms": _elapsed_ms(started),
+            },
+        )
+        return payload, 200
     except ValidationError as exc:
+        return {"ok": False, "error": str(exc)}, 400
+    except Exception as exc:  # pragma: no cover
+        logger.exception("Failed to undo game=%s: %s", game_id, exc, extra={"game_id": game_id})
+        return {"ok": False, "error": f"Failed to undo: {exc}"}, 500
+
+
+def _socket_send(ws, payload: dict[str, Any]) -> None:
+    ws.send(app.json.dumps(payload))
+
+
+def _push_state(
+    ws, game_id: str, state: GameState, seen: tuple[int, int] | None, recommendation_pending: bool = True
+) -> tuple[int, int]:
+    """Send a delta from what this socket last received (`seen`), else a snapshot; returns the new `seen`."""
+    _socket_send(
+        ws,
+        {
+            "type": "state",
+            "game_id": game_id,
+            **_delta_or_snapshot(state, seen),
+            "need_user_action": state.need_user_action(),
+            "recommendation_pending": recommendation_pending,
+        },
+    )
+    return state.version, len(state.action_log)
+
+
+def _push_recommendation(ws, state: GameState) -> None:
+    recommendation, recommendation_error = _recommendation_payload(state)
+    _socket_send(
+        ws,
+        {
+            "type": "recommendation",
+            "version": state.version,
+            "recommendation": recommendation,
+            "recommendation_error": recommendation_error,
+        },
+    )
+
+
+def _apply_socket_message(ws, game_id: str, state: GameState, message: str) -> bool:
+    """Apply one client message to `state`; returns whether it changed. Invalid input is answered with an error."""
+    started = time.perf_counter()
+    try:
+        body = app.json.loads(message)
+        if not isinstance(body, dict):
+            raise ValidationError("Message must be a JSON object.")
+        kind = body.get("type")
+        if kind == "action":
+            source_mode = str(body.get("source_mode", "text"))
+            action = parse_action_payload(body.get("action"))
+            state.apply_action(action)
+            actor = state.action_log[-1].actor if state.action_log else "n/a"
+            logger.info(
+                "Action game=%s actor=%s action=%s source_mode=%s transport=ws",
+                game_id,
+                actor,
+                action_to_text(action),
+                source_mode,
+                extra={
+                    "event": "action",
+                    "game_id": game_id,
+                    "step": len(state.action_log),
+                    "actor": actor,
+                    "action": action_to_text(action),
+                    "source_mode": source_mode,
+                    "latency_ms": _elapsed_ms(started),
+                },
+            )
+        elif kind == "undo":
+            state.undo()
+            logger.info(
+                "Undo game=%s transport=ws",
+                game_id,
+                extra={
+                    "event": "undo",
+                    "game_id": game_id,
+                    "step": len(state.action_log),
+                    "latency_ms": _elapsed_ms(started),
+                },
+            )
+        else:
+            raise ValidationError(f"Unknown message type: {kind!r}")
+        return True
+    except ValueError as exc:  # ParseError, ValidationError and malformed JSON
+        logger.warning(
+            "Invalid socket message game=%s message=%r error=%s",
+            game_id,
+            message,
+            exc,
+            extra={"event": "invalid_action", "game_id": game_id, "step": len(state.action_log)},
+        )
+        _socket_send(ws, {"type": "error", "validation_error": str(exc)})
+        return False
+
+
+@sock.route("/api/game/<game_id>/ws")
+def game_socket(ws, game_id: str):
+    """
+    Live channel for one game, replacing a POST per action.
+
+    Clients send `{"type": "action", "action": ..., "source_mode": ...}` or
+    `{"type": "undo"}`. Every change is answered at once with a `state`
+    message (a delta from what this socket last received), then with a
+    `recommendation` message once the model has one. A recommendation that
+    already-queued messages would make stale is skipped. A client that
+    connects with `since_version`/`since_step` query args (as on the HTTP
+    endpoints) first gets a delta, and no recommendation if it is current.
+    """
+    state = sessions.get(game_id)
+    if state is None:
+        _socket_send(ws, {"type": "error", "error": "Game not found or expired."})
+        return
+    since = _requested_since()
+    stale = since is None or since[0] != state.version
+    seen = _push_state(ws, game_id, state, since, recommendation_pending=stale)
+    while True:
+        message = ws.receive(timeout=0) if stale else ws.receive()
+        if message is None:
+            _push_recommendation(ws, state)
+            stale = False
+        elif _apply_socket_message(ws, game_id, state, message):
+            seen = _push_state(ws, game_id, state, seen)
+            stale = True
+
+
+@app.route("/api/replay", methods=["POST"])
+def replay():
+    """
+    Validate a recorded game in one pass and compare recommendations with actual play.
+
+    Body: role/my_hand/landlord_cards as for /api/game/start, plus either
+    `actions` (list of entries) or `actions_text` (text or JSON lines).
+    """
+    started = time.perf_counter()
+    try:
+        body = request.get_json(force=True, silent=False) or {}
+        state = build_game_state(body.get("role"), body.get("my_hand"), body.get("landlord_cards"))
+        if "actions_text" in body:
+            actions = parse_action_lines(str(body["actions_text"]))
+        else:
+            raw_actions = body.get("actions") or []
+            if not isinstance(raw_actions, list):
+                raise ParseError("actions must be a list.")
+            actions = [parse_action_entry(entry) for entry in raw_actions]
+
+        report = replay_game(state, actions, models if body.get("recommend", True) else None)
+        summary = report.summary()
+        logger.info(
+            "Replay steps=%s decisions=%s agreement=%s",
+            summary["steps"],
+            summary["decisions"],
+            summary["agreement"],
+            extra={"event": "replay", "step": summary["steps"], "latency_ms": _elapsed_ms(started)},
+        )
+        if report.error:
+            return jsonify({"ok": False, "validation_error": report.error, "report": report.to_dict()}), 400
+        return jsonify({"ok": True, "report": report.to_dict()})
+    except (ParseError, ValidationError) as exc:
         return _json_error(str(exc), status=400)
     except Exception as exc:  # pragma: no cover
-        logger.exception("Failed to undo game=%s: %s", game_id, exc)
-        return _json_error(f"Failed to undo: {exc}", status=500)
+        logger.exception("Failed to replay game: %s", exc)
+        return _json_error(f"Failed to replay game: {exc}", status=500)
+
+
+@app.route("/api/admin/models", methods=["GET"])
+def model_status():
+    return jsonify({"ok": True, **router.status()})
+
+
+def _admin_request_error():
+    """An error response unless this is an authorized JSON request to a model admin endpoint."""
+    if not ADMIN_TOKEN:
+        return _json_error("Model admin endpoints are disabled; set DOUZERO_ADMIN_TOKEN to enable them.", status=403)
+    supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+    if not hmac.compare_digest(supplied.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        return _json_error("Invalid admin token.", status=401)
+    # A cross-site form or text/plain POST cannot set this content type without a CORS preflight.
+    if not request.is_json:
+        return _json_error("Content-Type must be application/json.", status=415)
+    return None
+
+
+def _candidate_dir(raw: Any) -> Path:
+    """`raw` resolved against CKPT_ROOT; it must name an existing directory under it."""
+    path = (CKPT_ROOT / str(raw)).resolve()
+    if not path.is_relative_to(CKPT_ROOT):
+        raise ValueError(f"Checkpoint directory must be under {CKPT_ROOT}.")
+    if not path.is_dir():
+        raise ValueError(f"Checkpoint directory not found: {raw}")
+    return path
+
+
+@app.route("/api/admin/models/reload", methods=["POST"])
+def reload_models():
+    """
+    Load new checkpoints for an arm and swap them in without blocking inference.
+
+    Body: {"arm": "primary" | "candidate", "wait": false}. With `wait` the
+    response reports the new version or the load error.
+    """
+    error = _admin_request_error()
+    if error is not None:
+        return error
+    body = request.get_json(silent=True) or {}
+    arm = body.get("arm", PRIMARY)
+    registry = router.primary if arm == PRIMARY else router.candidate
+    if registry is None:
+        return _json_error(f"No {arm} model set configured.", status=400)
+    if not body.get("wait"):
+        registry.reload_async()
+        return jsonify({"ok": True, "arm": arm, "reloading": True}), 202
+    try:
+        version = registry.reload()
+    except ModelBridgeError as exc:
+        return _json_error(str(exc), status=500)
+    logger.info("Models reloaded arm=%s version=%s", arm, version, extra={"event": "reload"})
+    return jsonify({"ok": True, "arm": arm, "version": version})
+
+
+@app.route("/api/admin/models/candidate", methods=["POST"])
+def set_candidate_models():
+    """Body: {"ckpt_dir": "...", "percent": 10}; a null `ckpt_dir` stops the trial. Paths are relative to CKPT_ROOT."""
+    error = _admin_request_error()
+    if error is not None:
+        return error
+    body = request.get_json(silent=True) or {}
+    ckpt_dir = body.get("ckpt_dir")
+    previous = router.candidate
+    try:
+        percent = float(body.get("percent", 0))
+        if ckpt_dir is None:
+            router.set_candidate(None, 0.0)
+        else:
+            candidate = _build_registry(_candidate_dir(ckpt_dir), models.opening_cache)
+            router.set_candidate(candidate, percent)
+            candidate.watch()
+    except (TypeError, ValueError) as exc:
+        return _json_error(str(exc), status=400)
+    if previous is not None and previous is not router.candidate:
+        previous.close()
+    logger.info("Candidate models=%s percent=%s", ckpt_dir, percent, extra={"event": "route"})
+    return jsonify({"ok": True, **router.status()})
 
 
 def run_server(auto_open_browser: bool = False) -> None:
@@ -215,6 +827,9 @@ def run_server(auto_open_browser: bool = False) -> None:
         timer.daemon = True
         timer.start()
 
+    if INFERENCE_WORKERS > 0:
+        models.preload()  # start the inference processes before the first request
+    models.watch()
     logger.info("Starting server on http://%s:%s", HOST, PORT)
     app.run(host=HOST, port=PORT, debug=False)
 
@@ -0,0 +1,112 @@
+"""
+Single-flight execution: concurrent calls with the same key share one run.
+
+The first caller for a key runs the function; callers arriving while it runs
+wait for and receive the same result (or exception). With `ttl`, a finished
+result is also replayed to callers with that key for `ttl` seconds, which
+covers retries that arrive just after the original finished. Exceptions are
+never retained. `do_many` does the same for a batch of keys, computing the
+ones nobody else is computing in a single call.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Hashable
+
+
+@dataclass
+class _Call:
+    done: threading.Event = field(default_factory=threading.Event)
+    result: Any = None
+    error: BaseException | None = None
+    expires: float = 0.0
+
+
+class SingleFlight:
+    def __init__(self, ttl: float = 0.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """`fn()`, unless a call with `key` is in flight (or retained), whose result is returned instead."""
+        return self.do_many([key], lambda _keys: [fn()])[0]
+
+    def do_many(self, keys: list[Hashable], fn: Callable[[list[Hashable]], list[Any]]) -> list[Any]:
+        """
+        One result per key, as `do` would return it.
+
+        Keys with a call in flight (or retained) share that call's result; the
+        rest are marked in flight and computed together by `fn(leading_keys)`,
+        which returns their results in order.
+        """
+        now = time.monotonic()
+        calls: list[_Call] = []
+        leading: list[tuple[Hashable, _Call]] = []
+        with self._lock:
+            self._drop_expired(now)
+            for key in keys:
+                call = self._calls.get(key)
+                if call is None:
+                    call = self._calls[key] = _Call()
+                    leading.append((key, call))
+                calls.append(call)
+
+        if leading:
+            try:
+                results = fn([key for key, _ in leading])
+                for (_, call), result in zip(leading, results, strict=True):
+                    call.result = result
+            except BaseException as exc:
+                for _, call in leading:
+                    call.error = exc
+                raise
+            finally:
+                self._finish(leading)
+
+        for call in calls:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+        return [call.result for call in calls]
+
+    def _finish(self, leading: list[tuple[Hashable, _Call]]) -> None:
+        with self._lock:
+            expires = time.monotonic() + self.ttl
+            for key, call in leading:
+                if call.error is None and self.ttl > 0:
+                    call.expires = expires
+                else:
+                    del self._calls[key]
+        for _, call in leading:
+            call.done.set()
+
+    def cached(self, key: Hashable, default: Any = None) -> Any:
+        """The retained result for `key`, else `default`; never waits for a call in flight."""
+        with self._lock:
+            self._drop_expired(time.monotonic())
+            call = self._calls.get(key)
+            return call.result if call is not None and call.done.is_set() else default
+
+    def put(self, key: Hashable, result: Any) -> None:
+        """Retain `result` for `key` as if a call had just finished (no-op without `ttl`)."""
+        if self.ttl <= 0:
+            return
+        call = _Call(result=result, expires=time.monotonic() + self.ttl)
+        call.done.set()
+        with self._lock:
+            existing = self._calls.get(key)
+            if existing is None or existing.done.is_set():
+                self._calls[key] = call
+
+    def _drop_expired(self, now: float) -> None:
+        expired = [key for key, call in self._calls.items() if call.done.is_set() and call.expires <= now]
+        for key in expired:
+            del self._calls[key]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._calls)
@@ -17,6 +17,8 @@ const ERROR_TEXT_MAP = [
 let gameId = null;
 let currentState = null;
 let currentRecommendation = null;
+let socket = null;
+let pendingSocketRequest = null;
 const clickCounts = Object.fromEntries(RANKS.map((rank) => [rank, 0]));
 
 const messageBox = document.getElementById("message-box");
@@ -57,9 +59,10 @@ function setMessage(message) {
 }
 
 async function fetchJson(url, options = {}) {
+  const { headers = {}, ...rest } = options;
   const response = await fetch(url, {
-    headers: { "Content-Type": "application/json" },
-    ...options,
+    headers: { "Content-Type": "application/json", ...headers },
+    ...rest,
   });
   const data = await response.json();
   if (!response.ok || data.ok === false) {
@@ -142,13 +145,57 @@ function buildRankGrid() {
   }
 }
 
+// Same key for the same change to the same state version, so double-clicks and retries apply once.
+function idempotencyHeaders(change) {
+  const version = currentState ? currentState.version : "";
+  return { "Idempotency-Key": `${gameId}:${version}:${encodeURIComponent(JSON.stringify(change))}` };
+}
+
+function sinceFields() {
+  if (!currentState) {
+    return {};
+  }
+  return { since_version: currentState.version, since_step: currentState.action_log.length };
+}
+
+function applyStateDelta(delta) {
+  const { base_step: baseStep, new_actions: newActions, ...fields } = delta;
+  const keep = Math.min(baseStep, currentState.action_log.length);
+  return {
+    ...currentState,
+    ...fields,
+    action_log: currentState.action_log.slice(0, keep).concat(newActions),
+    card_play_action_seq_text: currentState.card_play_action_seq_text
+      .slice(0, keep)
+      .concat(newActions.map((item) => item.text)),
+  };
+}
+
+function resolveEnvelopeState(envelope) {
+  if (envelope.delta && currentState) {
+    return applyStateDelta(envelope.delta);
+  }
+  return envelope.state;
+}
+
+function renderRecommendation(recommendation, recommendationError, placeholder = "-") {
+  currentRecommendation = recommendation ? recommendation.text : null;
+  const text = document.getElementById("recommend-text");
+  if (recommendation) {
+    text.textContent = recommendation.text;
+  } else if (recommendationError) {
+    text.textContent = localizeText(recommendationError, "推荐暂不可用");
+  } else {
+    text.textContent = placeholder;
+  }
+  const recommendBtn = document.getElementById("use-recommend-btn");
+  recommendBtn.disabled = !(currentState && currentState.need_user_action && currentRecommendation);
+}
+
 function renderStateEnvelope(envelope, options = {}) {
   const preserveMessage = Boolean(options.preserveMessage);
-  const state = envelope.state;
+  const state = resolveEnvelopeState(envelope);
   currentState = state;
-  if (Object.prototype.hasOwnProperty.call(envelope, "recommendation")) {
-    currentRecommendation = envelope.recommendation ? envelope.recommendation.text : null;
-  }
 
   gameCard.classList.remove("hidden");
   document.getElementById("acting-role").textContent = toRoleLabel(state.acting_role);
@@ -160,17 +207,15 @@ function renderStateEnvelope(envelope, options = {}) {
   document.getElementById("left-landlord-down").textContent = String(state.num_cards_left_dict.landlord_down);
   document.getElementById("left-landlord-up").textContent = String(state.num_cards_left_dict.landlord_up);
 
-  if (envelope.recommendation) {
-    document.getElementById("recommend-text").textContent = envelope.recommendation.text;
-  } else if (envelope.recommendation_error) {
-    document.getElementById("recommend-text").textContent = localizeText(envelope.recommendation_error, "推荐暂不可用");
+  if (Object.prototype.hasOwnProperty.call(envelope, "recommendation")) {
+    renderRecommendation(envelope.recommendation, envelope.recommendation_error);
+  } else if (envelope.recommendation_pending) {
+    // Socket state updates: the recommendation follows in its own message.
+    renderRecommendation(null, null, state.need_user_action ? "…" : "-");
   } else {
-    document.getElementById("recommend-text").textContent = "-";
+    renderRecommendation(currentRecommendation ? { text: currentRecommendation } : null, null);
   }
 
-  const recommendBtn = document.getElementById("use-recommend-btn");
-  recommendBtn.disabled = !(state.need_user_action && currentRecommendation);
-
   historyList.innerHTML = "";
   for (const item of state.action_log) {
     const li = document.createElement("li");
@@ -194,29 +239,92 @@ function renderStateEnvelope(envelope, options = {}) {
   }
 }
 
+function socketReady() {
+  return socket !== null && socket.readyState === WebSocket.OPEN;
+}
+
+function closeSocket() {
+  if (socket) {
+    socket.close();
+    socket = null;
+  }
+  pendingSocketRequest = null;
+}
+
+function handleSocketMessage(message) {
+  if (message.type === "state") {
+    renderStateEnvelope(message);
+    if (pendingSocketRequest === "action") {
+      actionTextInput.value = "";
+      resetClickCounts();
+    }
+    pendingSocketRequest = null;
+  } else if (message.type === "recommendation") {
+    if (currentState && message.version === currentState.version) {
+      renderRecommendation(message.recommendation, message.recommendation_error);
+    }
+  } else if (message.type === "error") {
+    const detail = localizeText(message.validation_error || message.error);
+    if (pendingSocketRequest === "undo") {
+      setMessage(detail ? `撤销失败：${detail}` : "撤销失败，请稍后重试。");
+    } else {
+      setMessage(detail ? `动作不合法：${detail}` : "动作不合法，请检查后重试。");
+    }
+    pendingSocketRequest = null;
+  }
+}
+
+// Live channel for the current game; actions and undo fall back to fetch while it is not open.
+function openSocket() {
+  closeSocket();
+  if (!("WebSocket" in window)) {
+    return;
+  }
+  const scheme = window.location.protocol === "https:" ? "wss" : "ws";
+  const query = new URLSearchParams(sinceFields()).toString();
+  const ws = new WebSocket(`${scheme}://${window.location.host}/api/game/${gameId}/ws?${query}`);
+  ws.addEventListener("message", (event) => handleSocketMessage(JSON.parse(event.data)));
+  ws.addEventListener("close", () => {
+    if (socket === ws) {
+      socket = null;
+    }
+  });
+  socket = ws;
+}
+
+function sendSocketRequest(kind, fields = {}) {
+  pendingSocketRequest = kind;
+  socket.send(JSON.stringify({ type: kind, ...fields }));
+}
+
 async function postAction(action, sourceMode) {
   if (!gameId) {
     setMessage("请先开始对局。");
     return;
   }
+  if (socketReady()) {
+    sendSocketRequest("action", { action, source_mode: sourceMode });
+    return;
+  }
   try {
     const data = await fetchJson(`/api/game/${gameId}/action`, {
       method: "POST",
-      body: JSON.stringify({ action, source_mode: sourceMode }),
+      headers: idempotencyHeaders(action),
+      body: JSON.stringify({ action, source_mode: sourceMode, ...sinceFields() }),
     });
     renderStateEnvelope(data);
     actionTextInput.value = "";
     resetClickCounts();
   } catch (err) {
     if (err && err.validation_error) {
-      if (err.state) {
+      if (err.state || err.delta) {
         renderStateEnvelope({
           ok: true,
           game_id: gameId,
           state: err.state,
+          delta: err.delta,
           recommendation: err.recommendation,
           recommendation_error: err.recommendation_error,
-          need_user_action: err.state.need_user_action,
         }, { preserveMessage: true });
       }
       const detail = localizeText(err.validation_error);
@@ -243,6 +351,7 @@ startForm.addEventListener("submit", async (event) => {
     gameId = data.game_id;
     setupCard.classList.add("hidden");
     renderStateEnvelope(data);
+    openSocket();
   } catch (err) {
     const detail = localizeText(err && err.error);
     setMessage(detail ? `开局失败：${detail}` : "开局失败，请检查输入后重试。");
@@ -283,10 +392,15 @@ document.getElementById("undo-btn").addEventListener("click", async () => {
     setMessage("请先开始对局。");
     return;
   }
+  if (socketReady()) {
+    sendSocketRequest("undo");
+    return;
+  }
   try {
     const data = await fetchJson(`/api/game/${gameId}/undo`, {
       method: "POST",
-      body: JSON.stringify({}),
+      headers: idempotencyHeaders("undo"),
+      body: JSON.stringify(sinceFields()),
     });
     renderStateEnvelope(data);
   } catch (err) {
@@ -296,6 +410,7 @@ document.getElementById("undo-btn").addEventListener("click", async () => {
 });
 
 document.getElementById("restart-config-btn").addEventListener("click", () => {
+  closeSocket();
   gameId = null;
   currentState = null;
   currentRecommendation = null;
@@ -0,0 +1,149 @@
+const POLL_MS = 1500;
+const ROLE_LABELS = {
+  landlord: "地主",
+  landlord_down: "下家农民",
+  landlord_up: "上家农民",
+};
+
+// Tracked game ids; null follows every active game on the server.
+let trackedIds = null;
+// game_id -> last rendered state, so each poll only asks for a delta.
+const tables = new Map();
+
+const grid = document.getElementById("tables-grid");
+const messageBox = document.getElementById("message-box");
+
+function toRoleLabel(role) {
+  return ROLE_LABELS[role] || role || "-";
+}
+
+function applyStateDelta(current, delta) {
+  const { base_step: baseStep, new_actions: newActions, ...fields } = delta;
+  const keep = Math.min(baseStep, current.action_log.length);
+  return {
+    ...current,
+    ...fields,
+    action_log: current.action_log.slice(0, keep).concat(newActions),
+    card_play_action_seq_text: current.card_play_action_seq_text
+      .slice(0, keep)
+      .concat(newActions.map((item) => item.text)),
+  };
+}
+
+function requestedGames() {
+  const ids = trackedIds || [...tables.keys()];
+  return ids.map((gameId) => {
+    const table = tables.get(gameId);
+    if (!table) {
+      return gameId;
+    }
+    return { game_id: gameId, since_version: table.state.version, since_step: table.state.action_log.length };
+  });
+}
+
+function recommendationText(game) {
+  if (game.recommendation) {
+    return game.recommendation.text;
+  }
+  if (game.recommendation_error) {
+    return "推荐暂不可用";
+  }
+  return game.need_user_action ? "…" : "-";
+}
+
+function renderTable(gameId, table) {
+  const { state } = table;
+  const card = document.createElement("article");
+  card.className = "table-card";
+  card.classList.toggle("table-waiting", state.need_user_action);
+  const last = state.action_log.length ? state.action_log[state.action_log.length - 1] : null;
+  const status = state.game_over ? `结束，胜方：${toRoleLabel(state.winner)}` : `轮到：${toRoleLabel(state.acting_role)}`;
+  const rows = [
+    ["对局", gameId.slice(0, 8)],
+    ["身份", toRoleLabel(state.user_role)],
+    ["状态", status],
+    ["手牌", state.my_hand_text],
+    [
+      "剩余",
+      `地主 ${state.num_cards_left_dict.landlord} / 下家 ${state.num_cards_left_dict.landlord_down} / 上家 ${state.num_cards_left_dict.landlord_up}`,
+    ],
+    ["上一手", last ? `${toRoleLabel(last.actor)}：${last.text}` : "-"],
+    ["推荐", table.recommendation],
+  ];
+  for (const [label, value] of rows) {
+    const row = document.createElement("div");
+    const name = document.createElement("strong");
+    name.textContent = `${label}: `;
+    const text = document.createElement("span");
+    text.textContent = value;
+    row.appendChild(name);
+    row.appendChild(text);
+    card.appendChild(row);
+  }
+  return card;
+}
+
+function render(missing) {
+  grid.innerHTML = "";
+  for (const [gameId, table] of tables) {
+    grid.appendChild(renderTable(gameId, table));
+  }
+  const waiting = [...tables.values()].filter((table) => table.state.need_user_action).length;
+  const parts = [`${tables.size} 桌，${waiting} 桌等待出牌`];
+  if (missing.length) {
+    parts.push(`不存在或已过期：${missing.join(", ")}`);
+  }
+  messageBox.textContent = parts.join("\n");
+}
+
+async function poll() {
+  const body = { games: requestedGames(), include_active: trackedIds === null };
+  const response = await fetch("/api/games/state", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(body),
+  });
+  const data = await response.json();
+  if (!response.ok || data.ok === false) {
+    throw data;
+  }
+  const missing = [];
+  for (const game of data.games) {
+    if (!game.ok) {
+      tables.delete(game.game_id);
+      missing.push(game.game_id);
+      continue;
+    }
+    const previous = tables.get(game.game_id);
+    const state = game.delta && previous ? applyStateDelta(previous.state, game.delta) : game.state;
+    tables.set(game.game_id, {
+      state: { ...state, need_user_action: game.need_user_action },
+      recommendation: recommendationText(game),
+    });
+  }
+  return trackedIds === null ? [] : missing;
+}
+
+async function refresh() {
+  if (document.visibilityState === "visible") {
+    try {
+      render(await poll());
+    } catch (err) {
+      messageBox.textContent = `刷新失败：${(err && err.error) || "请稍后重试。"}`;
+    }
+  }
+  window.setTimeout(refresh, POLL_MS);
+}
+
+document.getElementById("track-form").addEventListener("submit", (event) => {
+  event.preventDefault();
+  const ids = document
+    .getElementById("track-input")
+    .value.split(/[\s,]+/)
+    .filter(Boolean);
+  trackedIds = ids.length ? ids : null;
+  tables.clear();
+  grid.innerHTML = "";
+});
+
+refresh();
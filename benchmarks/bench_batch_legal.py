@@ -0,0 +1,51 @@
+"""Batched legal-action masks versus per-hand get_legal_actions."""
+
+from __future__ import annotations
+
+import random
+import time
+
+import numpy as np
+
+from app.engine.batch import NUM_MOVES, legal_action_masks, rival_descriptor
+from app.engine.parser import DECK_COUNTER, cards_to_counts
+from app.engine.rules import get_legal_actions
+
+SIZES = [100, 1000, 5000]
+
+
+def _cases(count: int, seed: int = 3):
+    rng = random.Random(seed)
+    deck = sorted(DECK_COUNTER.elements())
+    cases = []
+    for _ in range(count):
+        rng.shuffle(deck)
+        hand = sorted(deck[: rng.choice([5, 10, 17, 20])])
+        rival = [] if rng.random() < 0.3 else rng.choice(get_legal_actions(sorted(deck[20:37]), []))
+        cases.append((hand, rival))
+    return cases
+
+
+def main() -> None:
+    print(f"global move table: {NUM_MOVES} moves")
+    print(f"{'pairs':>6} {'loop ms':>10} {'batch ms':>10} {'describe ms':>12}")
+    for size in SIZES:
+        cases = _cases(size)
+        started = time.perf_counter()
+        for hand, rival in cases:
+            get_legal_actions(hand, [rival] if rival else [])
+        loop_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        hands = np.array([cards_to_counts(hand) for hand, _ in cases])
+        rivals = np.array([rival_descriptor(rival) for _, rival in cases])
+        describe_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        legal_action_masks(hands, rivals)
+        batch_ms = (time.perf_counter() - started) * 1000
+        print(f"{size:>6} {loop_ms:>10.1f} {batch_ms:>10.1f} {describe_ms:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Per-worker memory after loading all three models: copying loader versus memory-mapped weights."""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import tempfile
+from pathlib import Path
+
+from .common import random_checkpoints
+
+WORKERS = 4
+
+
+def _memory_kb() -> dict[str, int]:
+    """RSS from /proc/self/status; PSS and private pages from smaps_rollup (Linux only)."""
+    values = {}
+    with open("/proc/self/status", encoding="ascii") as handle:
+        for line in handle:
+            if line.startswith("VmRSS:"):
+                values["rss"] = int(line.split()[1])
+    with open("/proc/self/smaps_rollup", encoding="ascii") as handle:
+        for line in handle:
+            name, _, rest = line.partition(":")
+            if name in {"Pss", "Private_Clean", "Private_Dirty"}:
+                values[name] = int(rest.split()[0])
+    values["private"] = values.pop("Private_Clean", 0) + values.pop("Private_Dirty", 0)
+    values["pss"] = values.pop("Pss", 0)
+    return values
+
+
+def _copying_load(torch, model_cls, ckpt: Path):
+    # The loader this replaced: full torch.load, filter, copy into a fresh module.
+    model = model_cls()
+    model_state_dict = model.state_dict()
+    pretrained = torch.load(str(ckpt), map_location="cpu")
+    model_state_dict.update({key: value for key, value in pretrained.items() if key in model_state_dict})
+    model.load_state_dict(model_state_dict)
+    return model.eval()
+
+
+def _worker(mode: str, ckpt_dir: str, ready, release, results) -> None:
+    import torch
+
+    from app.checkpoints import load_model
+    from app.model_defs import model_dict
+
+    before = _memory_kb()
+    loader = _copying_load if mode == "copy" else load_model
+    models = [loader(torch, model_cls, Path(ckpt_dir) / f"{position}.ckpt") for position, model_cls in model_dict.items()]
+    with torch.no_grad():
+        for model, width in zip(models, (373, 484, 484)):
+            model.forward(torch.zeros(1, 5, 162), torch.zeros(1, width), return_value=True)
+    ready.wait()  # every worker holds its models while memory is read
+    after = _memory_kb()
+    results.put({key: after[key] - before[key] for key in after})
+    release.wait()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ckpt-dir", help="Real checkpoints; random weights are used when omitted.")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    args = parser.parse_args(argv)
+
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        ckpt_dir = str(args.ckpt_dir or random_checkpoints(tmp))
+        print(f"{'loader':>6} {'rss MB':>8} {'pss MB':>8} {'private MB':>11}  (mean increase per worker)")
+        for mode in ("copy", "mmap"):
+            ready, release = ctx.Barrier(args.workers + 1), ctx.Barrier(args.workers + 1)
+            results = ctx.Queue()
+            procs = [ctx.Process(target=_worker, args=(mode, ckpt_dir, ready, release, results)) for _ in range(args.workers)]
+            for proc in procs:
+                proc.start()
+            ready.wait()
+            rows = [results.get() for _ in procs]
+            release.wait()
+            for proc in procs:
+                proc.join()
+            mean = {key: sum(row[key] for row in rows) / len(rows) / 1024 for key in rows[0]}
+            print(f"{mode:>6} {mean['rss']:>8.1f} {mean['pss']:>8.1f} {mean['private']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Endgame solver throughput: nodes/sec and transposition-table hit rate."""
+
+from __future__ import annotations
+
+import argparse
+
+from app.engine.endgame import solve_endgame
+
+from .common import simulate_game
+
+CARD_LIMITS = [4, 6, 8]
+POSITIONS = 10
+
+
+def endgame_states(max_cards: int, count: int, user_role: str = "landlord"):
+    """First user decision with at most `max_cards` in every hand, from successive simulated games."""
+    states = []
+    seed = 0
+    while len(states) < count:
+        state, _ = simulate_game(seed, user_role=user_role)
+        seed += 1
+        for steps in range(len(state.action_log)):
+            candidate, _ = simulate_game(seed - 1, user_role=user_role, max_steps=steps)
+            if candidate.need_user_action() and max(candidate.num_cards_left_dict.values()) <= max_cards:
+                states.append(candidate)
+                break
+    return states
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budget-ms", type=float, default=2000)
+    args = parser.parse_args(argv)
+
+    print(f"{'cards':>5} {'solved':>7} {'proven':>7} {'deals':>6} {'nodes':>9} {'nodes/s':>10} {'hit rate':>9}")
+    for limit in CARD_LIMITS:
+        results = [solve_endgame(state, budget_ms=args.budget_ms, max_cards=limit) for state in endgame_states(limit, POSITIONS)]
+        results = [result for result in results if result is not None]
+        if not results:
+            print(f"{limit:>5} no positions within the deal limit")
+            continue
+        nodes = sum(result.nodes for result in results)
+        seconds = sum(result.elapsed_ms for result in results) / 1000
+        lookups = sum(result.tt_lookups for result in results)
+        hits = sum(result.tt_hits for result in results)
+        print(
+            f"{limit:>5} {sum(r.complete for r in results):>3}/{len(results):<3} "
+            f"{sum(r.action is not None for r in results):>7} "
+            f"{sum(r.deals for r in results) / len(results):>6.1f} {nodes:>9} "
+            f"{nodes / max(seconds, 1e-9):>10.0f} {hits / max(lookups, 1):>9.2%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
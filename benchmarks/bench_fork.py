@@ -0,0 +1,53 @@
+"""Forks/sec and applies/sec: `fork` vs replaying `action_log`, `apply_unchecked` vs `apply_action`."""
+
+from __future__ import annotations
+
+import argparse
+
+from app.engine.state import GameState
+
+from .common import states_at_lengths, time_per_call
+
+LENGTHS = [1, 10, 20, 30, 40]
+
+
+def _replay(state: GameState) -> GameState:
+    """The only copy before `fork`: a new state with the log replayed through `apply_action`."""
+    config = state.config
+    copy = GameState.create(config.user_role, config.initial_my_hand, config.initial_three_landlord_cards)
+    for entry in state.action_log:
+        copy.apply_action(entry.action, validate=False)
+    return copy
+
+
+def _applies_per_sec(state: GameState, apply, repeat: int) -> float:
+    """Moves per second replaying `state`'s log onto forks of its starting position."""
+    config = state.config
+    start = GameState.create(config.user_role, config.initial_my_hand, config.initial_three_landlord_cards)
+    moves = [entry.action for entry in state.action_log]
+
+    def run() -> None:
+        branch = start.fork()
+        for move in moves:
+            apply(branch, move)
+
+    return len(moves) / time_per_call(run, repeat) * 1e6
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    slow_repeat = max(args.repeat // 20, 1)
+    print(f"{'steps':>6} {'replay/s':>10} {'fork/s':>10} {'checked/s':>10} {'unchecked/s':>12}")
+    for length, state in states_at_lengths(LENGTHS).items():
+        replays = 1e6 / time_per_call(lambda: _replay(state), slow_repeat)
+        forks = 1e6 / time_per_call(state.fork, args.repeat)
+        checked = _applies_per_sec(state, lambda branch, move: branch.apply_action(move), slow_repeat)
+        unchecked = _applies_per_sec(state, GameState.apply_unchecked, slow_repeat)
+        print(f"{length:>6} {replays:>10.0f} {forks:>10.0f} {checked:>10.0f} {unchecked:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
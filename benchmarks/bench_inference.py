@@ -0,0 +1,27 @@
+"""Opponent-hand model construction and sampling throughput."""
+
+from __future__ import annotations
+
+import numpy as np
+
+from app.engine.inference import build_hand_model
+
+from .common import states_at_lengths, time_per_call
+
+LENGTHS = [0, 10, 25, 40]
+SAMPLES = 10000
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    print(f"{'steps':>5} {'build us':>10} {'counts/s':>12} {'hands/s':>10}")
+    for length, state in states_at_lengths(LENGTHS, user_role="landlord_down").items():
+        model = build_hand_model(state)
+        build_us = time_per_call(lambda: build_hand_model(state), repeat=200)
+        counts_us = time_per_call(lambda: model.sample_counts(SAMPLES, rng), repeat=20)
+        hands_us = time_per_call(lambda: model.sample_hands(1000, rng), repeat=5)
+        print(f"{length:>5} {build_us:>10.0f} {SAMPLES / counts_us * 1e6:>12.0f} {1000 / hands_us * 1e6:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
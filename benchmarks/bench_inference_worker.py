@@ -0,0 +1,46 @@
+"""Decision throughput and latency with torch in the request threads versus in inference worker processes."""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+
+from app.inference_worker import RemoteModelRegistry
+from app.model_bridge import ModelRegistry
+
+from .common import concurrent_decisions, random_checkpoints, states_at_lengths
+
+LENGTHS = [0, 3, 6, 12, 18, 24, 30]
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ckpt-dir", help="Real checkpoints; random weights are used when omitted.")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 8], help="Concurrent request threads.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2], help="Inference processes to compare.")
+    parser.add_argument("--decisions", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ckpt_dir = args.ckpt_dir or random_checkpoints(tmp)
+        infosets = [
+            state.build_infoset_for_user() for state in states_at_lengths(LENGTHS).values() if state.need_user_action()
+        ]
+
+        backends = [("in-process", lambda: ModelRegistry(ckpt_dir))]
+        backends += [(f"{n} worker(s)", lambda n=n: RemoteModelRegistry(ckpt_dir, workers=n)) for n in args.workers]
+        print(f"{'backend':>12} {'threads':>7} {'decisions/s':>12} {'p50 ms':>8} {'p95 ms':>8}")
+        for name, build in backends:
+            registry = build()
+            registry.preload()
+            registry.recommend(infosets[0])  # warm-up
+            try:
+                for threads in args.threads:
+                    rate, p50, p95 = concurrent_decisions(registry, infosets, threads, args.decisions)
+                    print(f"{name:>12} {threads:>7} {rate:>12.1f} {p50:>8.2f} {p95:>8.2f}")
+            finally:
+                registry.close()
+
+
+if __name__ == "__main__":
+    main()
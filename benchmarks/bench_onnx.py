@@ -0,0 +1,49 @@
+"""Forward-pass latency of the torch models versus their ONNX Runtime exports, per batch size."""
+
+from __future__ import annotations
+
+import argparse
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from app.model_bridge import ModelRegistry
+from app.onnx_backend import X_WIDTH, OnnxModelRegistry, export_onnx
+
+from .common import random_checkpoints, time_per_call
+
+BATCHES = [1, 10, 50, 200, 1000]
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ckpt-dir", help="Real checkpoints; random weights are used when omitted.")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ckpt_dir = Path(tmp) / "ckpt"
+        if args.ckpt_dir:
+            shutil.copytree(args.ckpt_dir, ckpt_dir)
+        else:
+            random_checkpoints(ckpt_dir)
+        export_onnx(ckpt_dir)
+        torch_registry = ModelRegistry(ckpt_dir)
+        onnx_registry = OnnxModelRegistry(ckpt_dir)
+        rng = np.random.default_rng(0)
+
+        print(f"{'position':>13} {'batch':>6} {'torch us':>10} {'onnx us':>10} {'speedup':>8}")
+        for position in ("landlord", "landlord_up"):
+            for batch in BATCHES:
+                z = rng.integers(0, 2, size=(batch, 5, 162)).astype(np.float32)
+                x = rng.integers(0, 2, size=(batch, X_WIDTH[position])).astype(np.float32)
+                torch_registry.score(position, z, x), onnx_registry.score(position, z, x)  # warm-up
+                torch_us = time_per_call(lambda: torch_registry.score(position, z, x), args.repeat)
+                onnx_us = time_per_call(lambda: onnx_registry.score(position, z, x), args.repeat)
+                print(f"{position:>13} {batch:>6} {torch_us:>10.1f} {onnx_us:>10.1f} {torch_us / onnx_us:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
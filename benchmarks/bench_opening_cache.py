@@ -0,0 +1,44 @@
+"""Opening recommendation latency: model forward pass versus the SQLite cache."""
+
+from __future__ import annotations
+
+import random
+import tempfile
+from pathlib import Path
+
+from app.engine.state import GameState
+from app.model_bridge import ModelRegistry
+from app.opening_cache import OpeningCache
+
+from .common import deal, random_checkpoints, time_per_call
+
+OPENINGS = 50
+
+
+def main() -> None:
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        ckpt_dir = random_checkpoints(Path(tmp) / "ckpt")
+        registry = ModelRegistry(ckpt_dir)
+        cached = ModelRegistry(ckpt_dir, opening_cache=OpeningCache(Path(tmp) / "openings.sqlite"))
+        registry.preload()
+        cached.preload()
+
+        infosets = []
+        for _ in range(OPENINGS):
+            hands, landlord_cards = deal(rng)
+            infosets.append(GameState.create("landlord", hands["landlord"], landlord_cards).build_infoset_for_user())
+        legal = sum(len(infoset.legal_actions) for infoset in infosets) / len(infosets)
+
+        model_us = time_per_call(lambda: [registry.recommend(infoset) for infoset in infosets], repeat=3) / OPENINGS
+        cold_us = time_per_call(lambda: [cached.recommend(infoset) for infoset in infosets], repeat=1) / OPENINGS
+        warm_us = time_per_call(lambda: [cached.recommend(infoset) for infoset in infosets], repeat=10) / OPENINGS
+        print(f"mean legal actions per opening: {legal:.0f}")
+        print(f"model:        {model_us / 1000:8.2f} ms")
+        print(f"cache (miss): {cold_us / 1000:8.2f} ms")
+        print(f"cache (hit):  {warm_us / 1000:8.2f} ms")
+        cached.opening_cache.close()
+
+
+if __name__ == "__main__":
+    main()
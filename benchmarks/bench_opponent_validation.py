@@ -0,0 +1,71 @@
+"""Opponent-move validation: cached rival type and unseen counts versus the previous full recompute."""
+
+from __future__ import annotations
+
+import argparse
+from collections import Counter
+
+from app.engine.parser import DECK_COUNTER
+from app.engine.rules import get_move_type, is_action_compatible_with_rival
+from app.engine.state import ROLE_ORDER, GameState, ValidationError
+
+from .common import simulate_game, time_per_call
+
+REPEAT = 200
+
+
+def legacy_validate(state: GameState, action: list[int]) -> None:
+    """`GameState._validate_opponent_action` before the cached rival type and unseen counts."""
+    actor = state.acting_role
+    rival_move = state.get_last_move()
+    if not action:
+        if not rival_move:
+            raise ValidationError("PASS is not allowed when leading a new round.")
+        return
+    if len(action) > state.num_cards_left_dict[actor]:
+        raise ValidationError(f"{actor} does not have enough cards left for this action.")
+    if get_move_type(action)["type"] == 15:
+        raise ValidationError("Opponent action is not a valid DouDizhu move.")
+    if not is_action_compatible_with_rival(sorted(action), sorted(rival_move)):
+        raise ValidationError("Opponent action cannot beat current rival move.")
+    unseen = Counter(DECK_COUNTER)
+    unseen.subtract(state.my_hand_cards)
+    for role in ROLE_ORDER:
+        unseen.subtract(state.played_cards[role])
+    for card, count in Counter(action).items():
+        if count > unseen[card]:
+            raise ValidationError("Opponent action exceeds visible remaining card pool.")
+
+
+def cached_validate(state: GameState, action: list[int]) -> None:
+    state._validate_opponent_action(action, get_move_type(action))
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    args = parser.parse_args(argv)
+
+    legacy_us, cached_us, moves = 0.0, 0.0, 0
+    for seed in range(args.games):
+        played, _ = simulate_game(seed, user_role="landlord")
+        config = played.config
+        state = GameState.create(config.user_role, config.initial_my_hand, config.initial_three_landlord_cards)
+        for entry in played.action_log:
+            action = entry.action
+            if not state.need_user_action():
+                legacy_us += time_per_call(lambda: legacy_validate(state, action), args.repeat)
+                cached_us += time_per_call(lambda: cached_validate(state, action), args.repeat)
+                moves += 1
+            state.apply_action(action)
+
+    print(f"{moves} opponent moves from {args.games} simulated games")
+    print(f"{'validation':<10} {'us/move':>9}")
+    print(f"{'legacy':<10} {legacy_us / moves:>9.2f}")
+    print(f"{'cached':<10} {cached_us / moves:>9.2f}")
+    print(f"speedup {legacy_us / cached_us:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
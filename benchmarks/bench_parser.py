@@ -0,0 +1,65 @@
+"""Table-driven parser/formatter versus the previous char-by-char implementation."""
+
+from __future__ import annotations
+
+from app.engine.parser import (
+    CARD_TO_TEXT,
+    TEXT_TO_CARD,
+    ParseError,
+    action_to_text,
+    parse_action_text,
+    validate_cards_max_four,
+)
+
+from .common import states_at_lengths, time_per_call
+
+REPEAT = 20000
+
+
+def legacy_tokenize(text: str) -> list[int]:
+    payload = text.strip().upper().replace(" ", "")
+    if payload in {"PASS", "P"}:
+        return []
+    tokens: list[str] = []
+    i = 0
+    while i < len(payload):
+        if payload.startswith("10", i):
+            tokens.append("10")
+            i += 2
+            continue
+        token = payload[i]
+        if token in TEXT_TO_CARD:
+            tokens.append(token)
+            i += 1
+            continue
+        raise ParseError(f"Invalid card token: {payload[i:]}")
+    cards = [TEXT_TO_CARD[token] for token in tokens]
+    validate_cards_max_four(cards, "action")
+    return sorted(cards)
+
+
+def legacy_action_to_text(action: list[int]) -> str:
+    if not action:
+        return "PASS"
+    return "".join(CARD_TO_TEXT[card] for card in sorted(action))
+
+
+def main() -> None:
+    inputs = ["3", "KK", "10JQKA", "33344455", "3344556678910JQKA2", "33334444556678910JQXD"]
+    print(f"{'parse input':<24} {'legacy us':>10} {'table us':>10}")
+    for text in inputs:
+        legacy = time_per_call(lambda t=text: legacy_tokenize(t), REPEAT)
+        table = time_per_call(lambda t=text: parse_action_text(t), REPEAT)
+        print(f"{text:<24} {legacy:>10.2f} {table:>10.2f}")
+
+    print()
+    print(f"{'snapshot texts':<24} {'legacy us':>10} {'table us':>10}")
+    for length, state in states_at_lengths([10, 30, 50]).items():
+        moves = [entry.action for entry in state.action_log] + [state.my_hand_cards]
+        legacy = time_per_call(lambda m=moves: [legacy_action_to_text(a) for a in m], REPEAT // 10)
+        table = time_per_call(lambda m=moves: [action_to_text(a) for a in m], REPEAT // 10)
+        print(f"{str(length) + ' steps':<24} {legacy:>10.2f} {table:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Two-stage scoring: top-1 agreement with the full model and latency, per prune size.
+
+Positions come from recorded games (`--records`, the JSON-lines format of
+`app.analysis`) or, by default, from every user decision of simulated games.
+With random weights agreement is only a lower bound; pass `--ckpt-dir` to
+measure the shipped models.
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from app.analysis import iter_records, record_positions
+from app.engine.state import ROLE_ORDER, GameState
+from app.model_bridge import ModelRegistry
+
+from .common import random_checkpoints, simulate_game
+
+TOP_N = [8, 16, 32, 64]
+
+
+def _simulated_positions(games: int) -> list:
+    infosets = []
+    for seed in range(games):
+        for role in ROLE_ORDER:
+            state, _ = simulate_game(seed, user_role=role)
+            replay = GameState.create(role, state.config.initial_my_hand, state.config.initial_three_landlord_cards)
+            for action in state.card_play_action_seq:
+                if replay.need_user_action():
+                    infosets.append(replay.build_infoset_for_user())
+                replay.apply_action(action)
+    return infosets
+
+
+def _recorded_positions(paths: list[str]) -> list:
+    return [infoset for _, record in iter_records(paths) for _, infoset, _ in record_positions(record)]
+
+
+def _timed(registry: ModelRegistry, infosets: list) -> tuple[list, np.ndarray]:
+    actions, latencies = [], []
+    for infoset in infosets:
+        started = time.perf_counter()
+        actions.append(registry.recommend(infoset))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return actions, np.array(latencies)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ckpt-dir", help="Real checkpoints; random weights are used when omitted.")
+    parser.add_argument("--records", nargs="+", help="Recorded games; simulated games are used when omitted.")
+    parser.add_argument("--games", type=int, default=20, help="Simulated games (without --records).")
+    parser.add_argument("--top", type=int, nargs="+", default=TOP_N)
+    args = parser.parse_args(argv)
+
+    infosets = _recorded_positions(args.records) if args.records else _simulated_positions(args.games)
+    infosets = [infoset for infoset in infosets if len(infoset.legal_actions) > 1]
+    widths = np.array([len(infoset.legal_actions) for infoset in infosets])
+    with tempfile.TemporaryDirectory() as tmp:
+        ckpt_dir = args.ckpt_dir or random_checkpoints(tmp)
+        full = ModelRegistry(ckpt_dir)
+        full.preload()
+        full.recommend(infosets[0])  # warm-up
+        expected, base = _timed(full, infosets)
+
+        print(f"{len(infosets)} decisions, legal actions mean {widths.mean():.0f} / max {widths.max()}")
+        print(
+            f"{'top':>5} {'pruned':>7} {'agreement':>10} {'on pruned':>10} "
+            f"{'mean ms':>8} {'p95 ms':>7} {'max ms':>7} {'max rows':>9}"
+        )
+        print(
+            f"{'full':>5} {0:>7} {1:>10.3f} {'-':>10} "
+            f"{base.mean():>8.2f} {np.percentile(base, 95):>7.2f} {base.max():>7.2f} {widths.max():>9}"
+        )
+        for top in args.top:
+            registry = ModelRegistry(ckpt_dir, prune_top=top)
+            registry.preload()
+            actions, latencies = _timed(registry, infosets)
+            agree = np.array([action == best for action, best in zip(actions, expected)])
+            pruned = widths > top
+            on_pruned = f"{agree[pruned].mean():.3f}" if pruned.any() else "-"
+            rows = int(np.minimum(widths, top + 1).max())
+            print(
+                f"{top:>5} {int(pruned.sum()):>7} {agree.mean():>10.3f} {on_pruned:>10} {latencies.mean():>8.2f} "
+                f"{np.percentile(latencies, 95):>7.2f} {latencies.max():>7.2f} {rows:>9}"
+            )
+
+
+if __name__ == "__main__":
+    main()
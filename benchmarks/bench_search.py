@@ -0,0 +1,48 @@
+"""Rollouts completed within the search budget, in-process versus a process pool."""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+
+from app.model_bridge import ModelRegistry
+from app.search import RolloutSearch
+
+from .common import random_checkpoints, states_at_lengths
+
+LENGTHS = [1, 10, 25]
+DECISIONS = 5
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ckpt-dir", help="Real checkpoints; random weights are used when omitted.")
+    parser.add_argument("--budget-ms", type=float, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4])
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ckpt_dir = args.ckpt_dir or random_checkpoints(tmp)
+        registry = ModelRegistry(ckpt_dir)
+        registry.preload()
+        states = [
+            state
+            for state in states_at_lengths(LENGTHS, user_role="landlord_down").values()
+            if state.need_user_action()
+        ] or list(states_at_lengths([1], user_role="landlord_down").values())
+
+        print(f"{'workers':>7} {'rollouts/decision':>18} {'elapsed ms':>11} {'from search':>12}")
+        for workers in args.workers:
+            search = RolloutSearch(registry, workers=workers, budget_ms=args.budget_ms, seed=0)
+            try:
+                results = [search.recommend(state) for state in states for _ in range(DECISIONS)]
+            finally:
+                search.close()
+            rollouts = sum(result.rollouts for result in results) / len(results)
+            elapsed = sum(result.elapsed_ms for result in results) / len(results)
+            searched = sum(result.source == "search" for result in results)
+            print(f"{workers:>7} {rollouts:>18.1f} {elapsed:>11.1f} {searched:>8}/{len(results)}")
+
+
+if __name__ == "__main__":
+    main()
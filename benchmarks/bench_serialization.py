@@ -0,0 +1,53 @@
+"""Serialization time and bytes per state response at several game lengths."""
+
+from __future__ import annotations
+
+import gzip
+import json
+
+from app.http_codec import BROTLI_QUALITY, GZIP_LEVEL, JSON_ENCODERS, brotli
+
+from .common import states_at_lengths, time_per_call
+
+LENGTHS = [0, 10, 25, 40, 55]
+REPEAT = 2000
+
+
+def _payload(state, delta: bool) -> dict:
+    body = state.snapshot_delta(state.version - 1, len(state.action_log) - 1) if delta else state.snapshot()
+    return {
+        "ok": True,
+        "game_id": "0" * 32,
+        ("delta" if delta else "state"): body,
+        "need_user_action": state.need_user_action(),
+        "recommendation": {"text": "PASS"},
+        "recommendation_error": None,
+    }
+
+
+def flask_default_dumps(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=True, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def main() -> None:
+    encoders = {"flask-default": flask_default_dumps, **JSON_ENCODERS}
+    header = f"{'steps':>5} {'kind':>5} " + " ".join(f"{name + ' us':>16}" for name in encoders)
+    header += f" {'raw B':>7} {'gzip B':>7}" + (f" {'br B':>7}" if brotli is not None else "")
+    print(header)
+
+    for length, state in states_at_lengths(LENGTHS).items():
+        for delta in (False, True):
+            if delta and length == 0:
+                continue
+            payload = _payload(state, delta)
+            timings = [time_per_call(lambda enc=enc: enc(payload), REPEAT) for enc in encoders.values()]
+            raw = JSON_ENCODERS["json"](payload)
+            row = f"{length:>5} {'delta' if delta else 'full':>5} " + " ".join(f"{t:>16.2f}" for t in timings)
+            row += f" {len(raw):>7} {len(gzip.compress(raw, compresslevel=GZIP_LEVEL)):>7}"
+            if brotli is not None:
+                row += f" {len(brotli.compress(raw, quality=BROTLI_QUALITY)):>7}"
+            print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Forward pass per decision: every row through the full network versus the split shared/per-action path."""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+
+from app.model_bridge import SPLIT_MIN_ROWS_PER_DECISION, ModelRegistry
+
+from .common import random_checkpoints, states_at_lengths, time_per_call
+
+LENGTHS = [0, 3, 6, 12, 24]
+
+
+def _macs_per_row(x_width: int, split: bool, actions: int) -> float:
+    """Multiply-accumulates per legal action (LSTM gates, dense1..6)."""
+    lstm = 5 * 4 * 128 * (162 + 128)
+    dense1_shared = (128 + x_width - 54) * 512
+    dense1_action = 54 * 512
+    mlp = 4 * 512 * 512 + 512
+    if split and actions >= SPLIT_MIN_ROWS_PER_DECISION:
+        return (lstm + dense1_shared) / actions + dense1_action + mlp
+    return lstm + dense1_shared + dense1_action + mlp
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ckpt-dir", help="Real checkpoints; random weights are used when omitted.")
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ckpt_dir = args.ckpt_dir or random_checkpoints(tmp)
+        full = ModelRegistry(ckpt_dir, split_forward=False)
+        split = ModelRegistry(ckpt_dir)
+        infosets = [
+            state.build_infoset_for_user()
+            for role in ("landlord", "landlord_up")
+            for state in states_at_lengths([n + (role != "landlord") * 2 for n in LENGTHS], user_role=role).values()
+            if state.need_user_action()
+        ]
+
+        print(
+            f"{'position':>13} {'actions':>8} {'full us':>9} {'split us':>9} {'speedup':>8} "
+            f"{'MACs/row full':>14} {'split':>10}"
+        )
+        for infoset in sorted(infosets, key=lambda item: len(item.legal_actions)):
+            count = len(infoset.legal_actions)
+            if count < 2:
+                continue
+            full.action_values(infoset), split.action_values(infoset)  # warm-up
+            full_us = time_per_call(lambda: full.action_values(infoset), args.repeat)
+            split_us = time_per_call(lambda: split.action_values(infoset), args.repeat)
+            width = 373 if infoset.player_position == "landlord" else 484
+            print(
+                f"{infoset.player_position:>13} {count:>8} {full_us:>9.1f} {split_us:>9.1f} {full_us / split_us:>7.2f}x "
+                f"{_macs_per_row(width, False, count) / 1e6:>13.2f}M {_macs_per_row(width, True, count) / 1e6:>9.2f}M"
+            )
+
+        batch = [infoset for infoset in infosets if len(infoset.legal_actions) > 1]
+        full_us = time_per_call(lambda: full.recommend_many(batch), args.repeat)
+        split_us = time_per_call(lambda: split.recommend_many(batch), args.repeat)
+        print(f"recommend_many of {len(batch)} decisions: full {full_us:.0f} us, split {split_us:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
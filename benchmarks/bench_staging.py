@@ -0,0 +1,56 @@
+"""Transient allocations and latency of batched recommendations with and without staging buffers."""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import tracemalloc
+
+from app.model_bridge import ModelRegistry
+
+from .common import random_checkpoints, states_at_lengths, time_per_call
+
+LENGTHS = [1, 4, 7, 10, 13, 16, 19, 22, 25, 28]
+
+
+def _transient_kib(fn, repeat: int) -> float:
+    """Mean peak of memory allocated and freed again within one call (numpy data and Python objects), in KiB."""
+    tracemalloc.start()
+    peaks = []
+    for _ in range(repeat):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn()
+        peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+    return sum(peaks) / len(peaks) / 1024
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ckpt-dir", help="Real checkpoints; random weights are used when omitted.")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ckpt_dir = args.ckpt_dir or random_checkpoints(tmp)
+        infosets = [
+            state.build_infoset_for_user()
+            for state in states_at_lengths(LENGTHS, user_role="landlord_down").values()
+            if state.need_user_action()
+        ]
+        print(f"{len(infosets)} decisions per recommend_many call")
+        print(f"{'staging':>8} {'split':>6} {'us/call':>9} {'transient KiB':>14}")
+        for split in (True, False):
+            for staging in (True, False):
+                registry = ModelRegistry(ckpt_dir, split_forward=split)
+                if not staging:
+                    registry.staging = None
+                registry.recommend_many(infosets)  # warm-up, sizes the buffers
+                us = time_per_call(lambda: registry.recommend_many(infosets), args.repeat)
+                kib = _transient_kib(lambda: registry.recommend_many(infosets), args.repeat)
+                print(f"{str(staging):>8} {str(split):>6} {us:>9.0f} {kib:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
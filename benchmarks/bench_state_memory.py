@@ -0,0 +1,100 @@
+"""Retained memory per session and infoset build cost: shared tuples vs the legacy dict/list layout."""
+
+from __future__ import annotations
+
+import argparse
+import tracemalloc
+from types import SimpleNamespace
+
+from app.engine.state import ROLE_ORDER, GameState, LogEntry
+
+from .common import simulate_game, states_at_lengths, time_per_call
+
+LENGTHS = [1, 10, 19, 28]
+
+
+class _LegacyState:
+    """The containers the pre-slots `GameState` kept per session (moves as fresh lists everywhere)."""
+
+    def __init__(self, state: GameState):
+        self.action_log = [{"actor": entry.actor, "action": list(entry.action)} for entry in state.action_log]
+        self.card_play_action_seq = [list(action) for action in state.card_play_action_seq]
+        self.played_cards = {role: list(cards) for role, cards in state.played_cards.items()}
+        self.last_move_dict = {role: list(action) for role, action in state.last_move_dict.items()}
+        self.my_hand_cards = list(state.my_hand_cards)
+        self.three_landlord_cards = list(state.three_landlord_cards)
+        self.num_cards_left_dict = dict(state.num_cards_left_dict)
+
+
+class _SharedState:
+    """The same containers as `GameState` keeps them now: one tuple per move, shared between them."""
+
+    def __init__(self, state: GameState):
+        self.action_log = [LogEntry(entry.actor, tuple(entry.action)) for entry in state.action_log]
+        self.card_play_action_seq = [entry.action for entry in self.action_log]
+        self.played_cards = {role: tuple(cards) for role, cards in state.played_cards.items()}
+        self.last_move_dict = {}
+        for entry in self.action_log:
+            self.last_move_dict[entry.actor] = entry.action
+        self.my_hand_cards = tuple(state.my_hand_cards)
+        self.three_landlord_cards = tuple(state.three_landlord_cards)
+        self.num_cards_left_dict = dict(state.num_cards_left_dict)
+
+
+def _legacy_infoset(state: GameState) -> SimpleNamespace:
+    """The old `build_infoset_for_user`: every nested move copied into a new list."""
+    all_handcards = {role: [] for role in ROLE_ORDER}
+    all_handcards[state.user_role] = list(state.my_hand_cards)
+    return SimpleNamespace(
+        player_position=state.user_role,
+        player_hand_cards=list(state.my_hand_cards),
+        num_cards_left_dict=dict(state.num_cards_left_dict),
+        three_landlord_cards=list(state.three_landlord_cards),
+        card_play_action_seq=[list(action) for action in state.card_play_action_seq],
+        other_hand_cards=state._remaining_unseen_cards(),
+        legal_actions=[list(action) for action in state.legal_actions_for_user()],
+        last_move=list(state.get_last_move()),
+        last_two_moves=[list(action) for action in state.get_last_two_moves()],
+        last_move_dict={role: list(action) for role, action in state.last_move_dict.items()},
+        played_cards={role: list(cards) for role, cards in state.played_cards.items()},
+        all_handcards=all_handcards,
+        last_pid=state.last_pid,
+        bomb_num=state.bomb_num,
+    )
+
+
+def _retained_kib(build, count: int) -> float:
+    """Memory still held after building `count` objects, per object, in KiB."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [build(seed) for seed in range(count)]
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept
+    return retained / count / 1024
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    games = [simulate_game(seed)[0] for seed in range(args.sessions)]
+    legacy = _retained_kib(lambda i: _LegacyState(games[i]), args.sessions)
+    shared = _retained_kib(lambda i: _SharedState(games[i]), args.sessions)
+    print(f"finished games, mean {sum(len(g.action_log) for g in games) / len(games):.0f} moves")
+    print(f"  legacy lists   {legacy:6.1f} KiB/session")
+    print(f"  shared tuples  {shared:6.1f} KiB/session")
+
+    print(f"{'steps':>6} {'legacy us':>10} {'shared us':>10}")
+    for length, state in states_at_lengths(LENGTHS, user_role="landlord_down").items():
+        if not state.need_user_action():
+            continue
+        old = time_per_call(lambda: _legacy_infoset(state), args.repeat)
+        new = time_per_call(state.build_infoset_for_user, args.repeat)
+        print(f"{length:>6} {old:>10.2f} {new:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
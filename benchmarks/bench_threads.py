@@ -0,0 +1,111 @@
+"""
+Sweep torch thread counts, inference processes and CPU pinning on the simulator workload.
+
+Every setting runs in fresh inference worker processes (inter-op threads can
+only be set once per process) and is driven by `--concurrency` request
+threads. Prints each setting, the latency/throughput Pareto front and the
+recommended setting as server environment variables.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import os
+import tempfile
+
+from app.inference_worker import RemoteModelRegistry
+from app.model_bridge import ThreadSettings
+
+from .common import concurrent_decisions, random_checkpoints, states_at_lengths
+
+LENGTHS = list(range(0, 45, 3))
+ROLES = ("landlord", "landlord_down", "landlord_up")
+# Recommended: highest throughput whose p95 latency is within this factor of the best p95.
+P95_TOLERANCE = 1.5
+
+
+def _workload() -> list:
+    infosets = []
+    for role in ROLES:
+        lengths = [length + ROLES.index(role) for length in LENGTHS]
+        for state in states_at_lengths(lengths, user_role=role).values():
+            if state.need_user_action():
+                infosets.append(state.build_infoset_for_user())
+    return infosets
+
+
+def _powers_of_two(limit: int) -> list[int]:
+    return [2**i for i in range(limit.bit_length()) if 2**i <= limit]
+
+
+def _settings(cores: int, workers: list[int], pin: bool) -> list[tuple[int, ThreadSettings]]:
+    cpus = tuple(sorted(os.sched_getaffinity(0))) if hasattr(os, "sched_getaffinity") else tuple(range(cores))
+    grid = []
+    for count in workers:
+        grid.append((count, ThreadSettings()))  # torch defaults: the oversubscribed baseline
+        for intra, inter in itertools.product(_powers_of_two(max(1, cores // count)), (1, None)):
+            grid.append((count, ThreadSettings(intra, inter)))
+            if pin and cores > 1:
+                grid.append((count, ThreadSettings(intra, inter, cpus)))
+    return grid
+
+
+def _dominates(row: dict, other: dict) -> bool:
+    return row["rate"] >= other["rate"] and row["p95"] <= other["p95"] and (
+        row["rate"] > other["rate"] or row["p95"] < other["p95"]
+    )
+
+
+def _pareto(rows: list[dict]) -> list[dict]:
+    return [row for row in rows if not any(_dominates(other, row) for other in rows)]
+
+
+def main(argv: list[str] | None = None) -> None:
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ckpt-dir", help="Real checkpoints; random weights are used when omitted.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[count for count in (1, 2, 4) if count <= cores])
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent request threads.")
+    parser.add_argument("--decisions", type=int, default=200)
+    parser.add_argument("--no-pin", action="store_true", help="Skip the CPU-pinned variants.")
+    args = parser.parse_args(argv)
+
+    infosets = _workload()
+    with tempfile.TemporaryDirectory() as tmp:
+        ckpt_dir = args.ckpt_dir or random_checkpoints(tmp)
+        print(f"{cores} cores, {len(infosets)} simulator decisions, {args.concurrency} request threads")
+        print(f"{'workers':>7} {'settings':<36} {'decisions/s':>12} {'p50 ms':>8} {'p95 ms':>8}")
+        rows = []
+        for workers, settings in _settings(cores, args.workers, not args.no_pin):
+            registry = RemoteModelRegistry(ckpt_dir, workers=workers, threads=settings)
+            try:
+                registry.preload()
+                for infoset in infosets[: workers * 4]:  # warm-up
+                    registry.recommend(infoset)
+                rate, p50, p95 = concurrent_decisions(registry, infosets, args.concurrency, args.decisions)
+            finally:
+                registry.close()
+            rows.append({"workers": workers, "settings": settings, "rate": rate, "p50": p50, "p95": p95})
+            print(f"{workers:>7} {settings.describe():<36} {rate:>12.1f} {p50:>8.2f} {p95:>8.2f}")
+
+    front = sorted(_pareto(rows), key=lambda row: row["p95"])
+    print("\nPareto front (no other setting has both lower p95 and higher throughput):")
+    for row in front:
+        print(f"  workers={row['workers']} {row['settings'].describe()}: {row['rate']:.1f}/s, p95 {row['p95']:.2f} ms")
+
+    best_p95 = min(row["p95"] for row in rows)
+    best = max((row for row in rows if row["p95"] <= best_p95 * P95_TOLERANCE), key=lambda row: row["rate"])
+    settings = best["settings"]
+    print(f"\nRecommended (highest throughput with p95 within {P95_TOLERANCE}x of the best):")
+    print(f"  DOUZERO_INFERENCE_WORKERS={best['workers']}")
+    if settings.intra_op:
+        print(f"  DOUZERO_INFERENCE_THREADS={settings.intra_op}")
+    if settings.inter_op:
+        print(f"  DOUZERO_INFERENCE_INTEROP_THREADS={settings.inter_op}")
+    if settings.cpus:
+        print(f"  DOUZERO_INFERENCE_CPUS={','.join(map(str, settings.cpus))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Shared helpers for benchmarks: random deals and simulated games."""
+
+from __future__ import annotations
+
+import concurrent.futures
+import random
+import time
+from pathlib import Path
+from typing import Callable
+
+from app.engine.parser import DECK_COUNTER
+from app.engine.rules import get_legal_actions
+from app.engine.state import GameState
+
+
+def deal(rng: random.Random) -> tuple[dict[str, list[int]], list[int]]:
+    """Deal a full deck. Returns the 17-card hands per role and the 3 landlord cards."""
+    deck = sorted(DECK_COUNTER.elements())
+    rng.shuffle(deck)
+    hands = {
+        "landlord": sorted(deck[:17]),
+        "landlord_down": sorted(deck[17:34]),
+        "landlord_up": sorted(deck[34:51]),
+    }
+    return hands, sorted(deck[51:])
+
+
+def simulate_game(
+    seed: int,
+    user_role: str = "landlord",
+    max_steps: int | None = None,
+) -> tuple[GameState, dict[str, list[int]]]:
+    """
+    Play random legal moves for all three seats.
+
+    Returns the state and the remaining hidden hands of every role.
+    Leading players never pass and followers pass with low probability,
+    so games reach realistic lengths.
+    """
+    rng = random.Random(seed)
+    hands, landlord_cards = deal(rng)
+    state = GameState.create(user_role, hands[user_role], landlord_cards)
+    hands["landlord"] = sorted(hands["landlord"] + landlord_cards)
+
+    while not state.game_over and (max_steps is None or len(state.action_log) < max_steps):
+        actor = state.acting_role
+        legal = get_legal_actions(hands[actor], state.card_play_action_seq)
+        moves = [move for move in legal if move]
+        if not moves or (len(moves) < len(legal) and rng.random() < 0.3):
+            action: list[int] = []
+        else:
+            action = rng.choice(moves)
+        state.apply_action(action)
+        for card in action:
+            hands[actor].remove(card)
+
+    return state, hands
+
+
+def states_at_lengths(lengths: list[int], seed: int = 7, user_role: str = "landlord") -> dict[int, GameState]:
+    """First simulated game per requested length that reaches it (capped at the game's end)."""
+    result: dict[int, GameState] = {}
+    attempt = seed
+    for length in lengths:
+        while length not in result:
+            state, _ = simulate_game(attempt, user_role=user_role, max_steps=length)
+            if len(state.action_log) == length:
+                result[length] = state
+            attempt += 1
+    return result
+
+
+def time_per_call(fn: Callable[[], object], repeat: int) -> float:
+    """Mean wall-clock microseconds per call."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def concurrent_decisions(registry, infosets: list, threads: int, decisions: int) -> tuple[float, float, float]:
+    """`registry.recommend` from `threads` concurrent callers: (decisions per second, p50 ms, p95 ms)."""
+    import numpy as np
+
+    latencies: list[float] = []
+
+    def one(index: int) -> None:
+        started = time.perf_counter()
+        registry.recommend(infosets[index % len(infosets)])
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(one, range(decisions)))
+    elapsed = time.perf_counter() - started
+    return decisions / elapsed, float(np.percentile(latencies, 50)), float(np.percentile(latencies, 95))
+
+
+def random_checkpoints(directory: str | Path, seed: int = 0) -> Path:
+    """Write randomly initialised landlord/landlord_up/landlord_down checkpoints (for timing only)."""
+    import torch
+
+    from app.model_defs import model_dict
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    torch.manual_seed(seed)
+    for position, model_cls in model_dict.items():
+        torch.save(model_cls().state_dict(), directory / f"{position}.ckpt")
+    return directory
@@ -5,6 +5,10 @@ cd /d %~dp0
 set "VENV_DIR=.venv"
 set "PYTHON_EXE=%VENV_DIR%\Scripts\python.exe"
 
+rem build_exe.bat --onnx ships onnxruntime and exported .onnx models instead of torch.
+set "ONNX_BUILD=0"
+if /i "%~1"=="--onnx" set "ONNX_BUILD=1"
+
 if not exist "%PYTHON_EXE%" (
   echo Virtual environment not found: %PYTHON_EXE%
   echo Please run start.bat first.
@@ -18,10 +22,30 @@ if errorlevel 1 (
   exit /b 1
 )
 
+if "%ONNX_BUILD%"=="1" (
+  echo Installing ONNX requirements and exporting models...
+  "%PYTHON_EXE%" -m pip install -r requirements-onnx.txt --disable-pip-version-check
+  if errorlevel 1 (
+    echo Failed to install ONNX requirements.
+    exit /b 1
+  )
+  "%PYTHON_EXE%" -m app.onnx_backend --ckpt-dir douzero_WP
+  if errorlevel 1 (
+    echo ONNX export failed.
+    exit /b 1
+  )
+)
+
 echo [2/3] Building single-file executable...
 if exist "build" rmdir /s /q "build"
 if exist "dist" rmdir /s /q "dist"
 
+if "%ONNX_BUILD%"=="1" (
+  set "DOUZERO_ONNX_BUILD=1"
+  "%PYTHON_EXE%" -m PyInstaller --noconfirm --clean DouDiZhuAssistant.spec
+  goto built
+)
+
 "%PYTHON_EXE%" -m PyInstaller ^
   --noconfirm ^
   --clean ^
@@ -33,6 +57,8 @@ if exist "dist" rmdir /s /q "dist"
   --collect-all douzero ^
   --collect-all flask ^
   launch_exe.py
+
+:built
 if errorlevel 1 (
   echo Build failed.
   exit /b 1
@@ -0,0 +1,5 @@
+"""PyInstaller runtime hook for the ONNX build: select the onnxruntime backend (no torch bundled)."""
+
+import os
+
+os.environ.setdefault("DOUZERO_BACKEND", "onnx")
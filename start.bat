@@ -50,7 +50,7 @@ if not exist "requirements.txt" (
 )
 
 echo [3/5] Checking dependencies...
-"%PYTHON_EXE%" -c "import flask, torch, douzero; from douzero.env.env import get_obs" >nul 2>nul
+"%PYTHON_EXE%" -c "import flask, flask_sock, torch, douzero; from douzero.env.env import get_obs" >nul 2>nul
 if errorlevel 1 (
   echo Installing dependencies from requirements.txt...
   "%PYTHON_EXE%" -m pip install -r requirements.txt --disable-pip-version-check
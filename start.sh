@@ -42,7 +42,7 @@ if [[ ! -f "requirements.txt" ]]; then
 fi
 
 echo "[3/5] Checking dependencies..."
-if ! "$PYTHON_EXE" -c "import flask, torch, douzero; from douzero.env.env import get_obs" >/dev/null 2>&1; then
+if ! "$PYTHON_EXE" -c "import flask, flask_sock, torch, douzero; from douzero.env.env import get_obs" >/dev/null 2>&1; then
   echo "Installing dependencies from requirements.txt..."
   "$PYTHON_EXE" -m pip install -r requirements.txt --disable-pip-version-check \
     || pause_and_exit "Dependency installation failed."
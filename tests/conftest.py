@@ -1,7 +1,36 @@
 import sys
 from pathlib import Path
 
+import pytest
+
 ROOT = Path(__file__).resolve().parent.parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+
+def _infoset(role: str, hand: str, landlord_cards: str, history: list[str]):
+    from app.engine.parser import parse_action_text
+    from app.engine.state import GameState
+
+    state = GameState.create(role, parse_action_text(hand), parse_action_text(landlord_cards))
+    for text in history:
+        state.apply_action(parse_action_text(text))
+    return state.build_infoset_for_user()
+
+
+@pytest.fixture
+def make_infoset():
+    """`make_infoset(role, hand, landlord_cards, history)`: the user's infoset after `history` (move texts)."""
+    return _infoset
+
+
+@pytest.fixture
+def random_ckpt_dir(tmp_path):
+    """`tmp_path` holding seeded random weights as `<position>.ckpt` for every position."""
+    torch = pytest.importorskip("torch")
+    from app.model_defs import model_dict
+
+    torch.manual_seed(0)
+    for position, model_cls in model_dict.items():
+        torch.save(model_cls().state_dict(), tmp_path / f"{position}.ckpt")
+    return tmp_path
@@ -0,0 +1,87 @@
+import csv
+import gzip
+import json
+
+import pytest
+
+from app.analysis import iter_records, run_pipeline
+
+
+class FirstRowScorer:
+    """Prefers the first legal action; stands in for ModelRegistry.score."""
+
+    def score(self, position, z_rows, x_rows):
+        import numpy as np
+
+        assert z_rows.shape[0] == x_rows.shape[0]
+        values = np.zeros(len(x_rows), dtype=np.float32)
+        values[0] = 1.0
+        return values
+
+
+GAME = {
+    "role": "landlord_down",
+    "my_hand": "3344556678910JQKA2",
+    "landlord_cards": "2XD",
+    "actions": ["3", "4", "5", "6", "PASS", "PASS", "Q"],
+}
+
+
+def _write_corpus(path, count):
+    with gzip.open(path, "wt", encoding="utf-8") as handle:
+        for index in range(count):
+            handle.write(json.dumps({**GAME, "id": f"g{index}"}) + "\n")
+        handle.write("not json\n")
+
+
+def test_iter_records_is_lazy_and_resumes_from_offset(tmp_path):
+    corpus = tmp_path / "games.jsonl.gz"
+    _write_corpus(corpus, 3)
+
+    records = iter_records([corpus], start_offset=2)
+    assert next(records)[0] == 2
+    assert next(records) == (3, "not json\n")
+
+
+def test_pipeline_writes_rows_and_resumes_from_checkpoint(tmp_path):
+    pytest.importorskip("douzero")
+    corpus = tmp_path / "games.jsonl.gz"
+    output = tmp_path / "scores.csv"
+    _write_corpus(corpus, 3)
+
+    counts = run_pipeline([corpus], output, workers=1, checkpoint_every=2, scorer_factory=FirstRowScorer)
+
+    assert counts == {"records": 4, "rows": 6, "errors": 1}
+    with open(output, newline="", encoding="utf-8") as handle:
+        rows = list(csv.DictReader(handle))
+    assert [row["step"] for row in rows[:2]] == ["2", "5"]
+    assert {row["game_id"] for row in rows} == {"g0", "g1", "g2"}
+    assert json.loads((tmp_path / "scores.csv.checkpoint.json").read_text())["next_offset"] == 4
+
+    again = run_pipeline([corpus], output, workers=1, scorer_factory=FirstRowScorer)
+    assert again == {"records": 0, "rows": 0, "errors": 0}
+    with open(output, newline="", encoding="utf-8") as handle:
+        assert len(list(csv.DictReader(handle))) == 6
+
+
+def test_parquet_resume_drops_parts_after_the_checkpoint(tmp_path):
+    pytest.importorskip("pyarrow")
+    from app.analysis import ParquetResultWriter
+
+    output = tmp_path / "scores"
+    writer = ParquetResultWriter(output, None)
+    writer.write_rows([{"game_id": "g0", "step": 0}])
+    checkpoint = writer.flush()
+    assert checkpoint == {"size": 1}
+    for step in (1, 2):  # parts written after the checkpoint, as if the run then crashed
+        writer.write_rows([{"game_id": "g0", "step": step}])
+        writer.flush()
+    assert len(list(output.glob("part-*.parquet"))) == 3
+
+    resumed = ParquetResultWriter(output, checkpoint["size"])
+    assert sorted(part.name for part in output.glob("part-*.parquet")) == ["part-000000.parquet"]
+    resumed.write_rows([{"game_id": "g0", "step": 1}])
+    assert resumed.flush() == {"size": 2}
+
+    ParquetResultWriter(output, None)
+    assert list(output.glob("part-*.parquet")) == []
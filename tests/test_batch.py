@@ -0,0 +1,49 @@
+import random
+
+import numpy as np
+
+from app.engine.batch import (
+    MOVE_CARDS,
+    MOVE_ENCODINGS,
+    legal_action_masks,
+    mask_to_actions,
+    move_index,
+    rival_descriptor,
+)
+from app.engine.parser import DECK_COUNTER, cards_to_counts, parse_action_text
+from app.engine.rules import get_legal_actions
+
+
+def _random_cases(rng: random.Random, count: int):
+    deck = sorted(DECK_COUNTER.elements())
+    for _ in range(count):
+        rng.shuffle(deck)
+        hand = sorted(deck[: rng.choice([1, 4, 9, 17, 20])])
+        if rng.random() < 0.3:
+            yield hand, []
+            continue
+        rival_hand = sorted(deck[20:40])
+        rival = rng.choice(get_legal_actions(rival_hand, []))
+        yield hand, [rival]
+
+
+def test_masks_match_get_legal_actions():
+    rng = random.Random(11)
+    cases = list(_random_cases(rng, 400))
+    cases.append((parse_action_text("333444555666789XD"), [parse_action_text("33344478")]))
+    cases.append((parse_action_text("33334444556678910J"), [parse_action_text("KKKK")]))
+
+    hands = np.array([cards_to_counts(hand) for hand, _ in cases])
+    rivals = np.array([rival_descriptor(seq[-1] if seq else []) for _, seq in cases])
+    masks = legal_action_masks(hands, rivals, chunk_rows=64)
+
+    for (hand, seq), mask in zip(cases, masks):
+        expected = {tuple(move) for move in get_legal_actions(hand, seq)}
+        assert {tuple(move) for move in mask_to_actions(mask)} == expected
+
+
+def test_move_encodings_match_douzero_layout():
+    row = MOVE_ENCODINGS[move_index(parse_action_text("33344478"))]
+    assert list(np.flatnonzero(row)) == [0, 1, 2, 4, 5, 6, 16, 20]
+    assert list(np.flatnonzero(MOVE_ENCODINGS[move_index(parse_action_text("XD"))])) == [52, 53]
+    assert MOVE_CARDS[move_index([])] == []
@@ -0,0 +1,62 @@
+import pickle
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from app.checkpoints import MMAP_SUFFIX, convert, load_model
+from app.model_defs import model_dict
+
+
+@pytest.fixture
+def ckpt_dir(tmp_path):
+    torch.manual_seed(0)
+    for position, model_cls in model_dict.items():
+        weights = model_cls().state_dict()
+        weights["unused.extra"] = torch.zeros(3)
+        # One legacy (non-zip) pickle, which cannot be memory-mapped.
+        torch.save(weights, tmp_path / f"{position}.ckpt", _use_new_zipfile_serialization=position != "landlord_up")
+    return tmp_path
+
+
+def _outputs(model, width):
+    torch.manual_seed(1)
+    z, x = torch.rand(4, 5, 162), torch.rand(4, width)
+    with torch.no_grad():
+        return model.forward(z, x, return_value=True)["values"]
+
+
+def test_mapped_and_converted_checkpoints_match_copied_weights(ckpt_dir):
+    widths = {"landlord": 373, "landlord_up": 484, "landlord_down": 484}
+    reference = {}
+    for position, model_cls in model_dict.items():
+        model = model_cls()
+        state = torch.load(ckpt_dir / f"{position}.ckpt")
+        model.load_state_dict({key: value for key, value in state.items() if key != "unused.extra"})
+        reference[position] = _outputs(model.eval(), widths[position])
+
+        loaded = load_model(torch, model_cls, ckpt_dir / f"{position}.ckpt")
+        assert torch.equal(_outputs(loaded, widths[position]), reference[position])
+
+    written = convert(ckpt_dir, "torch")
+    assert [path.name for path in written] == [f"{position}{MMAP_SUFFIX}" for position in ("landlord", "landlord_up", "landlord_down")]
+    for position, model_cls in model_dict.items():
+        loaded = load_model(torch, model_cls, ckpt_dir / f"{position}.ckpt")
+        assert not any(param.is_meta for param in loaded.parameters())
+        assert torch.equal(_outputs(loaded, widths[position]), reference[position])
+
+
+def test_corrupt_converted_checkpoint_falls_back_to_ckpt(ckpt_dir):
+    model_cls = model_dict["landlord"]
+    ckpt = ckpt_dir / "landlord.ckpt"
+    reference = _outputs(load_model(torch, model_cls, ckpt), 373)
+
+    (converted,) = [path for path in convert(ckpt_dir, "torch") if path.name.startswith("landlord.")]
+    data = converted.read_bytes()
+    for corrupt in (data[: len(data) // 2], b"not a checkpoint"):
+        converted.write_bytes(corrupt)
+        assert torch.equal(_outputs(load_model(torch, model_cls, ckpt), 373), reference)
+
+    ckpt.write_bytes(b"not a checkpoint either")
+    with pytest.raises(pickle.UnpicklingError):
+        load_model(torch, model_cls, ckpt)
@@ -0,0 +1,64 @@
+import random
+
+from app.engine.endgame import EndgameSolver, solve_endgame
+from app.engine.parser import DECK_COUNTER, parse_action_text
+from app.engine.rules import get_legal_actions
+from app.engine.state import GameState
+
+
+def _hand(text):
+    return tuple(parse_action_text(text))
+
+
+def _naive_wins(hands, actor, rival, passes, user):
+    """Full-information minimax without a table; the user's team is the landlord iff user == 0."""
+    moves = get_legal_actions(list(hands[actor]), [list(rival)] if rival else [])
+    results = []
+    for move in moves:
+        rest = list(hands[actor])
+        for card in move:
+            rest.remove(card)
+        if not rest:
+            results.append((actor == 0) == (user == 0))
+            continue
+        child = tuple(tuple(rest) if seat == actor else hand for seat, hand in enumerate(hands))
+        if move:
+            state = ((actor + 1) % 3, tuple(move), 0)
+        elif passes == 1:
+            state = ((actor + 1) % 3, (), 0)
+        else:
+            state = ((actor + 1) % 3, rival, passes + 1)
+        results.append(_naive_wins(child, *state, user))
+    return any(results) if actor == user else all(results)
+
+
+def test_single_deal_matches_naive_minimax():
+    rng = random.Random(5)
+    deck = sorted(DECK_COUNTER.elements())
+    for _ in range(40):
+        rng.shuffle(deck)
+        sizes = [rng.randint(1, 3) for _ in range(3)]
+        hands = (tuple(sorted(deck[:sizes[0]])), tuple(sorted(deck[4:4 + sizes[1]])), tuple(sorted(deck[8:8 + sizes[2]])))
+        user = rng.randrange(3)
+        solver = EndgameSolver(("landlord", "landlord_down", "landlord_up")[user])
+        assert solver.wins((hands,), 0, (), 0) == _naive_wins(hands, 0, (), 0, user)
+
+
+def test_proof_must_hold_for_every_deal():
+    # Landlord leads with the rocket, then the 3: wins however the farmers' cards are split.
+    deals = (
+        (_hand("XD3"), _hand("22"), _hand("AA")),
+        (_hand("XD3"), _hand("2A"), _hand("2A")),
+    )
+    solver = EndgameSolver("landlord")
+    assert solver.wins(deals, 0, (), 0)
+    assert solver.tt_lookups > 0
+
+    # Leading a single 3 loses to any farmer holding a single above it.
+    deals = ((_hand("34"), _hand("2"), _hand("5")),)
+    assert not EndgameSolver("landlord").wins(deals, 0, (), 0)
+
+
+def test_solve_endgame_skips_opening_positions():
+    state = GameState.create("landlord", parse_action_text("33334444556678910J"), parse_action_text("QXD"))
+    assert solve_endgame(state) is None
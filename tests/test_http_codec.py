@@ -0,0 +1,85 @@
+import datetime
+import enum
+import gzip
+import json
+import uuid
+
+from app.engine.parser import parse_action_text
+from app.engine.state import GameState
+from app.http_codec import JSON_ENCODERS, set_json_encoder
+from app.server import app, sessions
+
+
+def _start_session(game_id: str) -> GameState:
+    state = GameState.create(
+        "landlord_down",
+        parse_action_text("3344556678910JQKA2"),
+        parse_action_text("2XD"),
+    )
+    for text in ["3", "4", "5", "6", "7", "8"]:
+        state.apply_action(parse_action_text(text))
+    sessions[game_id] = state
+    return state
+
+
+def test_json_encoders_agree():
+    payload = {"ok": True, "text": "地主 10JQKA", "nested": [1, 2.5, None, {"a": []}]}
+    decoded = [json.loads(encoder(payload)) for encoder in JSON_ENCODERS.values()]
+    assert all(item == payload for item in decoded)
+    assert {encoder({3: "three", 1.5: None}) for encoder in JSON_ENCODERS.values()} == {b'{"3":"three","1.5":null}'}
+
+    class Seat(enum.Enum):
+        LANDLORD = "landlord"
+
+    keyed = {"moves": [{Seat.LANDLORD: 1, datetime.date(2024, 5, 1): 2, uuid.UUID(int=7): 3, True: 4, None: 5}]}
+    expected = b'{"moves":[{"landlord":1,"2024-05-01":2,"00000000-0000-0000-0000-000000000007":3,"true":4,"null":5}]}'
+    assert {encoder(keyed) for encoder in JSON_ENCODERS.values()} == {expected}
+
+
+def test_state_response_is_gzipped_and_supports_etag(monkeypatch):
+    game_id = "test_state_response_is_gzipped_and_supports_etag"
+    _start_session(game_id)
+    monkeypatch.setattr("app.server._recommendation_payload", lambda _state: ({"text": "PASS"}, None))
+    monkeypatch.setattr("app.http_codec.COMPRESS_MIN_BYTES", 1)
+
+    try:
+        client = app.test_client()
+        response = client.get(f"/api/game/{game_id}/state", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers["Content-Encoding"] == "gzip"
+        data = json.loads(gzip.decompress(response.get_data()))
+        assert data["state"]["action_log"][-1]["text"] == "8"
+
+        etag = response.headers["ETag"]
+        cached = client.get(f"/api/game/{game_id}/state", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.get_data() == b""
+
+        # A reloaded or re-routed model set changes the recommendation, so the validator too.
+        monkeypatch.setattr("app.server.router.label", lambda arm, registry: f"{arm}@v99:reloaded")
+        reloaded = client.get(f"/api/game/{game_id}/state", headers={"If-None-Match": etag})
+        assert reloaded.status_code == 200
+        etag = reloaded.headers["ETag"]
+
+        sessions[game_id].apply_action(parse_action_text("9"))
+        fresh = client.get(f"/api/game/{game_id}/state", headers={"If-None-Match": etag})
+        assert fresh.status_code == 200
+    finally:
+        sessions.pop(game_id, None)
+
+
+def test_stdlib_encoder_fallback_serves_same_payload(monkeypatch):
+    game_id = "test_stdlib_encoder_fallback_serves_same_payload"
+    _start_session(game_id)
+    monkeypatch.setattr("app.server._recommendation_payload", lambda _state: (None, None))
+    previous = app.json.encoder_name
+
+    try:
+        client = app.test_client()
+        fast = client.get(f"/api/game/{game_id}/state").get_json()
+        set_json_encoder(app, "json")
+        slow = client.get(f"/api/game/{game_id}/state").get_json()
+        assert fast == slow
+    finally:
+        set_json_encoder(app, previous)
+        sessions.pop(game_id, None)
@@ -0,0 +1,60 @@
+import itertools
+from math import comb, prod
+
+import numpy as np
+
+from app.engine.inference import NUM_RANKS, HandConstraints, OpponentHandModel, opponent_hand_model
+from app.engine.parser import CARD_TO_RANK_INDEX, parse_action_text
+from app.engine.state import GameState
+
+
+def _padded(values, fill=0):
+    return tuple(values) + (fill,) * (NUM_RANKS - len(values))
+
+
+def test_marginals_match_enumeration_and_samples():
+    unseen = _padded([4, 2, 3, 1])
+    constraints = HandConstraints(
+        roles=("landlord", "landlord_up"),
+        unseen=unseen,
+        sizes=(5, 5),
+        lower=(_padded([1]), _padded([0, 1])),
+        upper=(_padded([4, 2, 1, 1]), _padded([3, 2, 3, 1])),
+    )
+    model = OpponentHandModel(constraints)
+
+    expected = np.zeros((NUM_RANKS, 5))
+    total = 0
+    for split in itertools.product(*(range(count + 1) for count in unseen[:4])):
+        rest = [u - a for u, a in zip(unseen, split)]
+        if sum(split) != 5 or split[0] < 1 or rest[1] < 1 or split[2] > 1 or rest[0] > 3:
+            continue
+        weight = prod(comb(u, a) for u, a in zip(unseen, split))
+        total += weight
+        for rank, count in enumerate(split):
+            expected[rank, count] += weight
+    expected[4:, 0] = total
+    assert np.allclose(model.marginals()["landlord"], expected / total)
+
+    counts = model.sample_counts(20000, np.random.default_rng(0))
+    assert (counts.sum(axis=1) == 5).all()
+    empirical = np.stack([np.bincount(counts[:, rank], minlength=5)[:5] for rank in range(NUM_RANKS)]) / len(counts)
+    assert np.abs(empirical - expected / total).max() < 0.02
+
+
+def test_pass_over_opponent_rules_out_higher_cards_and_is_memoized():
+    state = GameState.create("landlord_down", parse_action_text("3344556678910JQKA2"), parse_action_text("345"))
+    for text in ["2", "PASS", "PASS"]:
+        state.apply_action(parse_action_text(text))
+
+    model = opponent_hand_model(state)
+    assert opponent_hand_model(state) is model
+    up = model.marginals()["landlord_up"]
+    for card in (20, 30):
+        assert up[CARD_TO_RANK_INDEX[card], 0] == 1.0
+    hands = model.sample_hands(200, np.random.default_rng(1))
+    assert all(20 in hand["landlord"] and 30 in hand["landlord"] for hand in hands)
+    assert all({3, 4, 5} <= set(hand["landlord"]) for hand in hands)
+
+    state.apply_action(parse_action_text("3"))
+    assert opponent_hand_model(state) is not model
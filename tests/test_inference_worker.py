@@ -0,0 +1,116 @@
+import threading
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("douzero")
+
+import numpy as np
+
+from app.inference_worker import RemoteModelRegistry
+from app.model_bridge import ModelRegistry
+
+
+def test_remote_registry_matches_in_process_scores(random_ckpt_dir, make_infoset):
+    local = ModelRegistry(random_ckpt_dir)
+    local._ensure_imports()
+    local.device = "cpu"
+    # Small slots so the opening (hundreds of rows) is split across several slots.
+    remote = RemoteModelRegistry(random_ckpt_dir, workers=2, slots_per_worker=2, slot_rows=64)
+    try:
+        infosets = [
+            make_infoset("landlord", "33334444556678910J", "QXD", []),
+            make_infoset("landlord_down", "3344556678910JQKA2", "2XD", ["5"]),
+            make_infoset("landlord_up", "3344556678910JQKA2", "2XD", ["9", "10"]),
+        ]
+        for infoset in infosets:
+            np.testing.assert_allclose(remote.action_values(infoset), local.action_values(infoset), rtol=1e-5, atol=1e-6)
+
+        # Concurrent callers share the slots and get their own results back.
+        results: dict[int, list] = {}
+        threads = [
+            threading.Thread(target=lambda i=i: results.__setitem__(i, remote.recommend_many(infosets))) for i in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        expected = local.recommend_many(infosets)
+        assert all(results[i] == expected for i in range(4))
+        assert remote.torch is None
+
+        # Scoring keeps going while the workers load the new models.
+        reloading = threading.Thread(target=remote.reload)
+        reloading.start()
+        while reloading.is_alive():
+            assert remote.recommend_many(infosets) == expected
+        reloading.join()
+        assert remote.version == 2
+        assert remote.model_tag() == local.fingerprint()
+    finally:
+        remote.close()
+
+
+def _fake_pool(conn, monkeypatch):
+    import queue
+    from types import SimpleNamespace
+
+    from app import inference_worker
+    from app.inference_worker import InferencePool, SlotLayout, _Worker
+
+    monkeypatch.setattr(inference_worker, "SCORE_TIMEOUT_SECONDS", 0.05)
+    layout = SlotLayout(rows=4)
+    worker = _Worker.__new__(_Worker)
+    worker.index, worker.conn, worker.error = 0, conn, None
+    worker.shm = SimpleNamespace(buf=bytearray(layout.nbytes))
+    worker.send_lock, worker.replies, worker.control = threading.Lock(), {}, queue.Queue()
+    pool = InferencePool.__new__(InferencePool)
+    pool.layout, pool.workers, pool._free = layout, [worker], queue.Queue()
+    pool._free.put((worker, 0))
+    return pool, worker
+
+
+def test_dead_or_hung_workers_fail_requests_with_model_bridge_errors(monkeypatch):
+    from app.model_bridge import ModelBridgeError
+
+    class BrokenConn:
+        def send(self, message):
+            raise BrokenPipeError("worker gone")
+
+    class SilentConn:
+        def send(self, message):
+            pass
+
+    z, x = np.zeros((2, 5, 162), dtype=np.float32), np.zeros((2, 373), dtype=np.float32)
+    pool, worker = _fake_pool(BrokenConn(), monkeypatch)
+    with pytest.raises(ModelBridgeError, match="unreachable"):
+        pool.score("landlord", z, x)
+    assert worker.replies == {} and pool._free.qsize() == 1
+
+    pool, worker = _fake_pool(SilentConn(), monkeypatch)
+    with pytest.raises(ModelBridgeError, match="did not answer"):
+        pool.score("landlord", z, x)
+    assert worker.replies == {}
+    with pytest.raises(ModelBridgeError, match="did not answer"):
+        pool.score("landlord", z, x)  # the hung worker is retired
+
+
+def test_reload_ignores_stale_answers_and_times_out(monkeypatch):
+    from app import inference_worker
+    from app.model_bridge import ModelBridgeError
+
+    sent = []
+
+    class AnsweringConn:
+        def send(self, message):
+            sent.append(message)
+            worker.control.put(("reloaded", "new-tag", None))
+
+    pool, worker = _fake_pool(AnsweringConn(), monkeypatch)
+    worker.control.put(("reloaded", None, "stale failure"))
+    assert pool.reload() == "new-tag" and sent == [("reload",)]
+
+    monkeypatch.setattr(inference_worker, "RELOAD_TIMEOUT_SECONDS", 0.05)
+    worker.conn = type("SilentConn", (), {"send": lambda self, message: None})()
+    with pytest.raises(ModelBridgeError, match="did not reload in time"):
+        pool.reload()
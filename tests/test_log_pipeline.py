@@ -0,0 +1,60 @@
+import json
+import logging
+import queue
+
+from app.log_pipeline import (
+    JsonLinesFormatter,
+    NonBlockingQueueHandler,
+    SamplingFilter,
+    SizeAndTimeRotatingFileHandler,
+)
+
+
+def _record(msg: str = "Action %s", args=("33",), **extra) -> logging.LogRecord:
+    record = logging.LogRecord("douzero-web", logging.INFO, __file__, 1, msg, args, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+def test_json_lines_formatter_includes_context_fields():
+    line = JsonLinesFormatter().format(_record(event="action", game_id="g1", step=3, latency_ms=1.5))
+    data = json.loads(line)
+
+    assert data["msg"] == "Action 33"
+    assert data["game_id"] == "g1"
+    assert data["step"] == 3
+    assert data["latency_ms"] == 1.5
+    assert "recommend_ms" not in data
+
+
+def test_sampling_filter_keeps_one_in_n_and_never_drops_warnings():
+    sampler = SamplingFilter({"state": 5})
+    kept = [sampler.filter(_record(event="state")) for _ in range(20)]
+    assert kept.count(True) == 4
+
+    warning = _record(event="state")
+    warning.levelno = logging.WARNING
+    assert all(sampler.filter(warning) for _ in range(3))
+    assert sampler.filter(_record(event="action")) is True
+
+
+def test_queue_handler_drops_when_full_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    handler.handle(_record())
+    handler.handle(_record())
+
+    assert handler.queue.qsize() == 1
+    assert handler.dropped == 1
+    assert handler.queue.get_nowait().getMessage() == "Action 33"
+
+
+def test_rotating_handler_rolls_over_on_time(tmp_path):
+    handler = SizeAndTimeRotatingFileHandler(tmp_path / "app.jsonl", interval=60, maxBytes=0, backupCount=2)
+    try:
+        record = _record()
+        assert not handler.shouldRollover(record)
+        record.created = handler.rollover_at + 1
+        assert handler.shouldRollover(record)
+    finally:
+        handler.close()
@@ -0,0 +1,179 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("douzero")
+
+import numpy as np
+
+from app.model_bridge import ModelRegistry
+from app.model_defs import model_dict
+
+
+@pytest.fixture
+def registry(random_ckpt_dir):
+    registry = ModelRegistry(random_ckpt_dir)
+    registry._ensure_imports()
+    registry.device = "cpu"
+    return registry
+
+
+def test_recommend_many_matches_single_recommendations(registry, make_infoset):
+    infosets = [
+        make_infoset("landlord", "33334444556678910J", "QXD", []),
+        make_infoset("landlord_down", "3344556678910JQKA2", "2XD", ["5"]),
+        make_infoset("landlord_down", "3344556678910JQKA2", "2XD", ["KK"]),
+        make_infoset("landlord_up", "3344556678910JQKA2", "2XD", ["9", "10"]),
+    ]
+
+    batched = registry.recommend_many(infosets)
+
+    assert batched == [registry.recommend(infoset) for infoset in infosets]
+    assert all(action in infoset.legal_actions for action, infoset in zip(batched, infosets))
+    for action, infoset in zip(batched, infosets):
+        values = registry.action_values(infoset)
+        assert len(values) == len(infoset.legal_actions)
+        assert infoset.legal_actions[int(values.argmax())] == action
+
+    registry.split_forward = False  # full rows through the network: same decisions
+    assert registry.recommend_many(infosets) == batched
+
+
+def test_opening_recommendation_is_served_from_cache(registry, tmp_path, monkeypatch, make_infoset):
+    from app.opening_cache import OpeningCache
+
+    cached = ModelRegistry(registry.ckpt_root, opening_cache=OpeningCache(tmp_path / "openings.sqlite"))
+    cached._ensure_imports()
+    cached.device = "cpu"
+    infoset = make_infoset("landlord", "33334444556678910J", "QXD", [])
+    first = cached.recommend(infoset)
+    values = cached.action_values(infoset)
+
+    def fail(*_args):
+        raise AssertionError("opening should not be scored again")
+
+    monkeypatch.setattr(cached, "score_decisions", fail)
+    assert cached.recommend(infoset) == first == registry.recommend(infoset)
+    assert np.allclose(cached.action_values(infoset), values)
+
+
+def test_reload_swaps_model_set_and_watch_picks_up_new_files(registry, make_infoset):
+    import os
+    import time
+
+    infoset = make_infoset("landlord_down", "3344556678910JQKA2", "2XD", ["5"])
+    old_set = registry.current
+    old_values = registry.action_values(infoset)
+
+    torch.manual_seed(1)
+    torch.save(model_dict["landlord_down"]().state_dict(), registry.ckpt_map["landlord_down"])
+    assert registry.reload() == 2
+    assert old_set.models["landlord_down"] is not registry.models["landlord_down"]
+    assert not np.allclose(registry.action_values(infoset), old_values)
+
+    stop = registry.watch(interval=0.05)
+    try:
+        ckpt = registry.ckpt_map["landlord"]
+        os.utime(ckpt, ns=(ckpt.stat().st_atime_ns, ckpt.stat().st_mtime_ns + 10**9))
+        deadline = time.time() + 5
+        while registry.version < 3 and time.time() < deadline:
+            time.sleep(0.05)
+        assert registry.version == 3
+    finally:
+        registry.stop_watching()
+    assert stop.is_set()
+
+
+def test_thread_settings_from_env_and_worker_shares(monkeypatch):
+    from app.model_bridge import ThreadSettings, parse_cpu_list
+
+    assert parse_cpu_list("0-3, 8,2") == (0, 1, 2, 3, 8)
+    with pytest.raises(ValueError):
+        parse_cpu_list("a-b")
+
+    monkeypatch.setenv("DOUZERO_INFERENCE_THREADS", "2")
+    monkeypatch.setenv("DOUZERO_INFERENCE_CPUS", "0-3")
+    settings = ThreadSettings.from_env()
+    assert settings == ThreadSettings(intra_op=2, inter_op=None, cpus=(0, 1, 2, 3))
+    assert [settings.for_worker(i, 2).cpus for i in range(2)] == [(0, 1), (2, 3)]
+    assert settings.for_worker(0, 1) is settings
+
+    previous = torch.get_num_threads()
+    ThreadSettings(intra_op=1).apply(torch)
+    assert torch.get_num_threads() == 1
+    torch.set_num_threads(previous)
+
+
+def test_pruned_recommendation_scores_only_top_candidates(registry, monkeypatch, make_infoset):
+    from app.engine.prune import prune_actions
+
+    infoset = make_infoset("landlord", "33334444556678910J", "QXD", [])
+    registry.prune_top = 8
+    rows = []
+    original = registry.score_decisions
+
+    def counting(position, observations, model_set=None):
+        rows.append(sum(len(obs["action_ids"]) for obs in observations))
+        return original(position, observations, model_set)
+
+    monkeypatch.setattr(registry, "score_decisions", counting)
+    action = registry.recommend(infoset)
+
+    kept = [infoset.legal_actions[i] for i in prune_actions(infoset.player_hand_cards, infoset.legal_actions, 8)]
+    assert rows == [len(kept)] and action in kept
+    assert len(registry.action_values(infoset)) == len(infoset.legal_actions)
+
+
+def test_staging_buffers_are_a_bounded_pool_shared_across_threads(registry, make_infoset):
+    import threading
+
+    from app.model_bridge import StagingBuffers
+
+    buffers = StagingBuffers(lambda shape: np.empty(shape, dtype=np.float32), per_key=2)
+    with buffers.checkout("z", (3, 4)) as first:
+        assert first.shape == (3, 4)
+        with buffers.checkout("z", (3, 4)) as second:
+            assert second.base is not first.base  # checked out: never shared
+    with buffers.checkout("z", (4, 4)) as again:
+        assert again.base is first.base or again.base is second.base
+    with buffers.checkout("z", (5, 4)) as grown:
+        assert grown.shape == (5, 4) and len(grown.base) == 8  # next power of two
+
+    other = []
+
+    def use_from_another_thread():
+        with buffers.checkout("z", (2, 4)) as array:
+            other.append(array.base)
+
+    thread = threading.Thread(target=use_from_another_thread)
+    thread.start()
+    thread.join()
+    assert other[0] is first.base or other[0] is second.base  # a new thread reuses the pool
+    assert buffers.idle("z") == 2  # the grown buffer replaced a smaller one
+
+    infosets = [
+        make_infoset("landlord_down", "3344556678910JQKA2", "2XD", ["5"]),
+        make_infoset("landlord_down", "3344556678910JQKA2", "2XD", ["KK"]),
+    ]
+    staged = registry.recommend_many(infosets)
+    assert registry.recommend_many(infosets) == staged
+    registry.staging = None
+    assert registry.recommend_many(infosets) == staged
+
+
+def test_observe_expands_to_get_obs_rows(registry, monkeypatch, make_infoset):
+    infosets = [
+        make_infoset("landlord", "33334444556678910J", "QXD", []),
+        make_infoset("landlord_up", "3344556678910JQKA2", "2XD", ["9", "10"]),
+    ]
+    captured = []
+
+    def capture(position, z_rows, x_rows, model_set=None):
+        captured.append((z_rows.copy(), x_rows.copy()))
+
+    monkeypatch.setattr(registry, "score", capture)
+    for infoset in infosets:
+        expected = registry._get_obs(infoset)
+        registry._score_rows(infoset.player_position, [registry.observe(infoset)])
+        z_rows, x_rows = captured.pop()
+        np.testing.assert_array_equal(z_rows, expected["z_batch"])
+        np.testing.assert_array_equal(x_rows, expected["x_batch"])
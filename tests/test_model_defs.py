@@ -0,0 +1,47 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("douzero")
+
+import numpy as np
+from douzero.env.env import get_obs
+
+from app.engine.parser import parse_action_text
+from app.engine.state import GameState
+from app.model_defs import ACTION_COLUMNS, decision_forward, model_dict
+
+
+def _obs(role: str, hand: str, history: list[str]):
+    state = GameState.create(role, parse_action_text(hand), parse_action_text("QXD"))
+    for text in history:
+        state.apply_action(parse_action_text(text))
+    return get_obs(state.build_infoset_for_user())
+
+
+@pytest.mark.parametrize(
+    "position, decisions",
+    [
+        ("landlord", [("landlord", "33334444556678910J", []), ("landlord", "34567899910JQKA2KK", ["3", "4", "5"])]),
+        (
+            "landlord_up",
+            [("landlord_up", "3344556678910JQKA2", ["9", "10"]), ("landlord_up", "3344556678910JQKA2", ["3", "4"])],
+        ),
+    ],
+)
+def test_decision_forward_matches_full_rows(position, decisions):
+    torch.manual_seed(0)
+    model = model_dict[position]().eval()
+    observations = [_obs(role, hand, history) for role, hand, history in decisions]
+
+    z_rows = torch.from_numpy(np.concatenate([obs["z_batch"] for obs in observations]))
+    x_rows = torch.from_numpy(np.concatenate([obs["x_batch"] for obs in observations]))
+    z = torch.from_numpy(np.stack([obs["z"] for obs in observations])).float()
+    x_shared = torch.from_numpy(np.stack([obs["x_no_action"] for obs in observations])).float()
+    counts = torch.tensor([len(obs["x_batch"]) for obs in observations])
+
+    with torch.no_grad():
+        expected = model.forward(z_rows, x_rows, return_value=True)["values"]
+        split = decision_forward(model, z, x_shared, x_rows[:, -ACTION_COLUMNS:], counts)
+
+    assert split.shape == expected.shape
+    torch.testing.assert_close(split, expected, rtol=1e-5, atol=1e-6)
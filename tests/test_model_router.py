@@ -0,0 +1,81 @@
+from app.engine.parser import parse_action_text
+from app.engine.state import GameState
+from app.model_router import CANDIDATE, PRIMARY, ModelRouter
+from app.server import app, router, sessions
+
+
+class StubRegistry:
+    def __init__(self, root):
+        self.ckpt_root = root
+        self.version = 1
+        self.last_reload_error = None
+
+    def model_tag(self):
+        return f"tag-{self.ckpt_root}"
+
+    def recommend(self, infoset):
+        return infoset.legal_actions[-1]
+
+    def action_values(self, infoset):
+        raise AssertionError("not an endgame")
+
+
+def test_routing_is_sticky_and_respects_percent():
+    primary, candidate = StubRegistry("a"), StubRegistry("b")
+    router = ModelRouter(primary)
+    keys = [f"session-{i}" for i in range(2000)]
+    assert all(router.route(key)[0] == PRIMARY for key in keys)
+
+    router.set_candidate(candidate, 25)
+    arms = [router.route(key)[0] for key in keys]
+    assert 0.2 < arms.count(CANDIDATE) / len(keys) < 0.3
+    assert arms == [router.route(key)[0] for key in keys]
+
+    label = router.label(CANDIDATE, candidate)
+    router.record(label, 12.0, action=[])
+    router.record(label, 8.0, action=[3])
+    router.record(label, 5.0, error=True)
+    summary = router.status()["metrics"][label]
+    assert summary["decisions"] == 2 and summary["errors"] == 1 and summary["pass_rate"] == 0.5
+    assert summary["latency_ms"]["p50"] == 8.0
+
+
+def test_recommendations_report_their_model_version(monkeypatch):
+    game_id = "test_recommendations_report_their_model_version"
+    monkeypatch.setattr(router, "primary", StubRegistry("primary"))
+    monkeypatch.setattr(router, "candidate", StubRegistry("candidate"))
+    monkeypatch.setattr(router, "candidate_percent", 100.0)
+    monkeypatch.setattr(router, "metrics", {})
+    sessions[game_id] = GameState.create("landlord", parse_action_text("33334444556678910J"), parse_action_text("QXD"))
+    try:
+        client = app.test_client()
+        data = client.get(f"/api/game/{game_id}/state").get_json()
+        assert data["recommendation"]["model"] == "candidate@v1:tag-candidate"
+        status = client.get("/api/admin/models").get_json()
+        assert status["candidate_percent"] == 100.0
+        assert status["metrics"]["candidate@v1:tag-candidate"]["decisions"] == 1
+    finally:
+        sessions.pop(game_id, None)
+
+
+def test_admin_endpoints_need_a_token_json_and_a_checkpoint_under_the_root(monkeypatch, tmp_path):
+    from app import server
+
+    client = app.test_client()
+    assert client.post("/api/admin/models/reload", json={}).status_code == 403  # no token configured
+
+    monkeypatch.setattr(server, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(server, "CKPT_ROOT", tmp_path.resolve())
+    monkeypatch.setattr(router, "candidate", None)
+    auth = {"Authorization": "Bearer secret"}
+    assert client.post("/api/admin/models/candidate", json={"ckpt_dir": "."}).status_code == 401
+    cross_site = client.post(
+        "/api/admin/models/candidate", data='{"ckpt_dir": "."}', headers={**auth, "Content-Type": "text/plain"}
+    )
+    assert cross_site.status_code == 415
+
+    outside = client.post("/api/admin/models/candidate", json={"ckpt_dir": "../", "percent": 10}, headers=auth)
+    assert outside.status_code == 400 and "must be under" in outside.get_json()["error"]
+    assert router.candidate is None
+    stopped = client.post("/api/admin/models/candidate", json={"ckpt_dir": None}, headers=auth)
+    assert stopped.status_code == 200 and stopped.get_json()["candidate_percent"] == 0.0
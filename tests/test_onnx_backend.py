@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("douzero")
+pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+
+import numpy as np
+
+from app.model_bridge import ModelBridgeError, ModelRegistry
+from app.onnx_backend import OnnxModelRegistry, export_onnx
+
+
+def test_onnx_backend_matches_torch_models(random_ckpt_dir, make_infoset):
+    exported = export_onnx(random_ckpt_dir)
+    assert [path.name for path in exported] == ["landlord.onnx", "landlord_up.onnx", "landlord_down.onnx"]
+
+    reference = ModelRegistry(random_ckpt_dir)
+    reference._ensure_imports()
+    reference.device = "cpu"
+    onnx_registry = OnnxModelRegistry(random_ckpt_dir)
+
+    rng = np.random.default_rng(0)
+    for position, width in (("landlord", 373), ("landlord_up", 484)):
+        for batch in (1, 7, 300):
+            z = rng.integers(0, 2, size=(batch, 5, 162)).astype(np.float32)
+            x = rng.integers(0, 2, size=(batch, width)).astype(np.float32)
+            np.testing.assert_allclose(
+                onnx_registry.score(position, z, x), reference.score(position, z, x), rtol=1e-4, atol=1e-5
+            )
+
+    infoset = make_infoset("landlord", "33334444556678910J", "QXD", [])
+    assert onnx_registry.recommend(infoset) == reference.recommend(infoset)
+    assert onnx_registry.torch is None
+
+    # An export older than its checkpoint is not used.
+    ckpt = random_ckpt_dir / "landlord_down.ckpt"
+    stale = random_ckpt_dir / "landlord_down.onnx"
+    stat = stale.stat()
+    os.utime(ckpt, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    with pytest.raises(ModelBridgeError, match="older than its checkpoint"):
+        OnnxModelRegistry(random_ckpt_dir).get("landlord_down")
@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.engine.parser import parse_action_text
+from app.opening_cache import OpeningCache, opening_key
+
+
+def _opening(hand: str, landlord_cards: str = "QXD"):
+    return SimpleNamespace(
+        player_position="landlord",
+        player_hand_cards=parse_action_text(hand),
+        three_landlord_cards=parse_action_text(landlord_cards),
+        card_play_action_seq=[],
+    )
+
+
+def test_opening_key_only_for_landlord_lead():
+    infoset = _opening("33334444556678910JQXD")
+    assert opening_key(infoset) == "landlord|33334444556678910JQXD|QXD"
+    infoset.card_play_action_seq = [[3]]
+    assert opening_key(infoset) is None
+
+
+def test_cache_persists_and_evicts_least_recently_used(tmp_path):
+    path = tmp_path / "openings.sqlite"
+    cache = OpeningCache(path, max_entries=2)
+    cache.put("a", "tag", [3], [0.5, 0.25])
+    cache.put("b", "tag", [4, 4], [0.1])
+    cache.put("c", "tag", [], [0.2])
+    assert cache.get("a", "tag")[0] == [3]  # touch "a" so "b" is the oldest
+    cache.evict()
+    cache.close()
+
+    reopened = OpeningCache(path, max_entries=2)
+    assert len(reopened) == 2
+    assert reopened.get("b", "tag") is None
+    action, values = reopened.get("a", "tag")
+    assert action == [3] and np.allclose(values, [0.5, 0.25])
+    assert reopened.get("a", "other-model") is None
+    reopened.close()
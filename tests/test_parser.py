@@ -1,6 +1,17 @@
+import random
+
 import pytest
 
-from app.engine.parser import ParseError, action_to_text, parse_action_click, parse_action_payload, parse_action_text
+from app.engine.parser import (
+    RANK_CARDS,
+    ParseError,
+    action_to_text,
+    cards_to_counts,
+    counts_to_text,
+    parse_action_click,
+    parse_action_payload,
+    parse_action_text,
+)
 
 
 def test_parse_action_text_basic():
@@ -32,3 +43,27 @@ def test_parse_action_reject_more_than_four_same_rank():
 def test_parse_action_click_reject_more_than_four_same_rank():
     with pytest.raises(ParseError):
         parse_action_click({"Q": 5})
+
+
+def test_text_round_trip_property():
+    rng = random.Random(2024)
+    ranks = list(RANK_CARDS)
+    for _ in range(2000):
+        counts = [rng.randint(0, 4) if card < 20 else rng.randint(0, 1) for card in ranks]
+        cards = [card for card, count in zip(ranks, counts) for _ in range(count)]
+        rng.shuffle(cards)
+
+        text = action_to_text(cards)
+        assert counts_to_text(cards_to_counts(cards)) == text
+        assert parse_action_text(text) == sorted(cards)
+
+        # Equivalent spellings: lowercase, spaces, T for 10.
+        variant = " ".join(text.lower().replace("10", rng.choice(["10", "t"])))
+        assert parse_action_text(variant) == sorted(cards)
+
+
+def test_parse_action_text_error_points_at_first_bad_token():
+    with pytest.raises(ParseError, match="Invalid card token: 1Q"):
+        parse_action_text("3 1Q")
+    with pytest.raises(ParseError, match="Invalid card token: 0"):
+        parse_action_text("010")
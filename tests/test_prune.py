@@ -0,0 +1,26 @@
+from app.engine.parser import parse_action_text
+from app.engine.prune import heuristic_scores, prune_actions
+from app.engine.rules import get_legal_actions
+
+
+def test_heuristic_prefers_going_out_and_keeps_bombs_whole():
+    hand = parse_action_text("33334QQ")
+    actions = [parse_action_text(text) for text in ("3", "4", "QQ", "3333", "33334")]
+    scores = heuristic_scores(hand, actions).tolist()
+
+    assert scores[1] > scores[0]  # a loose 4 rather than breaking the bomb
+    assert scores[2] > scores[0]
+    assert max(scores) != scores[3]  # bombing without going out is discouraged
+
+    assert heuristic_scores(parse_action_text("QQ"), [parse_action_text("Q"), parse_action_text("QQ")]).argmax() == 1
+
+
+def test_prune_keeps_top_n_and_pass():
+    hand = parse_action_text("3456789JQKA2XD")
+    rival = [parse_action_text("5")]
+    legal = get_legal_actions(hand, rival)
+    keep = prune_actions(hand, legal, top_n=4)
+
+    assert keep == sorted(keep)
+    assert len(keep) == 5 and legal.index([]) in keep
+    assert prune_actions(hand, legal, top_n=len(legal)) == list(range(len(legal)))
@@ -0,0 +1,74 @@
+import pytest
+
+from app.engine.parser import ParseError, parse_action_text
+from app.replay import build_game_state, parse_action_lines, replay_game
+from app.server import app
+
+
+class FirstLegalRegistry:
+    def __init__(self):
+        self.calls = 0
+
+    def recommend_many(self, infosets):
+        self.calls += 1
+        return [infoset.legal_actions[0] for infoset in infosets]
+
+
+def test_parse_action_lines_accepts_text_and_json_lines():
+    actions = parse_action_lines(
+        """
+        # recorded game
+        landlord: 33
+        PASS
+        {"actor": "landlord_up", "action": {"counts": {"K": 2}}}
+        "pass"
+        """
+    )
+    assert actions == [("landlord", [3, 3]), (None, []), ("landlord_up", [13, 13]), (None, [])]
+
+    with pytest.raises(ParseError, match="Line 1"):
+        parse_action_lines("dealer: 33")
+
+
+def test_replay_recommends_only_at_user_decisions_in_one_batch():
+    state = build_game_state("landlord_down", "3344556678910JQKA2", "2XD")
+    actions = [(None, parse_action_text(text)) for text in ["3", "4", "5", "6", "PASS", "PASS", "Q"]]
+    registry = FirstLegalRegistry()
+
+    report = replay_game(state, actions, registry)
+
+    assert report.error is None
+    assert registry.calls == 1
+    decisions = [step for step in report.steps if step.recommended is not None]
+    assert [step.step for step in decisions] == [2, 5]
+    assert all(step.actor == "landlord_down" for step in decisions)
+    assert report.summary()["decisions"] == 2
+
+
+def test_replay_stops_at_first_invalid_action():
+    state = build_game_state("landlord_down", "3344556678910JQKA2", "2XD")
+    actions = [(None, parse_action_text(text)) for text in ["5", "3"]]
+
+    report = replay_game(state, actions)
+
+    assert len(report.steps) == 1
+    assert report.error_step == 2
+
+
+def test_replay_endpoint_returns_report():
+    client = app.test_client()
+    response = client.post(
+        "/api/replay",
+        json={
+            "role": "landlord_up",
+            "my_hand": "3344556678910JQKA2",
+            "landlord_cards": "2XD",
+            "actions_text": "7\n8\n9\nPASS",
+            "recommend": False,
+        },
+    )
+    data = response.get_json()
+
+    assert response.status_code == 200
+    assert [step["actual"] for step in data["report"]["steps"]] == ["7", "8", "9", "PASS"]
+    assert data["report"]["steps"][2]["actor"] == "landlord_up"
@@ -7,6 +7,7 @@ from app.engine.rules import (
     get_legal_actions,
     get_move_type,
     is_action_compatible_with_rival,
+    is_bomb,
 )
 from app.engine.parser import parse_action_text
 
@@ -19,6 +20,14 @@ def test_get_move_type_basics():
     assert get_move_type(parse_action_text("34"))["type"] == TYPE_15_WRONG
 
 
+def test_is_bomb_matches_move_type_for_lists_and_tuples():
+    hand = parse_action_text("33334444555XD")
+    for action in get_legal_actions(hand, []):
+        expected = get_move_type(action)["type"] in {TYPE_4_BOMB, TYPE_5_KING_BOMB}
+        assert is_bomb(action) is expected
+        assert is_bomb(tuple(action)) is expected
+
+
 def test_action_compatibility():
     assert is_action_compatible_with_rival(parse_action_text("5"), parse_action_text("4")) is True
     assert is_action_compatible_with_rival(parse_action_text("3"), parse_action_text("4")) is False
@@ -0,0 +1,73 @@
+import numpy as np
+
+from app.engine.parser import parse_action_text
+from app.engine.state import GameState
+from app.search import RolloutSearch, run_rollouts
+
+
+class ShortestFirstRegistry:
+    """Plays the first legal move; values prefer moves with fewer cards."""
+
+    def recommend_many(self, infosets):
+        return [infoset.legal_actions[0] for infoset in infosets]
+
+    def action_values(self, infoset):
+        return -np.array([len(action) for action in infoset.legal_actions], dtype=float)
+
+
+def _state():
+    state = GameState.create("landlord_down", parse_action_text("3344556678910JQKA2"), parse_action_text("2XD"))
+    state.apply_action(parse_action_text("3"))
+    return state
+
+
+def test_rollouts_finish_every_game_before_deadline():
+    state = _state()
+    candidates = [[], [4], [17]]
+    deals = [
+        {
+            "landlord": parse_action_text("45678899JQQKK22XD"),
+            "landlord_up": parse_action_text("357789101010JJQKAAA"),
+        }
+    ]
+
+    wins, visits = run_rollouts(ShortestFirstRegistry(), state, deals, candidates, deadline=float("inf"))
+
+    assert visits.tolist() == [1, 1, 1]
+    assert set(wins.tolist()) <= {0.0, 1.0}
+
+
+def test_search_falls_back_to_greedy_and_uses_pool():
+    state = _state()
+
+    in_process = RolloutSearch(ShortestFirstRegistry(), seed=0)
+    assert in_process.recommend(state, budget_ms=0).source == "greedy"
+    result = in_process.recommend(state, budget_ms=100)
+    assert result.rollouts > 0
+    assert result.action in state.legal_actions_for_user()
+
+    pooled = RolloutSearch(ShortestFirstRegistry(), registry_factory=ShortestFirstRegistry, workers=2, seed=0)
+    try:
+        result = pooled.recommend(state, budget_ms=300)
+    finally:
+        pooled.close()
+    assert result.rollouts > 0
+    assert {"text", "visits", "win_rate"} <= set(result.candidates[0])
+
+
+def _broken_registry():
+    raise RuntimeError("checkpoints unavailable")
+
+
+def test_broken_pool_falls_back_to_greedy_then_in_process():
+    state = _state()
+    search = RolloutSearch(ShortestFirstRegistry(), registry_factory=_broken_registry, workers=2, seed=0)
+    try:
+        result = search.recommend(state, budget_ms=300)
+        # Greedy: the registry values passing (no cards) highest.
+        assert (result.action, result.source, result.rollouts) == ([], "greedy", 0)
+        assert search._pool is None
+
+        assert search.recommend(state, budget_ms=100).rollouts > 0
+    finally:
+        search.close()
@@ -32,3 +32,237 @@ def test_submit_action_validation_error_includes_recommendation(monkeypatch):
         assert data["state"]["need_user_action"] is True
     finally:
         sessions.pop(game_id, None)
+
+
+def test_state_endpoint_returns_delta_when_client_sends_version(monkeypatch):
+    game_id = "test_state_endpoint_returns_delta"
+    state = GameState.create(
+        "landlord_down",
+        parse_action_text("3344556678910JQKA2"),
+        parse_action_text("2XD"),
+    )
+    sessions[game_id] = state
+    monkeypatch.setattr("app.server._recommendation_payload", lambda _state: (None, None))
+
+    try:
+        client = app.test_client()
+        full = client.get(f"/api/game/{game_id}/state").get_json()
+        assert "delta" not in full
+        version = full["state"]["version"]
+
+        response = client.post(
+            f"/api/game/{game_id}/action",
+            json={"action": "55", "since_version": version, "since_step": 0},
+        )
+        data = response.get_json()
+
+        assert response.status_code == 200
+        assert "state" not in data
+        assert data["delta"]["base_step"] == 0
+        assert data["delta"]["new_actions"] == [{"step": 1, "actor": "landlord", "text": "55"}]
+        assert data["delta"]["acting_role"] == "landlord_down"
+    finally:
+        sessions.pop(game_id, None)
+
+
+def test_inference_endpoint_reports_per_rank_probabilities():
+    game_id = "test_inference_endpoint_reports_per_rank_probabilities"
+    state = GameState.create("landlord_up", parse_action_text("3344556678910JQKA2"), parse_action_text("2XD"))
+    sessions[game_id] = state
+
+    try:
+        data = app.test_client().get(f"/api/game/{game_id}/inference").get_json()
+        assert data["ok"] is True
+        inference = data["inference"]
+        assert inference["ranks"][-2:] == ["X", "D"]
+        landlord = inference["opponents"]["landlord"]
+        assert landlord["cards_left"] == 20
+        assert landlord["expected"][-1] == 1.0
+        assert abs(sum(landlord["expected"]) - 20) < 1e-2
+    finally:
+        sessions.pop(game_id, None)
+
+
+def test_game_socket_pushes_state_deltas_then_recommendations(monkeypatch):
+    import json
+    import threading
+
+    from simple_websocket import Client
+    from werkzeug.serving import make_server
+
+    game_id = "test_game_socket_pushes_state_deltas"
+    sessions[game_id] = GameState.create(
+        "landlord_down",
+        parse_action_text("3344556678910JQKA2"),
+        parse_action_text("2XD"),
+    )
+    monkeypatch.setattr(
+        "app.server._recommendation_payload",
+        lambda state: ({"text": "PASS"}, None) if state.need_user_action() else (None, None),
+    )
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"ws://127.0.0.1:{server.server_port}/api/game/{game_id}/ws"
+    ws = Client.connect(url)
+
+    def receive():
+        return json.loads(ws.receive(timeout=5))
+
+    try:
+        first = receive()
+        assert first["type"] == "state" and first["state"]["acting_role"] == "landlord"
+        assert receive() == {"type": "recommendation", "version": 0, "recommendation": None, "recommendation_error": None}
+
+        ws.send(json.dumps({"type": "action", "action": "55"}))
+        update = receive()
+        assert "state" not in update
+        assert update["delta"]["new_actions"] == [{"step": 1, "actor": "landlord", "text": "55"}]
+        assert update["need_user_action"] is True
+        recommendation = receive()
+        assert recommendation["recommendation"] == {"text": "PASS"}
+        assert recommendation["version"] == update["delta"]["version"]
+
+        ws.send(json.dumps({"type": "action", "action": "3"}))
+        assert "validation_error" in receive()
+
+        ws.send(json.dumps({"type": "undo"}))
+        undone = receive()
+        assert undone["delta"]["base_step"] == 0 and undone["delta"]["new_actions"] == []
+        assert receive()["type"] == "recommendation"
+
+        # A client that is already current gets an empty delta and no recommendation.
+        current = Client.connect(f"{url}?since_version={undone['delta']['version']}&since_step=0")
+        greeting = json.loads(current.receive(timeout=5))
+        assert greeting["delta"]["new_actions"] == [] and greeting["recommendation_pending"] is False
+        assert current.receive(timeout=0.2) is None
+        current.close()
+    finally:
+        ws.close()
+        server.shutdown()
+        sessions.pop(game_id, None)
+
+
+def test_games_state_batches_recommendations_across_tables(monkeypatch):
+    class BatchingRegistry:
+        version = 1
+
+        def __init__(self):
+            self.calls = []
+
+        def model_tag(self):
+            return "test"
+
+        def recommend_many(self, infosets):
+            self.calls.append(len(infosets))
+            return [infoset.legal_actions[0] for infoset in infosets]
+
+    registry = BatchingRegistry()
+    monkeypatch.setattr("app.server.router.route", lambda _key: ("primary", registry))
+    hands = ("33334444556678910J", "3344556678910JQKA2", "34567899910JQKA2KK")
+    ids = [f"test_games_state_{index}" for index in range(3)]
+    for game_id, hand in zip(ids, hands):
+        sessions[game_id] = GameState.create("landlord", parse_action_text(hand), parse_action_text("QXD"))
+    sessions[ids[2]].apply_action(parse_action_text("3"))  # the opponents' turn now
+
+    try:
+        client = app.test_client()
+        version = sessions[ids[1]].version
+        response = client.post(
+            "/api/games/state",
+            json={"games": [ids[0], {"game_id": ids[1], "since_version": version, "since_step": 0}, ids[2], "gone"]},
+        )
+        games = response.get_json()["games"]
+
+        assert registry.calls == [2]  # both pending tables in one batch
+        assert [game["ok"] for game in games] == [True, True, True, False]
+        assert games[0]["recommendation"]["text"] and "state" in games[0]
+        assert games[1]["delta"]["new_actions"] == [] and games[1]["recommendation"] is not None
+        assert games[2]["need_user_action"] is False and games[2]["recommendation"] is None
+        assert games[3]["error"] == "Game not found or expired."
+
+        everything = client.post("/api/games/state", json={}).get_json()["games"]
+        assert set(ids) <= {game["game_id"] for game in everything}
+        known = {"game_id": ids[1], "since_version": version, "since_step": 0}
+        merged = client.post("/api/games/state", json={"games": [known], "include_active": True}).get_json()["games"]
+        assert "delta" in merged[0] and set(ids) <= {game["game_id"] for game in merged}
+    finally:
+        for game_id in ids:
+            sessions.pop(game_id, None)
+
+
+def test_idempotency_key_applies_an_action_once(monkeypatch):
+    game_id = "test_idempotency_key_applies_an_action_once"
+    state = GameState.create("landlord_down", parse_action_text("3344556678910JQKA2"), parse_action_text("2XD"))
+    sessions[game_id] = state
+    monkeypatch.setattr("app.server._recommendation_payload", lambda _state: (None, None))
+
+    try:
+        client = app.test_client()
+        headers = {"Idempotency-Key": "click-1"}
+        first = client.post(f"/api/game/{game_id}/action", json={"action": "55"}, headers=headers)
+        again = client.post(f"/api/game/{game_id}/action", json={"action": "55"}, headers=headers)
+        assert first.status_code == again.status_code == 200
+        assert again.get_json() == first.get_json()
+        assert len(state.action_log) == 1
+
+        client.post(f"/api/game/{game_id}/action", json={"action": "PASS"}, headers={"Idempotency-Key": "click-2"})
+        assert len(state.action_log) == 2
+        client.post(f"/api/game/{game_id}/undo", headers=headers)  # same key, different endpoint
+        assert len(state.action_log) == 1
+    finally:
+        sessions.pop(game_id, None)
+
+
+def test_recommendations_are_shared_per_state_version(monkeypatch):
+    from app import server
+
+    calls = []
+    monkeypatch.setattr(server, "_recommendations", server.SingleFlight(ttl=60))
+    monkeypatch.setattr(server, "_recommendation_payloads", lambda states: calls.append(1) or [({"text": "3"}, None)])
+    state = GameState.create("landlord", parse_action_text("33334444556678910J"), parse_action_text("QXD"))
+
+    assert server._recommendation_payload(state) == server._recommendation_payload(state) == ({"text": "3"}, None)
+    assert len(calls) == 1
+    state.apply_action(parse_action_text("3"))
+    server._recommendation_payload(state)
+    assert len(calls) == 2
+
+
+def test_unsolved_endgame_reuses_the_solver_values_for_the_greedy_move(monkeypatch):
+    import numpy as np
+
+    from app import server
+    from app.engine.endgame import EndgameResult
+
+    class ValuesOnlyRegistry:
+        version = 1
+
+        def __init__(self):
+            self.value_calls = 0
+
+        def model_tag(self):
+            return "test"
+
+        def action_values(self, infoset):
+            self.value_calls += 1
+            return np.arange(len(infoset.legal_actions), dtype=np.float32)
+
+        def recommend(self, infoset):
+            raise AssertionError("the network already ran for the solver")
+
+    registry = ValuesOnlyRegistry()
+    unproven = EndgameResult(action=None, complete=True, deals=1, nodes=7, tt_lookups=0, tt_hits=0, elapsed_ms=0.0)
+    monkeypatch.setattr(server.router, "route", lambda _key: ("primary", registry))
+    monkeypatch.setattr(server, "endgame_deals", lambda _state: ((),))
+    monkeypatch.setattr(server, "solve_endgame", lambda *_args, **_kwargs: unproven)
+    monkeypatch.setattr(server, "SEARCH_BUDGET_MS", 0)
+    state = GameState.create("landlord", parse_action_text("33334444556678910J"), parse_action_text("QXD"))
+
+    [(payload, error)] = server._recommendation_payloads([state])
+    assert error is None and registry.value_calls == 1
+    assert parse_action_text(payload["text"]) == state.legal_actions_for_user()[-1]
+
+    monkeypatch.setattr(server, "endgame_deals", lambda _state: None)  # too many deals: no network pass for the solver
+    registry.recommend = lambda infoset: infoset.legal_actions[0]
+    assert server._recommendation_payloads([state])[0][0]["text"] and registry.value_calls == 1
@@ -0,0 +1,81 @@
+import threading
+import time
+
+import pytest
+
+from app.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_run():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    runs = []
+
+    def work():
+        runs.append(1)
+        started.set()
+        release.wait(5)
+        return "value"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("key", work)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do("key", work))) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert runs == [1] and results == ["value"] * 4
+    assert len(flight) == 0  # nothing retained without ttl
+    assert flight.do("key", lambda: "again") == "again"
+
+
+def test_results_are_retained_for_ttl_but_errors_are_not():
+    flight = SingleFlight(ttl=60)
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.do("a", lambda: 2) == 1
+    assert flight.cached("a") == 1 and flight.cached("b", "missing") == "missing"
+
+    flight.put("b", 3)
+    assert flight.do("b", lambda: 4) == 3
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.do("c", fail)
+    assert flight.do("c", lambda: 5) == 5
+
+    expiring = SingleFlight(ttl=0.01)
+    expiring.do("a", lambda: 1)
+    time.sleep(0.02)
+    assert expiring.do("a", lambda: 2) == 2
+
+
+def test_do_many_batches_new_keys_and_waits_for_keys_in_flight():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return "from single"
+
+    single = threading.Thread(target=lambda: flight.do("a", slow))
+    single.start()
+    started.wait(5)
+
+    batches = []
+
+    def batch(keys):
+        batches.append(keys)
+        release.set()
+        return [f"batched {key}" for key in keys]
+
+    assert flight.do_many(["a", "b", "c", "b"], batch) == ["from single", "batched b", "batched c", "batched b"]
+    single.join(5)
+    assert batches == [["b", "c"]] and len(flight) == 0
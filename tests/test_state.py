@@ -46,3 +46,123 @@ def test_landlord_must_input_17_hand_cards():
             parse_action_text("33334444556678910JQXD"),
             parse_action_text("3XD"),
         )
+
+
+def test_snapshot_delta_returns_new_actions_and_handles_undo():
+    state = GameState.create(
+        "landlord",
+        parse_action_text("33334444556678910J"),
+        parse_action_text("QXD"),
+    )
+    state.apply_action(parse_action_text("5"))
+    version, step = state.version, len(state.action_log)
+
+    state.apply_action(parse_action_text("6"))
+    delta = state.snapshot_delta(version, step)
+    assert delta["base_step"] == 1
+    assert [item["text"] for item in delta["new_actions"]] == ["6"]
+    assert delta["num_cards_left_dict"] == state.snapshot()["num_cards_left_dict"]
+
+    version, step = state.version, len(state.action_log)
+    state.undo()
+    state.apply_action(parse_action_text("7"))
+    delta = state.snapshot_delta(version, step)
+    assert delta["base_step"] == 1
+    assert [item["text"] for item in delta["new_actions"]] == ["7"]
+
+    assert state.snapshot_delta(state.version + 1, 0) is None
+
+
+def test_opponent_validation_uses_cached_rival_and_unseen_counts():
+    from collections import Counter
+
+    from app.engine.parser import DECK_COUNTER, RANK_CARDS
+    from app.engine.rules import get_move_type
+
+    state = GameState.create("landlord_up", parse_action_text("3344556678910JQKA2"), parse_action_text("2XD"))
+    state.apply_action(parse_action_text("33"))
+    with pytest.raises(ValidationError, match="cannot beat"):
+        state.apply_action(parse_action_text("3"))
+    with pytest.raises(ValidationError, match="remaining card pool"):
+        state.apply_action(parse_action_text("2222"))  # one 2 is in the user's hand
+    state.apply_action(parse_action_text("99"))
+    state.apply_action([])  # user
+    state.apply_action([])  # landlord
+    with pytest.raises(ValidationError, match="leading a new round"):
+        state.apply_action([])
+    state.apply_action(parse_action_text("222"))  # landlord_down leads a triple
+    state.undo()
+    state.undo()
+
+    for _ in range(len(state.action_log) + 1):
+        expected = Counter(DECK_COUNTER)
+        expected.subtract(state.my_hand_cards)
+        for cards in state.played_cards.values():
+            expected.subtract(cards)
+        assert state._remaining_unseen_cards() == sorted((+expected).elements())
+        assert state.unseen_counts() == tuple(expected[card] for card in RANK_CARDS)
+        assert state._rival_info == get_move_type(state.get_last_move())
+        if state.action_log:
+            state.undo()
+
+
+def test_state_shares_move_tuples_with_log_and_infoset():
+    state = GameState.create("landlord_down", parse_action_text("3344556678910JQKA2"), parse_action_text("2XD"))
+    assert not hasattr(state, "__dict__")
+    state.apply_action(parse_action_text("33"))
+    state.apply_action(parse_action_text("44"))
+
+    entry = state.action_log[-1]
+    assert (entry.actor, entry.action) == ("landlord_down", (4, 4))
+    assert state.card_play_action_seq[-1] is entry.action
+    assert state.last_move_dict["landlord_down"] is entry.action
+    assert state.my_hand_cards == tuple(parse_action_text("33556678910JQKA2"))
+
+    state.apply_action([])
+    state.apply_action([])
+    infoset = state.build_infoset_for_user()
+    assert infoset.player_hand_cards is state.my_hand_cards
+    assert infoset.card_play_action_seq == state.card_play_action_seq
+    assert infoset.card_play_action_seq is not state.card_play_action_seq
+    assert infoset.card_play_action_seq[1] is entry.action
+    assert infoset.last_move == ()  # both others passed, so the user leads
+
+    with pytest.raises(ValidationError, match="Invalid action"):
+        state.apply_action(parse_action_text("44"))
+    state.apply_action(parse_action_text("55"))
+    state.undo()
+    assert state.action_log[-1].action == ()
+    assert state.my_hand_cards == tuple(parse_action_text("33556678910JQKA2"))
+
+
+def test_fork_branches_independently_and_apply_unchecked_matches_apply_action():
+    state = GameState.create("landlord_up", parse_action_text("3344556678910JQKA2"), parse_action_text("2XD"))
+    state.apply_action(parse_action_text("33"))
+    log, seq = state.action_log, state.card_play_action_seq
+
+    checked = state.fork()
+    fast = state.fork()
+    assert fast.action_log is log  # shared until written
+    for text in ("77", "", "KK"):  # the user (landlord_up) passes
+        checked.apply_action(parse_action_text(text))
+        fast.apply_unchecked(tuple(parse_action_text(text)))
+
+    assert state.action_log == log and len(log) == 1 and seq == [(3, 3)]
+    assert state.acting_role == "landlord_down" and state.num_cards_left_dict["landlord"] == 18
+    assert fast.action_log is not log
+    assert fast.snapshot() == checked.snapshot()
+    assert fast.my_hand_cards == checked.my_hand_cards
+    assert fast._remaining_unseen_cards() == checked._remaining_unseen_cards()
+
+    # Validation after unchecked moves classifies the rival move on demand.
+    with pytest.raises(ValidationError, match="cannot beat"):
+        fast.apply_action(parse_action_text("QQ"))
+    fast.apply_action(parse_action_text("AA"))
+    fast.undo()
+    assert fast.snapshot()["action_log"] == checked.snapshot()["action_log"]
+    assert state.version == 1
+
+    # Moves must already be in the stored shape (checked in debug runs only).
+    for bad in ([3], (4, 3)):
+        with pytest.raises(AssertionError):
+            state.fork().apply_unchecked(bad)